@@ -4,7 +4,7 @@ import logging
 from typing_extensions import Self
 from openpyxl import load_workbook
 import numpy as np
-from scipy.sparse import coo_matrix, csr_matrix, lil_matrix, diags
+from scipy.sparse import bmat, coo_matrix, csr_matrix, lil_matrix, diags
 from scipy import constants, integrate, interpolate
 import pandas as pd
 import os
@@ -30,13 +30,18 @@ from conductor_flags import (
     ELECTRIC_TIME_STEP_NUMBER,
     VARIABLE_CONTACT_PERIMETER,
     CONSTANT_CONTACT_PERIMETER,
+    ELEMENT_WISE_ASSEMBLY,
+    GAUSS_BANDED_SOLVER,
 )
+from conductor_state import ConductorState
 from fluid_component import FluidComponent
 from jacket_component import JacketComponent
 from stack_component import StackComponent
 from strand_component import StrandComponent
 from strand_mixed_component import StrandMixedComponent
 from strand_stabilizer_component import StrandStabilizerComponent
+from step_workspace import StepWorkspace
+from time_history import TimeHistory
 
 # import functions
 from utility_functions.auxiliary_functions import (
@@ -73,6 +78,62 @@ from properties_of_materials.stainless_steel import thermal_conductivity_ss
 # Get the logger specified in the file
 conductorlogger = logging.getLogger("opensc2Logger.conductor")
 
+# Namedtuple constructors defined at module level to allow pickling of 
+# Conductor objects (see class ConductorPool).
+# Index of the velocity, pressure and temperature equations of 
+# FluidComponent objects.
+Fluid_eq_idx = namedtuple("Fluid_eq_idx", ("velocity","pressure","temperature"))
+# Collection of the interfaces between conductor components.
+Interface_collection = namedtuple(
+    "Interface_collection",
+    (
+        "fluid_fluid",
+        "fluid_solid",
+        "solid_solid",
+        "env_solid",
+    )
+)
+# Interface between two conductor components.
+Interface = namedtuple(
+    "Interface",
+    (
+        "interf_name",
+        "comp_1",
+        "comp_2",
+    )
+)
+
+# Attributes of the conductor modified by the time integration, saved by
+# method Conductor.save_state: time histories of the solution, arrays in
+# nodal and Gauss points, electric solution and known term vectors, electric
+# time, time step counters and energy balance.
+CONDUCTOR_STATE_ATTRIBUTES = (
+    "dict_Step",
+    "dict_node_pt",
+    "dict_Gauss_pt",
+    "dict_norm",
+    "heat_rad_jk",
+    "heat_exchange_jk_env",
+    "electric_solution",
+    "electric_known_term_vector",
+    "electric_known_term_vector_old",
+    "electric_right_hand_side",
+    "electric_time",
+    "cond_el_num_step",
+    "cond_num_step",
+    "enthalpy_balance",
+    "enthalpy_out",
+    "enthalpy_inl",
+)
+# Attributes of the conductor components modified by the time integration,
+# saved by method Conductor.save_state.
+COMPONENT_STATE_ATTRIBUTES = (
+    "dict_node_pt",
+    "dict_Gauss_pt",
+    "radiative_heat_env",
+    "radiative_heat_inn",
+)
+
 
 class Conductor:
 
@@ -97,6 +158,16 @@ class Conductor:
 
     KIND = "Conductor"
     CHUNCK_SIZE = 100
+    # Number of edges of the square blocks of couples of edges in which the 
+    # analytical mutual inductances are evaluated (see method 
+    # __mutual_inductance): bounds the memory used by the intermediate arrays. 
+    # Assigned by method Simulation.__set_inductance_evaluation (key 
+    # INDUCTANCE_BLOCK_SIZE of the transient input).
+    inductance_block_size = 128
+    # Solver of the linear system of the transient electric problem with 
+    # cached LU factorization (class ElectricLinearSolver), assigned by method 
+    # Simulation.__set_electric_solver; if None function spsolve is used.
+    electric_solver = None
 
     def __init__(self: Self, simulation: object, sheetConductorsList: list, ICOND: int):
         """Makes an instance of class conductor.
@@ -314,6 +385,67 @@ class Conductor:
 
     def __repr__(self):
         return f"{self.__class__.__name__}(Type: {self.KIND}, identifier: {self.identifier})"
+
+    def __setstate__(self:Self, state:dict):
+        """Method that restores the state of the conductor object when it is unpickled (pool of processes). Key SYSVAR_NODAL of dictionary dict_Step is built again as a view of key SYSVAR, since the view is lost when the arrays are copied.
+
+        Args:
+            self (Self): conductor object.
+            state (dict): attributes of the conductor object.
+        """
+        self.__dict__.update(state)
+        if "SYSVAR_NODAL" in self.__dict__.get("dict_Step", dict()):
+            self.dict_Step["SYSVAR_NODAL"] = self.dict_Step["SYSVAR"][
+                :, 0
+            ].reshape(self.dict_Step["SYSVAR_NODAL"].shape)
+
+    def save_state(self:Self):
+        """Method that saves the state of the conductor modified by the time integration, used to restore the conductor if a time step is rejected (see function Simulation.advance_conductor_solution). The state is copied in the preallocated buffers of attribute saved_state (see class ConductorState) and includes:
+        * the solution and the time histories of dictionary dict_Step;
+        * the arrays in nodal and Gauss points of the conductor, of its components and of the coolant (with the cache of the coolant properties) and channel of FluidComponent objects;
+        * the electric solution and known term vectors and the electric time;
+        * the time, the time step counters and the energy balance of the conductor.
+
+        Args:
+            self (Self): conductor object.
+        """
+        items = [
+            (
+                self.__dict__,
+                [name for name in CONDUCTOR_STATE_ATTRIBUTES if name in self.__dict__],
+            ),
+            (self.cond_time, (-1,)),
+        ]
+        for comp in self.inventory["all_component"].collection:
+            items.append(
+                (
+                    comp.__dict__,
+                    [
+                        name
+                        for name in COMPONENT_STATE_ATTRIBUTES
+                        if name in comp.__dict__
+                    ],
+                )
+            )
+        for fluid_comp in self.inventory["FluidComponent"].collection:
+            items.append(
+                (
+                    fluid_comp.coolant.__dict__,
+                    ("dict_node_pt", "dict_Gauss_pt", "property_cache"),
+                )
+            )
+            items.append(
+                (fluid_comp.channel.__dict__, ("dict_htc_steady", "dict_nusselt"))
+            )
+        self.saved_state.save(items)
+
+    def restore_state(self:Self):
+        """Method that restores the state of the conductor saved by method save_state, copying it in place; the saved state is not modified and can be used to restore the state again.
+
+        Args:
+            self (Self): conductor object.
+        """
+        self.saved_state.restore()
     
     def __check_conductor_coupling(self:Self):
         """Private method that performs checks on user defined input file conductor_coupling.xlsx.
@@ -900,13 +1032,6 @@ class Conductor:
         """Private method that evaluates the index of the velocity, pressure and temperature equation of the FluidComponent objects, collecting them in a dictionary of NamedTuple, together with the index of the temperature equation of the SolidComponent objects stored as integer in the same dictionary.
         """
         
-        # Constructor of the namedtuple to store the index of the equations for 
-        # FluidComponent objects.
-        Fluid_eq_idx = namedtuple(
-            "Fluid_eq_idx",
-            ("velocity","pressure","temperature")
-        )
-
         # self.equation_index -> dict: collection of NamedTuple with the index
         # of velocity, pressure and temperaure equation for FluidComponent
         # objects and of integer for the index of the temperature equation of
@@ -1056,6 +1181,18 @@ class Conductor:
         self.theta_method = _[self.inputs["ELECTRIC_METHOD"]]
         self.electric_theta = _[self.inputs["ELECTRIC_METHOD"]]
         conductorlogger.debug(f"Defined electric_theta\n")
+        # Assembly mode of the thermal hydraulic system (element by element or
+        # vectorized on the whole mesh); key ASSEMBLY_MODE is optional in the
+        # transient input, the element by element assembly is the default.
+        self.assembly_mode = simulation.transient_input.get(
+            "ASSEMBLY_MODE", ELEMENT_WISE_ASSEMBLY
+        )
+        # Linear solver of the thermal hydraulic system; key LINEAR_SOLVER is
+        # optional in the transient input, the banded Gaussian elimination is
+        # the default.
+        self.th_linear_solver = simulation.transient_input.get(
+            "LINEAR_SOLVER", GAUSS_BANDED_SOLVER
+        )
         ## Evaluate parameters useful in function \
         # Transient_solution_functions.py\STEP (cdp, 07/2020)
         # dict_N_equation keys meaning:
@@ -1248,6 +1385,7 @@ class Conductor:
             dtype=float,
         )
 
+        self.build_electric_structure_flag = True
         self.build_electric_mass_matrix_flag = True
         self.electric_mass_matrix = lil_matrix(
             (
@@ -2568,27 +2706,6 @@ class Conductor:
         solid_components = self.inventory["SolidComponent"].collection
         interf_flag = self.dict_df_coupling["contact_perimeter_flag"]
 
-        # Namedtuple constructor definition.
-        Interface_collection = namedtuple(
-            "Interface_collection",
-            (
-                "fluid_fluid",
-                "fluid_solid",
-                "solid_solid",
-                "env_solid",
-            )
-        )
-
-        # Namedtuple constructor definition.
-        Interface = namedtuple(
-            "Interface",
-            (
-                "interf_name",
-                "comp_1",
-                "comp_2",
-            )
-        )
-
         # Namedtuple initialization: each field is an empty list to be filled 
         # with interfaces.
         self.interface = Interface_collection(
@@ -2757,19 +2874,20 @@ class Conductor:
 
         # Nested loop jacket - jacket.
         for rr, jacket_r in enumerate(self.inventory["JacketComponent"].collection):
-            # np array of shape (Node, 1) to avoid broadcasting error.
-            jacket_r.radiative_heat_env = np.zeros(
-                (jacket_r.dict_node_pt["temperature"].size, 1)
+            # Time history with a single level, stacked as np array of shape 
+            # (Node, 1) to avoid broadcasting error.
+            jacket_r.radiative_heat_env = TimeHistory(
+                1, (jacket_r.dict_node_pt["temperature"].size,)
             )
             for _, jacket_c in enumerate(
                 self.inventory["JacketComponent"].collection[rr + 1 :]
             ):
                 jacket_r.radiative_heat_inn[
                     f"{jacket_r.identifier}_{jacket_c.identifier}"
-                ] = np.zeros((jacket_r.dict_node_pt["temperature"].size, 1))
+                ] = TimeHistory(1, (jacket_r.dict_node_pt["temperature"].size,))
                 jacket_c.radiative_heat_inn[
                     f"{jacket_r.identifier}_{jacket_c.identifier}"
-                ] = np.zeros((jacket_c.dict_node_pt["temperature"].size, 1))
+                ] = TimeHistory(1, (jacket_c.dict_node_pt["temperature"].size,))
             # End for cc.
         # End for rr.
 
@@ -2894,18 +3012,20 @@ class Conductor:
         # method that solves the transient (cdp, 10/2020)
         if self.inputs["METHOD"] == "BE" or self.inputs["METHOD"] == "CN":
             # Backward Euler or Crank-Nicolson (cdp, 10/2020)
+            # SYSLOD: time history of the load vector (current and previous 
+            # time step).
             self.dict_Step = dict(
-                SYSLOD=np.zeros((self.dict_N_equation["Total"], 2)),
+                SYSLOD=TimeHistory(2, (self.dict_N_equation["Total"],)),
                 SYSVAR=np.zeros((self.dict_N_equation["Total"], 1)),
             )
         elif self.inputs["METHOD"] == "AM4":
             # Adams-Moulton order 4 (cdp, 10/2020)
             self.dict_Step = dict(
-                SYSLOD=np.zeros((self.dict_N_equation["Total"], 4)),
+                SYSLOD=TimeHistory(4, (self.dict_N_equation["Total"],)),
                 SYSVAR=np.zeros((self.dict_N_equation["Total"], 3)),
-                # AM4_AA: four matrices of size Full * Total
-                AM4_AA=np.zeros(
-                    (4,self.dict_band["Full"],self.dict_N_equation["Total"])
+                # AM4_AA: time history of four matrices of size Full * Total
+                AM4_AA=TimeHistory(
+                    4, (self.dict_band["Full"],self.dict_N_equation["Total"])
                 ),
             )
         # end if self.inputs
@@ -2954,6 +3074,37 @@ class Conductor:
             # end for cc (cdp, 10/2020)
         # end if self.dict_Step["SYSVAR"].shape[-1] (cdp, 10/2020)
 
+        # Zero copy view of the solution at the current time step with shape 
+        # (N_nod, NODOFS): row ii collects the unknowns of node ii, column jj 
+        # is the spatial distribution of unknown jj (see function 
+        # reorganize_th_solution).
+        self.dict_Step["SYSVAR_NODAL"] = self.dict_Step["SYSVAR"][:, 0].reshape(
+            self.grid_features["N_nod"], self.dict_N_equation["NODOFS"]
+        )
+
+        # Evaluate once per mesh the index used to assemble and to solve the
+        # thermal hydraulic system.
+        self.__build_sparse_pattern()
+        # Preallocated buffers used by function step.
+        self.workspace = StepWorkspace(self.grid_features["N_nod"])
+        # Data of the error controlled time step selection (flag IADAPTIME = 
+        # IADAPTIME_ERROR_CONTROL): solution at the last two accepted time 
+        # steps, last accepted time step, time step proposed by the PI 
+        # controller, last error norm and counters of the accepted and 
+        # rejected time steps.
+        self.error_control = dict(
+            solution=TimeHistory(2, (self.dict_N_equation["Total"],)),
+            time_step=simulation.transient_input["STPMIN"],
+            next_time_step=simulation.transient_input["STPMIN"],
+            error=1.0,
+            accepted=0,
+            rejected=0,
+        )
+        self.error_control["solution"][0] = self.dict_Step["SYSVAR"][:, 0]
+        # State of the conductor at the beginning of the time step, restored 
+        # if the time step is rejected (see method save_state).
+        self.saved_state = ConductorState()
+
         conductorlogger.debug(
             f"Before call function {save_geometry_discretization.__name__}.\n"
         )
@@ -2978,6 +3129,57 @@ class Conductor:
 
     # end method initialization
 
+    def __build_sparse_pattern(self):
+        """Private method that evaluates the index that depend only on the mesh and on the number of equations of the thermal hydraulic system and stores them in dictionary sparse_pattern:
+            * assembly_index: row and column index of the band storage where the element matrices of all the elements are scattered (vectorized assembly); the rows of the second node of each element come first, followed by the rows of the first node, to sum the contributions in the same order of the element by element assembly;
+            * indptr, indices: sparsity pattern of the system matrix in CSC format (equations of node n are coupled only with the equations of nodes n - 1, n and n + 1);
+            * band_index: flat index in the band storage of SYSMAT of the non zero values of the CSC pattern;
+            * data: preallocated array of the non zero values of the CSC pattern.
+        """
+
+        # Alias
+        main_diag = self.dict_band["Main_diag"]
+        ndf = self.dict_N_equation["NODOFS"]
+        ndf2 = self.dict_N_equation["NODOFS2"]
+        total = self.dict_N_equation["Total"]
+        n_nod = self.grid_features["N_nod"]
+
+        # Element row hbw_idx goes in rows Half - hbw_idx - 1 to Full - hbw_idx
+        # of column NODOFS * elem_idx + hbw_idx of the band storage (see 
+        # function assemble_matrix).
+        hbw_idx = np.arange(ndf2)
+        row_idx = main_diag - hbw_idx[:, np.newaxis] + hbw_idx
+        col_idx = np.arange(self.grid_input["NELEMS"])[:, np.newaxis] * ndf + hbw_idx
+        assembly_index = tuple(
+            (node_rows, row_idx[node_rows], col_idx[:, node_rows])
+            for node_rows in (slice(ndf, ndf2), slice(0, ndf))
+        )
+
+        # CSC pattern: column jj is coupled with the rows of the nodes adjacent
+        # to its node.
+        node = np.arange(total) // ndf
+        row_lb = np.maximum(node - 1, 0) * ndf
+        nnz = np.minimum(node + 2, n_nod) * ndf - row_lb
+        indptr = np.zeros(total + 1, dtype=int)
+        indptr[1:] = np.cumsum(nnz)
+        col = np.repeat(np.arange(total), nnz)
+        indices = (
+            np.arange(indptr[-1])
+            - np.repeat(indptr[:-1], nnz)
+            + np.repeat(row_lb, nnz)
+        )
+        # Coefficient (ii,jj) of the system matrix is stored in row 
+        # jj - ii + Main_diag and column ii of the band storage.
+        band_index = (col - indices + main_diag) * total + indices
+
+        self.sparse_pattern = dict(
+            assembly_index=assembly_index,
+            indptr=indptr,
+            indices=indices,
+            band_index=band_index,
+            data=np.zeros(indptr[-1]),
+        )
+
     ############################################################################
 
     ##### ELECTRIC PREPROCESSING ############
@@ -3133,25 +3335,39 @@ class Conductor:
         self.incidence_matrix_transposed = self.incidence_matrix.T
 
     def __build_electric_resistance_matrix(self):
-        """Private method that builds the elecrtic resistance matrix limited to components of kind StrandMixedComponent, StrandStabilizerComonent and StackComponent. Value stored in attribute electric_resistance_matrix. Thake adantage of sparse matrices."""
-
-        resistance = np.zeros(self.total_elements_current_carriers)
-        for ii, obj in enumerate(self.inventory["StrandComponent"].collection):
-            resistance[
-                ii :: self.inventory["StrandComponent"].number
-            ] = obj.get_electric_resistance(self)
-
-        self.electric_resistance_matrix = diags(
-            resistance,
-            offsets=0,
+        """Private method that builds the structure of the elecrtic resistance matrix limited to components of kind StrandMixedComponent, StrandStabilizerComonent and StackComponent: a diagonal matrix with one stored value for each element, updated in place by method __update_electric_resistance_matrix. Value stored in attribute electric_resistance_matrix. Thake adantage of sparse matrices."""
+
+        # Use csr_matrix instead of diags since diags does not store the
+        # diagonal values equal to 0: in this way the position of the element
+        # resistance in the data array does not depend on its value.
+        index = np.r_[0 : self.total_elements_current_carriers]
+        self.electric_resistance_matrix = csr_matrix(
+            (np.ones(self.total_elements_current_carriers), (index, index)),
             shape=(
                 self.total_elements_current_carriers,
                 self.total_elements_current_carriers,
             ),
-            format="csr",
             dtype=float,
         )
 
+    def __update_electric_resistance_matrix(self):
+        """Private method that evaluates the elecrtic resistance of components of kind StrandMixedComponent, StrandStabilizerComonent and StackComponent and updates in place the data array of the electric resistance matrix and of the resistance block of the electric stiffness matrix structure. Updated electric stiffness matrix stored in attribute electric_stiffness_matrix."""
+
+        # The data array of the diagonal resistance matrix is sorted by row,
+        # i.e. by element index.
+        resistance = self.electric_resistance_matrix.data
+        for ii, obj in enumerate(self.inventory["StrandComponent"].collection):
+            resistance[
+                ii :: self.inventory["StrandComponent"].number
+            ] = obj.get_electric_resistance(self)
+
+        self._electric_stiffness_structure.data[
+            self._electric_resistance_index
+        ] = resistance
+        # Copy needed since the electric stiffness matrix is modified by
+        # function fixed_value of module electric_auxiliary_functions.py.
+        self.electric_stiffness_matrix = self._electric_stiffness_structure.copy()
+
     def __contact_current_carriers_first_cross_section(self):
         """Private method that evaluates the he contact nodes between StrandMixedComponent, StrandStabilizerComonent and StackComponent components on the first conductor cross section exploiting the contact perimeter flag value in sheet contact_perimeter_flag of input file conductor_coupling.xlsx.
         Values stored in private attribute _contact_nodes_first.
@@ -3382,9 +3598,75 @@ class Conductor:
 
     def electric_preprocessing(self):
         """Method that allows to evaluate most of the quatities and data structures needed for the electric calculation.
-        Builds nodal coordinates and connectiviy dataframes, the connectivity matrix only for StrandComponent, the inicidence matrices in both longitudinal and transversal directions, the resistance matrix (logitudinal) and the conductance matrix (transverse direction).
+        The evaluation is split in two phases:
+        * structural phase (private method __electric_structural_preprocessing): builds all the quantities that depend only on the spatial discretization; it is carried out once if the discretization grid does not change in time (flag build_electric_structure_flag);
+        * numeric phase: evaluates the electric resistance of the current carriers and updates in place the resistance block of the electric stiffness matrix, then builds the electric mass matrix if needed and assigns the fixed potential.
+        """
+
+        if self.build_electric_structure_flag:
+            self.__electric_structural_preprocessing()
+
+            if self.grid_input["ITYMSH"] not in (3, -1):
+                # Discretization grid does not change at each time step so
+                # there is no need to build again the structure of the
+                # electric problem: flag build_electric_structure_flag is
+                # therefore set to False.
+                self.build_electric_structure_flag = False
+
+        # Update the electric resistance matrix and the resistance block of
+        # the electric stiffness matrix (this is the only block that changes
+        # at each electric time step).
+        # conductorlogger.debug(
+        #     f"Before call method {self.__update_electric_resistance_matrix.__name__}.\n"
+        # )
+        self.__update_electric_resistance_matrix()
+        # conductorlogger.debug(
+        #     f"After call method {self.__update_electric_resistance_matrix.__name__}.\n"
+        # )
+
+        if self.build_electric_mass_matrix_flag == True:
+            # Build electric mass matrix (for the first time)
+            # conductorlogger.debug(
+            #     f"Before call method {self.__build_electric_mass_matrix.__name__}.\n"
+            # )
+            self.__build_electric_mass_matrix()
+            # conductorlogger.debug(
+            #     f"After call method {self.__build_electric_mass_matrix.__name__}.\n"
+            # )
+
+        if (
+            self.grid_input["ITYMSH"]
+            != 3 | self.grid_input["ITYMSH"]
+            != -1 & self.build_electric_mass_matrix_flag
+            == True
+        ):
+            # Discretization grid does not change at each time step so there is
+            # no need to build electric mass matrix at each thermal time step
+            # because inductances will not change since they are evaluating
+            # starting from the coordinates which are constant in this case: flag build_electric_mass_matrix_flag is therefore set to False.
+            self.build_electric_mass_matrix_flag = False
+
+        # Assign fixed potential: it is done at each call since function
+        # fixed_value of module electric_auxiliary_functions.py modifies
+        # attributes fixed_potential_index and fixed_potential_value.
+        # conductorlogger.debug(
+        #     f"Before call method {self.__assign_fix_potential.__name__}.\n"
+        # )
+        self.__assign_fix_potential()
+        # conductorlogger.debug(
+        #     f"After call method {self.__assign_fix_potential.__name__}.\n"
+        # )
+
+    def __electric_structural_preprocessing(self):
+        """Private method that evaluates the quantities and data structures of the electric calculation that depend only on the spatial discretization.
+        Builds nodal coordinates and connectiviy dataframes, the connectivity matrix only for StrandComponent, the inicidence matrices in both longitudinal and transversal directions, the structure of the resistance matrix (logitudinal), the conductance matrix (transverse direction), the structure of the electric stiffness matrix and the equivalue surfaces.
         """
 
+        if self.electric_solver is not None:
+            # Release the ordering and the factorization of the previous
+            # structure.
+            self.electric_solver.reset()
+
         nn = 0
 
         for key in ["FluidComponent", "StrandComponent", "JacketComponent"]:
@@ -3463,7 +3745,7 @@ class Conductor:
         #     f"After call method {self.__build_incidence_matrix.__name__}.\n"
         # )
 
-        # Build electric resistance matrix (for the first time)
+        # Build the structure of the electric resistance matrix
         # conductorlogger.debug(
         #     f"Before call method {self.__build_electric_resistance_matrix.__name__}.\n"
         # )
@@ -3509,7 +3791,7 @@ class Conductor:
             #     f"After call method {self.__build_electric_conductance_matrix.__name__}.\n"
             # )
 
-        # Build electric stiffness matrix (for the first time)
+        # Build the structure of the electric stiffness matrix
         # conductorlogger.debug(
         #     f"Before call method {self.__build_electric_stiffness_matrix.__name__}.\n"
         # )
@@ -3518,28 +3800,6 @@ class Conductor:
         #     f"After call method {self.__build_electric_stiffness_matrix.__name__}.\n"
         # )
 
-        if self.build_electric_mass_matrix_flag == True:
-            # Build electric mass matrix (for the first time)
-            # conductorlogger.debug(
-            #     f"Before call method {self.__build_electric_mass_matrix.__name__}.\n"
-            # )
-            self.__build_electric_mass_matrix()
-            # conductorlogger.debug(
-            #     f"After call method {self.__build_electric_mass_matrix.__name__}.\n"
-            # )
-
-        if (
-            self.grid_input["ITYMSH"]
-            != 3 | self.grid_input["ITYMSH"]
-            != -1 & self.build_electric_mass_matrix_flag
-            == True
-        ):
-            # Discretization grid does not change at each time step so there is
-            # no need to build electric mass matrix at each thermal time step
-            # because inductances will not change since they are evaluating
-            # starting from the coordinates which are constant in this case: flag build_electric_mass_matrix_flag is therefore set to False.
-            self.build_electric_mass_matrix_flag = False
-
         # Assign equivalue surfaces
         # conductorlogger.debug(
         #     f"Before call method {self.__assign_equivalue_surfaces.__name__}.\n"
@@ -3549,52 +3809,36 @@ class Conductor:
         #     f"After call method {self.__assign_equivalue_surfaces.__name__}.\n"
         # )
 
-        # Assign fixed potential
-        # conductorlogger.debug(
-        #     f"Before call method {self.__assign_fix_potential.__name__}.\n"
-        # )
-        self.__assign_fix_potential()
-        # conductorlogger.debug(
-        #     f"After call method {self.__assign_fix_potential.__name__}.\n"
-        # )
-
     def __build_electric_stiffness_matrix(self):
-        """Private method that builds the electric stiffness matrix as a combination of the electric_resistance_matrix, incidence_matrix and electric_conductance_matrix. Exploit sparse matrix."""
-
-        # Electric stiffness matrix initialization. Moved here from private
-        # method __initialize_attributes because of matrix reduction carried
-        # out in function fixed_value of module electric_auxiliary_functions.py.
-        # Need to think about this part since, at the state of the art of the
-        # code, the only matrix that will change at each thermal time step is
-        # the elctric resistance matrix.
-        self.electric_stiffness_matrix = lil_matrix(
-            (
-                self.total_elements_current_carriers
-                + self.total_nodes_current_carriers,
-                self.total_elements_current_carriers
-                + self.total_nodes_current_carriers,
-            ),
+        """Private method that builds the structure of the electric stiffness matrix as a combination of the electric_resistance_matrix, incidence_matrix and electric_conductance_matrix. Only the resistance block changes at each electric time step: the positions of its values in the data array are stored in attribute _electric_resistance_index and are updated in place by method __update_electric_resistance_matrix. Exploit sparse matrix."""
+
+        self._electric_stiffness_structure = bmat(
+            [
+                [self.electric_resistance_matrix, self.incidence_matrix],
+                [
+                    -self.incidence_matrix_transposed,
+                    self.electric_conductance_matrix,
+                ],
+            ],
+            format="csr",
             dtype=float,
         )
 
-        self.electric_stiffness_matrix[
-            : self.total_elements_current_carriers,
-            : self.total_elements_current_carriers,
-        ] = self.electric_resistance_matrix
-        self.electric_stiffness_matrix[
-            : self.total_elements_current_carriers,
-            self.total_elements_current_carriers :,
-        ] = self.incidence_matrix
-        self.electric_stiffness_matrix[
-            self.total_elements_current_carriers :,
-            : self.total_elements_current_carriers,
-        ] = -self.incidence_matrix_transposed
-        self.electric_stiffness_matrix[
-            self.total_elements_current_carriers :,
-            self.total_elements_current_carriers :,
-        ] = self.electric_conductance_matrix
-
-        self.electric_stiffness_matrix = self.electric_stiffness_matrix.tocsr(copy=True)
+        # In the first total_elements_current_carriers rows the only values
+        # on the diagonal are the ones of the resistance block since the
+        # incidence matrix is shifted by total_elements_current_carriers
+        # columns.
+        indptr = self._electric_stiffness_structure.indptr
+        row = np.repeat(
+            np.r_[0 : self.total_elements_current_carriers],
+            np.diff(indptr[: self.total_elements_current_carriers + 1]),
+        )
+        self._electric_resistance_index = np.nonzero(
+            self._electric_stiffness_structure.indices[
+                : indptr[self.total_elements_current_carriers]
+            ]
+            == row
+        )[0]
 
     def __assign_equivalue_surfaces(self):
         """Private method that assigns the prescribed equipotential surface of the conductor."""
@@ -3792,12 +4036,9 @@ class Conductor:
             # If there is only 1 StrandComponent object, the mutual inductance
             # matrixis set to 0 as from initialization.
 
-            # Evaluate mutual inductances
-            for ii in range(self.total_elements_current_carriers - 1):
-                mutual_inductance = self.__mutual_inductance(
-                    lmod, ii, mutual_inductance, ABSTOL
-                )
-            # end for
+            # Evaluate mutual inductances (upper triangle) in blocks of
+            # segment pairs.
+            self.__mutual_inductance(lmod.to_numpy(), mutual_inductance, ABSTOL)
 
         # Switch to evalutae self inductance.
         self_inductance_switch = {
@@ -3814,157 +4055,153 @@ class Conductor:
             / (4.0 * constants.pi)
             * (
                 np.diag(self_inductance + internal_inductance)
-                + self.inductance_matrix
-                + self.inductance_matrix.T
+                + mutual_inductance
+                + mutual_inductance.T
             )
         )
 
     def __mutual_inductance(
-        self, lmod: np.ndarray, ii: int, matrix: np.ndarray, abstol: float = 1e-6
-    ) -> np.ndarray:
-        """Private method that evaluates the mutual inductance analytically.
+        self, lmod: np.ndarray, matrix: np.ndarray, abstol: float = 1e-6
+    ):
+        """Private method that evaluates the mutual inductance analytically for all the couples of edges (upper triangle of the matrix). Couples of edges are processed in square blocks of inductance_block_size edges to bound the memory used by the intermediate arrays.
 
         Args:
             lmod (np.ndarray): array with the distance between strand component nodal nodes.
-            ii (int): index of the i-th edge on which the mutual inductance is evaluated.
-            matrix (np.ndarray): initialized matrix to store analytically evaluated mutual inductance values.
+            matrix (np.ndarray): initialized matrix to store analytically evaluated mutual inductance values; updated in place.
             abstol (float, optional): absolute tollerance to avoid rounding for segments in a plane. Defaults to 1e-6.
-
-            Returns:
-                np.ndarray: analytically evaluated mutual inductance.
         """
 
-        jj = np.r_[ii + 1 : self.total_elements_current_carriers]
-        ll = lmod[jj]
-        mm = lmod[ii]
-        len_jj = self.total_elements_current_carriers - (ii + 1)
-        rr = dict(
-            end_end=np.zeros(len_jj),
-            end_start=np.zeros(len_jj),
-            start_start=np.zeros(len_jj),
-            start_end=np.zeros(len_jj),
+        # Coordinates of the start and end nodes of the edges.
+        vertex = dict(
+            start=self.nodal_coordinates.iloc[
+                self.connectivity_matrix.loc["StrandComponent", "start"], :
+            ].to_numpy(),
+            end=self.nodal_coordinates.iloc[
+                self.connectivity_matrix.loc["StrandComponent", "end"], :
+            ].to_numpy(),
         )
 
-        for key in rr.keys():
-            rr[key] = self.__vertex_to_vertex_distance(key, ii, jj)
-        # End for key
+        n_edge = self.total_elements_current_carriers
+        block = self.inductance_block_size
+        for i0 in range(0, n_edge - 1, block):
+            ii = np.r_[i0 : min(i0 + block, n_edge - 1)]
+            # Only blocks with at least one couple jj > ii.
+            for j0 in range(i0 + 1 - (i0 + 1) % block, n_edge, block):
+                jj = np.r_[max(j0, i0 + 1) : min(j0 + block, n_edge)]
+                # Keep only the couples in the upper triangle (jj > ii).
+                matrix[ii[0] : ii[-1] + 1, jj[0] : jj[-1] + 1] = np.triu(
+                    self.__mutual_inductance_block(lmod, vertex, ii, jj, abstol),
+                    k=1 - (jj[0] - ii[0]),
+                )
 
-        # Additional parameters
-        alpha2 = (
-            rr["start_end"] ** 2
-            - rr["start_start"] ** 2
-            + rr["end_start"] ** 2
-            - rr["end_end"] ** 2
-        )
+    def __mutual_inductance_block(
+        self,
+        lmod: np.ndarray,
+        vertex: dict,
+        ii: np.ndarray,
+        jj: np.ndarray,
+        abstol: float,
+    ) -> np.ndarray:
+        """Private method that evaluates the mutual inductance analytically between the edges ii (rows) and jj (columns) of a block.
 
-        cos_eps = np.minimum(np.maximum(alpha2 / (2 * ll * mm), -1.0), 1.0)
-        sin_eps = np.sin(np.arccos(cos_eps))
+        Args:
+            lmod (np.ndarray): array with the distance between strand component nodal nodes.
+            vertex (dict): coordinates of the start and end nodes of the edges (keys start and end).
+            ii (np.ndarray): index of the edges of the rows of the block.
+            jj (np.ndarray): index of the edges of the columns of the block.
+            abstol (float): absolute tollerance to avoid rounding for segments in a plane.
 
-        dd = 4 * ll ** 2 * mm ** 2 - alpha2 ** 2
-        mu = (
-            ll
-            * (
-                2 * mm ** 2 * (rr["end_start"] ** 2 - rr["start_start"] ** 2 - ll ** 2)
-                + alpha2 * (rr["start_end"] ** 2 - rr["start_start"] ** 2 - mm ** 2)
+        Returns:
+            np.ndarray: analytically evaluated mutual inductance, shape (ii.size, jj.size).
+        """
+
+        ll = lmod[jj][None, :]
+        mm = lmod[ii][:, None]
+        # Vertex to vertex distances: key start_end is the distance between
+        # the start nodes of edges jj and the end nodes of edges ii, and so on.
+        rr = dict()
+        for key in ["end_end", "end_start", "start_start", "start_end"]:
+            cols = key.split("_")
+            rr[key] = np.sqrt(
+                (
+                    (vertex[cols[0]][None, jj, :] - vertex[cols[1]][ii, None, :])
+                    ** 2
+                ).sum(axis=2)
             )
-            / dd
-        )
-        nu = (
-            mm
-            * (
-                2 * ll ** 2 * (rr["start_end"] ** 2 - rr["start_start"] ** 2 - mm ** 2)
-                + alpha2 * (rr["end_start"] ** 2 - rr["start_start"] ** 2 - ll ** 2)
+        # End for key
+
+        # Degenerate couples of edges (e.g. consecutive or parallel segments)
+        # give 0/0 and inf values that are filtered below.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Additional parameters
+            alpha2 = (
+                rr["start_end"] ** 2
+                - rr["start_start"] ** 2
+                + rr["end_start"] ** 2
+                - rr["end_end"] ** 2
             )
-            / dd
-        )
-        d2 = rr["start_start"] ** 2 - mu ** 2 - nu ** 2 + 2 * mu * nu * cos_eps
 
-        # avoid rounding for segments in a plane
-        d2[d2 < abstol ** 2] = 0
-        d0 = np.sqrt(d2)
+            cos_eps = np.minimum(np.maximum(alpha2 / (2 * ll * mm), -1.0), 1.0)
+            sin_eps = np.sin(np.arccos(cos_eps))
 
-        # solid angles
-        omega = (
-            np.arctan(
-                (d2 * cos_eps + (mu + ll) * (nu + mm) * sin_eps ** 2)
-                / (d0 * rr["end_end"] * sin_eps)
-            )
-            - np.arctan(
-                (d2 * cos_eps + (mu + ll) * nu * sin_eps ** 2)
-                / (d0 * rr["end_start"] * sin_eps)
+            dd = 4 * ll ** 2 * mm ** 2 - alpha2 ** 2
+            mu = (
+                ll
+                * (
+                    2 * mm ** 2 * (rr["end_start"] ** 2 - rr["start_start"] ** 2 - ll ** 2)
+                    + alpha2 * (rr["start_end"] ** 2 - rr["start_start"] ** 2 - mm ** 2)
+                )
+                / dd
             )
-            + np.arctan(
-                (d2 * cos_eps + mu * nu * sin_eps ** 2)
-                / (d0 * rr["start_start"] * sin_eps)
+            nu = (
+                mm
+                * (
+                    2 * ll ** 2 * (rr["start_end"] ** 2 - rr["start_start"] ** 2 - mm ** 2)
+                    + alpha2 * (rr["end_start"] ** 2 - rr["start_start"] ** 2 - ll ** 2)
+                )
+                / dd
             )
-            - np.arctan(
-                (d2 * cos_eps + mu * (nu + mm) * sin_eps ** 2)
-                / (d0 * rr["start_end"] * sin_eps)
+            d2 = rr["start_start"] ** 2 - mu ** 2 - nu ** 2 + 2 * mu * nu * cos_eps
+
+            # avoid rounding for segments in a plane
+            d2[d2 < abstol ** 2] = 0
+            d0 = np.sqrt(d2)
+
+            # solid angles
+            omega = (
+                np.arctan(
+                    (d2 * cos_eps + (mu + ll) * (nu + mm) * sin_eps ** 2)
+                    / (d0 * rr["end_end"] * sin_eps)
+                )
+                - np.arctan(
+                    (d2 * cos_eps + (mu + ll) * nu * sin_eps ** 2)
+                    / (d0 * rr["end_start"] * sin_eps)
+                )
+                + np.arctan(
+                    (d2 * cos_eps + mu * nu * sin_eps ** 2)
+                    / (d0 * rr["start_start"] * sin_eps)
+                )
+                - np.arctan(
+                    (d2 * cos_eps + mu * (nu + mm) * sin_eps ** 2)
+                    / (d0 * rr["start_end"] * sin_eps)
+                )
             )
-        )
-        omega[d0 == 0.0] = 0.0
+            omega[d0 == 0.0] = 0.0
 
-        # contribution
-        pp = np.zeros((len_jj, 5), dtype=float)
-        pp[:, 0] = (ll + mu) * np.arctanh(mm / (rr["end_end"] + rr["end_start"]))
-        pp[:, 1] = -nu * np.arctanh(ll / (rr["end_start"] + rr["start_start"]))
-        pp[:, 2] = (mm + nu) * np.arctanh(ll / (rr["end_end"] + rr["start_end"]))
-        pp[:, 3] = -mu * np.arctanh(mm / (rr["start_start"] + rr["start_end"]))
-        pp[:, 4] = d0 * omega / sin_eps
+            # contribution
+            pp = np.zeros((5,) + alpha2.shape, dtype=float)
+            pp[0] = (ll + mu) * np.arctanh(mm / (rr["end_end"] + rr["end_start"]))
+            pp[1] = -nu * np.arctanh(ll / (rr["end_start"] + rr["start_start"]))
+            pp[2] = (mm + nu) * np.arctanh(ll / (rr["end_end"] + rr["start_end"]))
+            pp[3] = -mu * np.arctanh(mm / (rr["start_start"] + rr["start_end"]))
+            pp[4] = d0 * omega / sin_eps
 
         # filter odd cases (e.g. consecutive segments)
         pp[np.isnan(pp)] = 0.0
         pp[np.isinf(pp)] = 0.0
 
         # Mutual inductances
-        matrix[ii, jj] = (
-            2 * cos_eps * (pp[:, 0] + pp[:, 1] + pp[:, 2] + pp[:, 3])
-            - cos_eps * pp[:, 4]
-        )
-        return matrix
-
-    def __vertex_to_vertex_distance(
-        self, key: str, ii: int, jj: np.ndarray
-    ) -> np.ndarray:
-        """Private method that evaluates the vertex to vertex distances. Possible definitions are stored in input argument key.
-
-        Args:
-            key (str): string with the definition for distance evaluation. Possible definitions are:
-                1) start_end: distance bewteen start and end nodes;
-                2) start_start: distance bewteen two start nodes;
-                3) end_end: distance bewteen two end nodes;
-                4) end_start: distance bewteen end and start nodes.
-
-            ii (int): index of the i-th edge on which the mutual inductance is evaluated.
-            jj (np.ndarray): array of index of the nodes for which distance must be evaluated.
-
-        Returns:
-            np.ndarray: vertex to vertex distances.
-        """
-        cols = key.split("_")
-        return (
-            (
-                (
-                    self.nodal_coordinates.iloc[
-                        self.connectivity_matrix.loc["StrandComponent"].iloc[
-                            jj,
-                            self.connectivity_matrix.columns.get_loc(cols[0]),
-                        ],
-                        :,
-                    ]
-                    - self.nodal_coordinates.iloc[
-                        self.connectivity_matrix.loc["StrandComponent"].iat[
-                            ii,
-                            self.connectivity_matrix.columns.get_loc(cols[1]),
-                        ],
-                        :,
-                    ]
-                )
-                ** 2
-            )
-            .sum(axis="columns")
-            .apply(np.sqrt)
-        )
+        return 2 * cos_eps * (pp[0] + pp[1] + pp[2] + pp[3]) - cos_eps * pp[4]
 
     #  CONSTANT SELF INDUCTANCE 
     def __constant_self_inductance_evaluation(self, lmod: np.array) -> np.ndarray:
@@ -4754,12 +4991,14 @@ class Conductor:
             jacket.dict_Gauss_pt["Q2"] = (
                 jacket.dict_node_pt["JHTFLX"][1:] + jacket.dict_node_pt["EXTFLX"][1:]
             )
-            # Add the radiative heat contribution with the environment.
+            # Add the radiative heat contribution with the environment (time 
+            # levels stacked along columns).
+            radiative_heat_env = jacket.radiative_heat_env.stack(axis=1)
             jacket.dict_Gauss_pt["Q1"] = (
-                jacket.dict_Gauss_pt["Q1"] + jacket.radiative_heat_env[:-1]
+                jacket.dict_Gauss_pt["Q1"] + radiative_heat_env[:-1]
             )
             jacket.dict_Gauss_pt["Q2"] = (
-                jacket.dict_Gauss_pt["Q2"] + jacket.radiative_heat_env[1:]
+                jacket.dict_Gauss_pt["Q2"] + radiative_heat_env[1:]
             )
 
         # Separate nested loop is needed in order to define quantities 
@@ -4771,19 +5010,21 @@ class Conductor:
                 self.inventory["JacketComponent"].collection[rr + 1 :]
             ):
                 key = f"{jacket.identifier}_{jacket_c.identifier}"
-                # Add the radiative heat contribution between inner surface of the enclosure and inner jackets.
+                # Add the radiative heat contribution between inner surface of the enclosure and inner jackets (time levels stacked along columns).
+                radiative_heat_inn = jacket.radiative_heat_inn[key].stack(axis=1)
                 jacket.dict_Gauss_pt["Q1"] = (
-                    jacket.dict_Gauss_pt["Q1"] + jacket.radiative_heat_inn[key][:-1]
+                    jacket.dict_Gauss_pt["Q1"] + radiative_heat_inn[:-1]
                 )
                 jacket.dict_Gauss_pt["Q2"] = (
-                    jacket.dict_Gauss_pt["Q2"] + jacket.radiative_heat_inn[key][1:]
+                    jacket.dict_Gauss_pt["Q2"] + radiative_heat_inn[1:]
                 )
 
+                radiative_heat_inn = jacket_c.radiative_heat_inn[key].stack(axis=1)
                 jacket_c.dict_Gauss_pt["Q1"] = (
-                    jacket_c.dict_Gauss_pt["Q1"] + jacket_c.radiative_heat_inn[key][:-1]
+                    jacket_c.dict_Gauss_pt["Q1"] + radiative_heat_inn[:-1]
                 )
                 jacket_c.dict_Gauss_pt["Q2"] = (
-                    jacket_c.dict_Gauss_pt["Q2"] + jacket_c.radiative_heat_inn[key][1:]
+                    jacket_c.dict_Gauss_pt["Q2"] + radiative_heat_inn[1:]
                 )
             # End for jacket_c.
         # end for jacket.
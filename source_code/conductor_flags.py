@@ -41,4 +41,66 @@ ELECTRIC_TIME_STEP_NUMBER = 10
 VARIABLE_CONTACT_PERIMETER = -1
 # Constant contact perimeter (from sheet contact_perimeter in file 
 # conductor_coupling.xlsx)
-CONSTANT_CONTACT_PERIMETER = 1
\ No newline at end of file
+CONSTANT_CONTACT_PERIMETER = 1
+# Flags for the assembly of the thermal hydraulic system
+# Element matrices are built and assembled one element at a time
+ELEMENT_WISE_ASSEMBLY = 0
+# Element matrices of all the elements are built and assembled at once
+VECTORIZED_ASSEMBLY = 1
+
+# Flags for the linear solver of the thermal hydraulic system
+# Banded Gaussian elimination without pivoting (functions gredub and gbacsb)
+GAUSS_BANDED_SOLVER = 0
+# LAPACK banded LU factorization with partial pivoting (dgbtrf and dgbtrs)
+LAPACK_BANDED_SOLVER = 1
+# Sparse LU factorization with COLAMD fill reducing ordering (SuperLU)
+SPARSE_LU_SOLVER = 2
+
+# Flags for the time step adaptivity (key IADAPTIME of the transient input)
+# Time step controlled by an estimate of the local truncation error (PI 
+# controller with step rejection)
+IADAPTIME_ERROR_CONTROL = 4
+
+# Flags for the evaluation of the coolant properties (key COOLANT_PROPERTIES 
+# of the transient input)
+# Properties evaluated with function PropsSI of CoolProp at each call
+COOLANT_PROPERTIES_COOLPROP = 0
+# Properties interpolated from tables built with CoolProp at the beginning of 
+# the simulation (class CoolantPropertyTable)
+COOLANT_PROPERTIES_TABLE = 1
+
+# Flags for the evaluation of the coolant properties in Gauss points (key 
+# COOLANT_GAUSS_PROPERTIES of the transient input)
+# Properties evaluated from temperature and pressure in Gauss points
+GAUSS_PROPERTIES_EVALUATION = 0
+# Properties interpolated from the nodal ones (mean of the values in the two 
+# nodes of the element), see method Coolant._interpolate_gauss_properties
+GAUSS_PROPERTIES_INTERPOLATION = 1
+
+# Flags for the evaluation of the environment medium properties (key 
+# ENVIRONMENT_PROPERTIES of the transient input)
+# Properties evaluated with CoolProp (PropsSI, or HAPropsSI for humid air)
+ENVIRONMENT_PROPERTIES_COOLPROP = 0
+# Properties interpolated from a table of the film temperature built with 
+# CoolProp at the beginning of the simulation (see method 
+# Environment.set_properties_evaluation)
+ENVIRONMENT_PROPERTIES_TABLE = 1
+
+# Flags for the evaluation of the critical surface of the superconducting 
+# strands (key CRITICAL_SURFACE of the transient input)
+# Critical current density and current sharing temperature evaluated with the 
+# scaling laws at each call
+CRITICAL_SURFACE_ANALYTIC = 0
+# Critical current density and current sharing temperature interpolated from 
+# tables built for each strand at the beginning of the simulation (class 
+# CriticalSurfaceTable)
+CRITICAL_SURFACE_TABLE = 1
+
+# Flags for the solution of the linear system of the transient electric 
+# problem (key ELECTRIC_LINEAR_SOLVER of the transient input)
+# Linear system solved with function spsolve of scipy at each electric time 
+# step
+ELECTRIC_LINEAR_SOLVER_SPSOLVE = 0
+# Linear system solved caching the LU factorization of the matrix (class 
+# ElectricLinearSolver)
+ELECTRIC_LINEAR_SOLVER_CACHED_LU = 1
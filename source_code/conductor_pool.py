@@ -0,0 +1,212 @@
+import copy
+import multiprocessing
+import numpy as np
+from typing_extensions import Self
+
+from utility_functions.plots import REAL_TIME_PLOT_ATTRIBUTES
+
+
+def _strip_real_time_plots(conductor) -> dict:
+    """Function that removes the real time plots attributes from the components of the conductor.
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+
+    Returns:
+        dict: collection of the removed attributes, the key is the component identifier.
+    """
+    stripped = dict()
+    for comp in conductor.inventory["all_component"].collection:
+        stripped[comp.identifier] = {
+            name: comp.__dict__.pop(name)
+            for name in REAL_TIME_PLOT_ATTRIBUTES
+            if name in comp.__dict__
+        }
+    return stripped
+
+
+def _conductor_worker(connection, simulation):
+    """Function executed by each worker process of the pool: it holds the state of the conductors in simulation.list_of_Conductors for the whole transient and advances them in time at each request of the main process.
+    Exceptions are sent back to the main process, that raises them.
+
+    Args:
+        connection (multiprocessing.connection.Connection): worker end of the pipe with the main process.
+        simulation (Simulation): shallow copy of the simulation object, with only the conductors assigned to the worker.
+    """
+    while True:
+        command, payload = connection.recv()
+        try:
+            if command == "time":
+                simulation.num_step = payload
+                result = [
+                    simulation.advance_conductor_time(conductor)
+                    for conductor in simulation.list_of_Conductors
+                ]
+            elif command == "solution":
+                simulation.num_step, time = payload
+                simulation.simulation_time.append(time)
+                # Real time plots are managed only by the main process.
+                result = [
+                    simulation.advance_conductor_solution(
+                        conductor, real_time_plots=False
+                    )
+                    for conductor in simulation.list_of_Conductors
+                ]
+            elif command == "close":
+                for conductor in simulation.list_of_Conductors:
+                    _strip_real_time_plots(conductor)
+                connection.send(simulation.list_of_Conductors)
+                break
+        except Exception as err:
+            result = err
+        connection.send(result)
+    connection.close()
+
+
+class ConductorPool:
+    """Class that advances in time uncoupled conductors concurrently in a pool of persistent worker processes. Each worker holds the state of a group of conductors for the whole transient and evaluates their time step and solution (electric_method, operating_conditions_th, build_heat_source and step) at each request of the main process.
+    The main process and the workers are synchronized only at the simulation time level (time step selection and solution at the new time) and at the end of the transient, when the state of the conductors is sent back to the main process for the post processing. The outcomes at the user defined output times are saved by the workers; real time plots are not updated.
+    Workers are started with the fork start method where it is available, so that they inherit the simulation without pickling it. Where only the spawn start method is available (e.g. Windows) the simulation assigned to each worker is pickled and copied to the worker: the real time plots are removed from the conductors before the workers are started (matplotlib figures can not be pickled) and the script that runs the simulation must be protected by an if __name__ == "__main__" block.
+    """
+
+    def __init__(self: Self, simulation, n_processes: int):
+        """Make an instance of class ConductorPool, starting the worker processes. The conductors are assigned to the workers in round robin order.
+
+        Args:
+            self (Self): pool object.
+            simulation (Simulation): object with all the information of the simulation.
+            n_processes (int): maximum number of worker processes.
+        """
+        self.conductors = simulation.list_of_Conductors
+        # Do not rely on the default start method of the platform (spawn on
+        # Windows, macOS and, from Python 3.14, Linux).
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context("spawn")
+        n_workers = min(n_processes, len(self.conductors))
+        # Index of the conductors assigned to each worker.
+        self.groups = [
+            np.arange(ii, len(self.conductors), n_workers) for ii in range(n_workers)
+        ]
+        self.connections = list()
+        self.workers = list()
+        for group in self.groups:
+            # Shallow copy of the simulation with only the conductors of the
+            # worker.
+            worker_simulation = copy.copy(simulation)
+            worker_simulation.list_of_Conductors = [
+                self.conductors[idx] for idx in group
+            ]
+            worker_simulation.numObj = len(group)
+            worker_simulation.simulation_time = list(simulation.simulation_time)
+            main_end, worker_end = context.Pipe()
+            worker = context.Process(
+                target=_conductor_worker,
+                args=(worker_end, worker_simulation),
+                daemon=True,
+            )
+            if context.get_start_method() == "fork":
+                worker.start()
+            else:
+                # The simulation is pickled when the worker is started: remove
+                # the real time plots and restore them afterwards.
+                stripped = [
+                    _strip_real_time_plots(conductor)
+                    for conductor in worker_simulation.list_of_Conductors
+                ]
+                try:
+                    worker.start()
+                finally:
+                    for conductor, plots in zip(
+                        worker_simulation.list_of_Conductors, stripped
+                    ):
+                        for comp in conductor.inventory["all_component"].collection:
+                            comp.__dict__.update(plots.get(comp.identifier, dict()))
+            self.connections.append(main_end)
+            self.workers.append(worker)
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(conductors: {len(self.conductors)}, workers: {len(self.workers)})"
+
+    def __request(self: Self, command: str, payload=None) -> list:
+        """Private method that sends command to all the workers and waits for their results, in the order of the workers.
+
+        Args:
+            self (Self): pool object.
+            command (str): command to be executed by the workers ("time", "solution" or "close").
+            payload (optional): data needed to execute the command. Defaults to None.
+
+        Raises:
+            Exception: the exception raised by a worker while executing the command.
+
+        Returns:
+            list: results of the workers.
+        """
+        for connection in self.connections:
+            connection.send((command, payload))
+        results = [connection.recv() for connection in self.connections]
+        for result in results:
+            if isinstance(result, Exception):
+                self.__terminate()
+                raise result
+        return results
+
+    def __terminate(self: Self):
+        """Private method that stops all the workers."""
+        for worker in self.workers:
+            worker.terminate()
+
+    def advance_time(self: Self, num_step: int) -> np.ndarray:
+        """Method that selects the new time step of all the conductors.
+
+        Args:
+            self (Self): pool object.
+            num_step (int): simulation time step counter.
+
+        Returns:
+            np.ndarray: time step of each conductor, in the order of simulation.list_of_Conductors.
+        """
+        time_step = np.zeros(len(self.conductors))
+        for group, result in zip(self.groups, self.__request("time", num_step)):
+            time_step[group] = result
+        return time_step
+
+    def advance_solution(self: Self, num_step: int, time: float) -> np.ndarray:
+        """Method that evaluates the solution of all the conductors at the new time step.
+
+        Args:
+            self (Self): pool object.
+            num_step (int): simulation time step counter.
+            time (float): simulation time.
+
+        Returns:
+            np.ndarray: accepted time step of each conductor, in the order of simulation.list_of_Conductors.
+        """
+        time_step = np.zeros(len(self.conductors))
+        for group, result in zip(
+            self.groups, self.__request("solution", (num_step, time))
+        ):
+            time_step[group] = result
+        return time_step
+
+    def close(self: Self) -> list:
+        """Method that gets back the state of the conductors from the workers and stops them. The real time plots of the conductors in the main process are assigned to the conductors received from the workers.
+
+        Args:
+            self (Self): pool object.
+
+        Returns:
+            list: conductors with the state at the end of the transient, in the order of simulation.list_of_Conductors.
+        """
+        conductors = list(self.conductors)
+        for group, result in zip(self.groups, self.__request("close")):
+            for idx, conductor in zip(group, result):
+                # Keep the real time plots of the main process.
+                stripped = _strip_real_time_plots(self.conductors[idx])
+                for comp in conductor.inventory["all_component"].collection:
+                    comp.__dict__.update(stripped.get(comp.identifier, dict()))
+                conductors[idx] = conductor
+        for worker in self.workers:
+            worker.join()
+        return conductors
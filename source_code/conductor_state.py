@@ -0,0 +1,156 @@
+import copy
+import numbers
+
+import numpy as np
+from typing_extensions import Self
+
+from time_history import TimeHistory
+
+# Types of the values that are stored as they are (immutable objects).
+SCALAR_TYPES = (numbers.Number, np.bool_, str, type(None))
+
+
+class ConductorState:
+    """Class that stores the state of a conductor modified by the time integration in preallocated buffers, used to restore the conductor if a time step is rejected (see method Simulation.advance_conductor_solution).
+    The state is a collection of containers (dictionaries, attributes dictionaries or lists) and of the keys to be stored (see method Conductor.save_state); nested dictionaries are stored with all their keys. Arrays and TimeHistory objects are copied in buffers that mirror the structure of the containers and that are allocated only the first time or when their shape changes; scalars are stored as they are and any other object is not part of the state. Restoring the state copies the buffers in place into the arrays of the conductor, the buffers are not modified and can be used to restore the state again.
+    """
+
+    def __init__(self: Self):
+        """Make an instance of class ConductorState.
+
+        Args:
+            self (Self): conductor state object.
+        """
+        # List of tuples (container, buffers): buffers is the dictionary with
+        # the stored values of the keys of container.
+        self.items = list()
+        # Counter of the buffers allocations.
+        self.allocations = 0
+        # Counters of the saved and restored states.
+        self.saves = 0
+        self.restores = 0
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(containers: {len(self.items)}, allocations: {self.allocations}, saves: {self.saves}, restores: {self.restores})"
+
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        # Containers are references to the attributes of the conductor: they
+        # are not pickled (the containers of the unpickled conductor are
+        # different objects) and buffers are allocated again at the next
+        # save.
+        state["items"] = list()
+        return state
+
+    def save(self: Self, items: list):
+        """Method that saves the state, copying the values of the given keys of the containers in the buffers.
+
+        Args:
+            self (Self): conductor state object.
+            items (list): list of tuples (container, keys) with the containers of the state and the keys to be stored.
+        """
+        if len(items) != len(self.items) or any(
+            container is not saved
+            for (container, _), (saved, _) in zip(items, self.items)
+        ):
+            # Different containers: buffers are allocated again.
+            self.items = [(container, dict()) for container, _ in items]
+        for (container, keys), (_, buffers) in zip(items, self.items):
+            self.__save(container, keys, buffers)
+        self.saves += 1
+
+    def __save(self: Self, container, keys, buffers: dict):
+        """Private method that copies the values of keys of container in buffers, reusing the buffers already allocated.
+
+        Args:
+            self (Self): conductor state object.
+            container (Union[dict, list]): container of the values.
+            keys (Iterable): keys of the values to be stored.
+            buffers (dict): stored values of container.
+        """
+        keys = list(keys)
+        for key in keys:
+            value = container[key]
+            buffer = buffers.get(key)
+            if isinstance(value, np.ndarray):
+                if (
+                    not isinstance(buffer, np.ndarray)
+                    or buffer.shape != value.shape
+                    or buffer.dtype != value.dtype
+                ):
+                    buffer = np.empty_like(value)
+                    self.allocations += 1
+                np.copyto(buffer, value)
+            elif isinstance(value, TimeHistory):
+                if (
+                    not isinstance(buffer, TimeHistory)
+                    or buffer.data.shape != value.data.shape
+                ):
+                    buffer = TimeHistory(value.n_levels, value.data.shape[1:])
+                    self.allocations += 1
+                np.copyto(buffer.data, value.data)
+                buffer.head = value.head
+            elif isinstance(value, dict):
+                if not isinstance(buffer, dict):
+                    buffer = dict()
+                self.__save(value, value.keys(), buffer)
+            elif isinstance(value, SCALAR_TYPES):
+                buffer = value
+            else:
+                # Not part of the state.
+                buffers.pop(key, None)
+                continue
+            buffers[key] = buffer
+        # Remove the keys that are no longer in container.
+        for key in buffers.keys() - set(keys):
+            del buffers[key]
+
+    def restore(self: Self):
+        """Method that restores the last saved state, copying the buffers in place into the values of the containers.
+
+        Args:
+            self (Self): conductor state object.
+        """
+        for container, buffers in self.items:
+            self.__restore(container, buffers)
+        self.restores += 1
+
+    def __restore(self: Self, container, buffers: dict):
+        """Private method that copies buffers in place into the values of container; a value is assigned again only if it can not be overwritten (new object with a different shape or type).
+
+        Args:
+            self (Self): conductor state object.
+            container (Union[dict, list]): container of the values.
+            buffers (dict): stored values of container.
+        """
+        for key, buffer in buffers.items():
+            try:
+                value = container[key]
+            except (KeyError, IndexError):
+                value = None
+            if isinstance(buffer, np.ndarray):
+                if (
+                    isinstance(value, np.ndarray)
+                    and value.shape == buffer.shape
+                    and value.dtype == buffer.dtype
+                    and value.flags.writeable
+                ):
+                    np.copyto(value, buffer)
+                else:
+                    container[key] = buffer.copy()
+            elif isinstance(buffer, TimeHistory):
+                if (
+                    isinstance(value, TimeHistory)
+                    and value.data.shape == buffer.data.shape
+                ):
+                    np.copyto(value.data, buffer.data)
+                    value.head = buffer.head
+                else:
+                    container[key] = copy.deepcopy(buffer)
+            elif isinstance(buffer, dict):
+                if isinstance(value, dict):
+                    self.__restore(value, buffer)
+                else:
+                    container[key] = copy.deepcopy(buffer)
+            else:
+                container[key] = buffer
@@ -1,7 +1,10 @@
 import numpy as np
-import warnings
-from CoolProp.CoolProp import PropsSI
+from CoolProp.CoolProp import AbstractState, PT_INPUTS, get_parameter_index
 
+from conductor_flags import (
+    GAUSS_PROPERTIES_EVALUATION,
+    GAUSS_PROPERTIES_INTERPOLATION,
+)
 from fluid_component import FluidComponentInput
 
 
@@ -12,10 +15,43 @@ class Coolant(FluidComponentInput):
 
     def __init__(self, sheet, sheetOpar, dict_file_path, identifier):
         super().__init__(sheet, sheetOpar, dict_file_path, identifier)
-        # Kind of the coolant; make it lowercase to be userd as alias in PropsSI.
+        # Kind of the coolant; make it lowercase to be userd as alias in CoolProp.
         self.type = self.inputs["FLUID_TYPE"].lower()
         # Identifier of the coolant.
         self.identifier = f"{self.type}_{identifier.split('_')[1]}"
+        # Table of the coolant properties (object of class
+        # CoolantPropertyTable), assigned by method
+        # Simulation.conductor_initialization if the tabulated properties are
+        # selected (key COOLANT_PROPERTIES of the transient input); if None
+        # properties are evaluated with the CoolProp low level interface.
+        self.property_table = None
+        # CoolProp AbstractState of the coolant, built at the first property
+        # evaluation (see method _eval_abstract_state).
+        self.abstract_state = None
+        # Relative tolerance on temperature and pressure of the incremental
+        # update of the properties (method _eval_properties): properties are
+        # evaluated again only in the points where temperature or pressure
+        # changed more than the tolerance since the last evaluation. Assigned
+        # by method Simulation.conductor_initialization (key
+        # COOLANT_PROPERTIES_RTOL of the transient input); if 0 properties are
+        # evaluated in all the points.
+        self.property_rtol = 0.0
+        # Temperature, pressure and properties of the last evaluation in
+        # nodal (key True) and Gauss (key False) points, used by the
+        # incremental update.
+        self.property_cache = dict()
+        # Counter of the points where properties are evaluated again
+        # (recomputed) or reused from the last evaluation (skipped).
+        self.property_update_counter = dict(recomputed=0, skipped=0)
+        # Evaluation of the properties in Gauss points (flag
+        # GAUSS_PROPERTIES_EVALUATION or GAUSS_PROPERTIES_INTERPOLATION) and
+        # relative tolerance on the variation of temperature and pressure
+        # along the element used by method _interpolate_gauss_properties.
+        # Assigned by method Simulation.conductor_initialization (keys
+        # COOLANT_GAUSS_PROPERTIES and COOLANT_GAUSS_RTOL of the transient
+        # input).
+        self.gauss_properties = GAUSS_PROPERTIES_EVALUATION
+        self.gauss_property_rtol = 1e-2
         # Dictionary dict_node_pt declaration.
         self.dict_node_pt = dict()
         # Dictionary dict_Gauss_pt declaration.
@@ -52,6 +88,79 @@ class Coolant(FluidComponentInput):
 
     # End method __repr__
 
+    def __getstate__(self):
+        """Method that returns the state of the object to be pickled (pool of processes): CoolProp AbstractState objects can not be pickled, so the state is dropped and built again at the next property evaluation.
+
+        Returns:
+            dict: state of the object.
+        """
+        state = self.__dict__.copy()
+        state["abstract_state"] = None
+        return state
+
+    # End method __getstate__
+
+    def _eval_abstract_state(self, aliases, temperature, pressure):
+        """Method that evaluates the coolant properties with the CoolProp low level interface: the equation of state is solved (flash) only once for each point, then all the properties are read from the AbstractState, instead of solving it once for each property as function PropsSI does.
+
+        Args:
+            aliases (dict): collection of the properties to be evaluated, the values are the CoolProp aliases.
+            temperature (Union[float,np.ndarray]): temperature (K).
+            pressure (Union[float,np.ndarray]): pressure (Pa).
+
+        Returns:
+            dict: properties values, the keys are the keys of aliases; values are float if temperature and pressure are scalars.
+        """
+        if self.abstract_state is None:
+            # self.type can include the CoolProp backend (e.g. HEOS::helium).
+            backend, _, fluid = self.type.rpartition("::")
+            self.abstract_state = AbstractState(backend or "HEOS", fluid)
+        keys = [get_parameter_index(alias) for alias in aliases.values()]
+        temp, press = np.broadcast_arrays(
+            np.asarray(temperature, dtype=float), np.asarray(pressure, dtype=float)
+        )
+        values = np.empty((len(keys), temp.size))
+        for ii, (tt, pp) in enumerate(zip(temp.flat, press.flat)):
+            try:
+                self.abstract_state.update(PT_INPUTS, pp, tt)
+            except ValueError:
+                # Flash failed: same outcome of function PropsSI with array
+                # inputs.
+                values[:, ii] = np.inf
+                continue
+            for jj, key in enumerate(keys):
+                try:
+                    values[jj, ii] = self.abstract_state.keyed_output(key)
+                except ValueError:
+                    values[jj, ii] = np.inf
+        if temp.ndim == 0:
+            return {name: values[jj, 0] for jj, name in enumerate(aliases)}
+        return {
+            name: values[jj].reshape(temp.shape) for jj, name in enumerate(aliases)
+        }
+
+    # End method _eval_abstract_state
+
+    def _eval_props(self, aliases, temperature, pressure):
+        """Method that evaluates the coolant properties from temperature and pressure, by interpolation of the property table if it is available or with the CoolProp low level interface (method _eval_abstract_state).
+
+        Args:
+            aliases (dict): collection of the properties to be evaluated, the values are the CoolProp aliases.
+            temperature (Union[float,np.ndarray]): temperature (K).
+            pressure (Union[float,np.ndarray]): pressure (Pa).
+
+        Returns:
+            dict: properties values, the keys are the keys of aliases.
+        """
+        if self.property_table is None:
+            return self._eval_abstract_state(aliases, temperature, pressure)
+        return {
+            name: self.property_table.eval(alias, temperature, pressure)
+            for name, alias in aliases.items()
+        }
+
+    # End method _eval_props
+
     def eval_coolant_density_din_viscosity_gen_flow(self, pressure, temperature):
         """[summary]
 
@@ -61,9 +170,10 @@ class Coolant(FluidComponentInput):
             fluid_mode_info ([type]): [description]
         """
         # Compute density and dynamic viscosity according to the mode (needed to perform the flow initialization)
-        density = PropsSI("Dmass", "T", temperature, "P", pressure, self.type)
-        viscosity = PropsSI("viscosity", "T", temperature, "P", pressure, self.type)
-        return density, viscosity
+        props = self._eval_props(
+            dict(density="Dmass", viscosity="viscosity"), temperature, pressure
+        )
+        return props["density"], props["viscosity"]
 
     # End method eval_coolant_density_din_viscosity_gen_flow
 
@@ -115,13 +225,12 @@ class Coolant(FluidComponentInput):
             [self.operations["TEMINL"], self.operations["TEMOUT"]],
         )
         # Compute density according to the mode (needed to compute the velocity from mass flow rate)
-        self.dict_node_pt["total_density"] = PropsSI(
-            "Dmass",
-            "T",
-            self.dict_node_pt["temperature"],
-            "P",
-            self.dict_node_pt["pressure"],
-            self.type,
+        self.dict_node_pt.update(
+            self._eval_props(
+                dict(total_density="Dmass"),
+                self.dict_node_pt["temperature"],
+                self.dict_node_pt["pressure"],
+            )
         )
         # Compute velocity form mass flow rate, the sing is determined from mass flow rate.
         self.dict_node_pt["velocity"] = mfr / (
@@ -189,33 +298,72 @@ class Coolant(FluidComponentInput):
         """
         # Properties evaluation in each nodal point
         if nodal:
-            self.dict_node_pt = self._eval_properties(self.dict_node_pt, aliases)
+            self.dict_node_pt = self._eval_properties(
+                self.dict_node_pt, aliases, nodal
+            )
         # Properties evaluation in each Gauss point
         else:
             # Evaluate pressure temperature and velocity in Gauss point (still to be decided where to really put this line of code)
             self._eval_gauss_pressure_temperature_velocity(conductor)
-            self.dict_Gauss_pt = self._eval_properties(self.dict_Gauss_pt, aliases)
+            if self.gauss_properties == GAUSS_PROPERTIES_INTERPOLATION:
+                self._interpolate_gauss_properties(aliases)
+            else:
+                self.dict_Gauss_pt = self._eval_properties(
+                    self.dict_Gauss_pt, aliases, nodal
+                )
         # End if nodal
 
     # End method _eval_properties_nodal_gauss
 
-    def _eval_properties(self, dict_dummy, aliases):
+    def _interpolate_gauss_properties(self, aliases):
+        """Method that evaluates the properties in Gauss points from the nodal ones (that must be already evaluated), as the mean of the values in the two nodes of the element, instead of evaluating them again from temperature and pressure.
+        Since temperature and pressure in the Gauss point are the mean of the nodal values, the error of the interpolation of property f in each element is bounded by |Delta^T H Delta|/8, where Delta is the variation of (temperature, pressure) along the element and H is the Hessian of f with respect to (temperature, pressure), maximized along the element. The error is then negligible where the state changes smoothly, while it is large where the variation is large or the property has a sharp peak (e.g. isobaric specific heat close to the pseudo critical line of helium): in the elements where the relative variation of temperature or pressure is larger than attribute gauss_property_rtol properties are evaluated from temperature and pressure in the Gauss point.
+
+        Args:
+            aliases (dict): collection of the properties to be evaluated, the values are the CoolProp aliases.
+        """
+        temperature = self.dict_Gauss_pt["temperature"]
+        pressure = self.dict_Gauss_pt["pressure"]
+        # Elements with large variation of temperature or pressure.
+        idx = np.flatnonzero(
+            (
+                np.abs(np.diff(self.dict_node_pt["temperature"]))
+                > self.gauss_property_rtol * np.abs(temperature)
+            )
+            | (
+                np.abs(np.diff(self.dict_node_pt["pressure"]))
+                > self.gauss_property_rtol * np.abs(pressure)
+            )
+        )
+        for name in aliases:
+            self.dict_Gauss_pt[name] = (
+                self.dict_node_pt[name][:-1] + self.dict_node_pt[name][1:]
+            ) / 2.0
+        if idx.size > 0:
+            for name, value in self._eval_props(
+                aliases, temperature[idx], pressure[idx]
+            ).items():
+                self.dict_Gauss_pt[name][idx] = value
+        self.dict_Gauss_pt = self.eval_dimensionless_numbers(self.dict_Gauss_pt)
+
+    # End method _interpolate_gauss_properties
+
+    def _eval_properties(self, dict_dummy, aliases, nodal=True):
         """
         Method that actually evaluate density, specific_heat and thermal
         conductivity of FluidComponent class objects regardless of the location
         (nodal or Gauss points) (cdp, 09/2020)
+        If attribute property_rtol is larger than 0 the properties are updated incrementally, see method _update_properties.
         """
         # Evaluate density, dynamic viscosity, Gruneisen, enthalpy, isobaric specific heat, isochoric specific heat, speed of sound and thermal conductivity with MatLab functions and data base
-        for prop_name, alias in aliases.items():
-            dict_dummy[prop_name] = PropsSI(
-                alias,
-                "T",
-                dict_dummy["temperature"],
-                "P",
-                dict_dummy["pressure"],
-                self.type,
+        if self.property_rtol > 0.0:
+            dict_dummy.update(self._update_properties(dict_dummy, aliases, nodal))
+        else:
+            dict_dummy.update(
+                self._eval_props(
+                    aliases, dict_dummy["temperature"], dict_dummy["pressure"]
+                )
             )
-        # End for prop_name, function
         # Compute Reynolds and Prandtl dimensionless number invoking method self.eval_dimensionless_numbers
         dict_dummy = self.eval_dimensionless_numbers(dict_dummy)
 
@@ -223,6 +371,60 @@ class Coolant(FluidComponentInput):
 
     # End method _eval_properties.
 
+    def _update_properties(self, dict_dummy, aliases, nodal):
+        """Method that updates the properties incrementally: properties are evaluated again only in the points where temperature or pressure changed more than the relative tolerance property_rtol since their last evaluation, in the other points the last values are reused. Properties are evaluated in all the points if the number of points or the properties to be evaluated change.
+
+        Args:
+            dict_dummy (dict): collection of the nodal or Gauss point quantities, with at least keys temperature and pressure.
+            aliases (dict): collection of the properties to be evaluated, the values are the CoolProp aliases.
+            nodal (bool): True for nodal points, False for Gauss points.
+
+        Returns:
+            dict: properties values, copies of the values stored in attribute property_cache.
+        """
+        temperature = dict_dummy["temperature"]
+        pressure = dict_dummy["pressure"]
+        cache = self.property_cache.get(nodal)
+        if (
+            cache is None
+            or cache["temperature"].shape != temperature.shape
+            or cache["properties"].keys() != aliases.keys()
+        ):
+            cache = dict(
+                temperature=temperature.copy(),
+                pressure=pressure.copy(),
+                properties=self._eval_props(aliases, temperature, pressure),
+            )
+            self.property_cache[nodal] = cache
+            self.property_update_counter["recomputed"] += temperature.size
+        else:
+            # Points where the state changed more than the tolerance since
+            # the last evaluation of the properties.
+            changed = np.flatnonzero(
+                (
+                    np.abs(temperature - cache["temperature"])
+                    > self.property_rtol * np.abs(cache["temperature"])
+                )
+                | (
+                    np.abs(pressure - cache["pressure"])
+                    > self.property_rtol * np.abs(cache["pressure"])
+                )
+            )
+            if changed.size > 0:
+                for name, value in self._eval_props(
+                    aliases, temperature[changed], pressure[changed]
+                ).items():
+                    cache["properties"][name][changed] = value
+                cache["temperature"][changed] = temperature[changed]
+                cache["pressure"][changed] = pressure[changed]
+            self.property_update_counter["recomputed"] += changed.size
+            self.property_update_counter["skipped"] += (
+                temperature.size - changed.size
+            )
+        return {name: value.copy() for name, value in cache["properties"].items()}
+
+    # End method _update_properties
+
     def _compute_density_and_mass_flow_rates_nodal_gauss(self, conductor, nodal=True):
         """
         Method that evaluates channel density and mass flow rate in nodal points or in Gauss point according to options value, after that solution is evaluated with function STEP, to make plots of spatial distribution and time evolution. This function is also invoked in method Conductor.Initialization. (cdp, 10/2020)
@@ -245,13 +447,12 @@ class Coolant(FluidComponentInput):
     # End method _compute_density_and_mass_flow_rates_nodal_gauss
 
     def _compute_density_and_mass_flow_rates(self, dict_dummy):
-        dict_dummy["total_density"] = PropsSI(
-            "Dmass",
-            "T",
-            dict_dummy["temperature"],
-            "P",
-            dict_dummy["pressure"],
-            self.type,
+        dict_dummy.update(
+            self._eval_props(
+                dict(total_density="Dmass"),
+                dict_dummy["temperature"],
+                dict_dummy["pressure"],
+            )
         )
         # end if conductor.num_time_step > 0
         # Compute mass flow rate spatial distribution
@@ -263,79 +464,3 @@ class Coolant(FluidComponentInput):
         return dict_dummy
 
     # end method _compute_density_and_mass_flow_rates
-
-    def compute_velocity_gen_flow(
-        self,
-        ZLENGTH,
-        channel,
-        MAXITR,
-        PDROP,
-        RHOREF,
-        VISREF,
-        TOLRNC,
-        velocity_guess=0.0,
-        friction_guess=0.01,
-        nodal=None,
-    ):
-        """[summary]
-
-        Args:
-            ZLENGTH ([type]): [description]
-            channel ([type]): [description]
-            MAXITR ([type]): [description]
-            PDROP ([type]): [description]
-            RHOREF ([type]): [description]
-            VISREF ([type]): [description]
-            TOLRNC ([type]): [description]
-            velocity_guess (float, optional): [description]. Defaults to 0.0.
-            friction_guess (float, optional): [description]. Defaults to 0.01.
-            nodal ([type], optional): [description]. Defaults to None.
-
-        Returns:
-            [type]: [description]
-        """
-        leff = ZLENGTH / self.inputs["COSTETA"]
-        err = 1.0
-        # Initialize total friction factor with the guess value (gen_flow sub dictionary)
-        channel.dict_friction_factor[nodal]["total"] = friction_guess
-        # Initialize velocity with the guess value.
-        velocity = velocity_guess
-        ii = 1
-        # While loop to evaluate the velocity
-        while ii <= MAXITR and err >= TOLRNC:
-            ii = ii + 1
-            old_velocity = velocity
-            velocity = np.sqrt(
-                (self.inputs["HYDIAMETER"] * PDROP)
-                / (2.0 * channel.dict_friction_factor[nodal]["total"] * RHOREF * leff)
-            )
-            reynolds = (RHOREF * velocity * self.inputs["HYDIAMETER"]) / VISREF
-            channel.eval_friction_factor(reynolds, nodal=nodal)
-            err = np.fabs(velocity - old_velocity) / np.fabs(velocity)
-        # End while ii.
-        if ii > MAXITR and err >= TOLRNC:
-            warnings.warn(
-                f"WARNING. TOLERANCE NOT ACHIEVED FOR {self.identifier} IN GENFLW \
-      Fuidcomponent coolant compute_velocity:\nerr = {err}"
-            )
-        # End if ii.
-        return velocity
-
-    # End method compute_velocity_gen_flow.
-
-    def compute_mass_flow_with_direction(
-        self, FLDIR, RHOREF, VELCT
-    ):  # tested: (cdp, 06/2020)
-        """[summary]
-
-        Args:
-            FLDIR ([type]): [description]
-            RHOREF ([type]): [description]
-            VELCT ([type]): [description]
-
-        Returns:
-            [type]: [description]
-        """
-        return FLDIR * self.inputs["CROSSECTION"] * RHOREF * VELCT
-
-    # End method compute_mass_flow_with_direction
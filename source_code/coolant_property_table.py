@@ -0,0 +1,385 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import CoolProp
+from CoolProp.CoolProp import PropsSI
+from scipy.interpolate import RectBivariateSpline, bisplev
+from typing_extensions import Self
+
+tablelogger = logging.getLogger("opensc2Logger.coolant_property_table")
+
+# Default values of the optional keys of the transient input that define the
+# property tables (key COOLANT_TABLE_<NAME>).
+TABLE_DEFAULTS = dict(
+    # Temperature window (K), the grid is geometrically spaced to refine
+    # the low temperature region.
+    TMIN=4.0,
+    TMAX=300.0,
+    NT=200,
+    # Pressure window (Pa), the grid is uniformly spaced.
+    PMIN=1e5,
+    PMAX=2.5e6,
+    NP=60,
+    # Degree of the interpolating spline along temperature and pressure (3
+    # for bicubic, 1 for bilinear interpolation).
+    DEGREE=3,
+    # Relative tolerance on the interpolated properties: cells of the table
+    # where the interpolation error is larger (e.g. across the saturation
+    # line) are evaluated with CoolProp.
+    RTOL=1e-3,
+    # Directory of the on disk cache of the tables.
+    CACHE_DIR=os.path.join(
+        os.path.expanduser("~"), ".cache", "opensc2", "coolant_property_tables"
+    ),
+)
+
+# Number of points evaluated by each call to function bisplev (see function
+# _eval_spline).
+EVAL_BLOCK_SIZE = 32
+
+# Fractions of the cell size along temperature and pressure of the points
+# where the accuracy of the interpolation is checked (eighth and quarter
+# points and center of the cells): checking only the center of the cells
+# underestimates the error close to the nodes of the grid.
+CHECK_FRACTIONS = np.array([0.125, 0.25, 0.5, 0.75, 0.875])
+
+# Version of the layout of the tables in the cache directory: tables saved
+# with a different version are not loaded (version 2: accuracy checked at
+# the eighth and quarter points of the cells).
+CACHE_VERSION = 2
+
+
+def _fill_non_finite(values: np.ndarray, temperature: np.ndarray) -> np.ndarray:
+    """Function that replaces the non finite values of a property table (points where CoolProp fails, e.g. close to the critical point) by linear interpolation along temperature, so that the spline can be built; the accuracy check flags the cells close to these points as not valid.
+
+    Args:
+        values (np.ndarray): property table with shape (NT, NP).
+        temperature (np.ndarray): temperature grid (K).
+
+    Returns:
+        np.ndarray: property table with finite values.
+    """
+    for jj in np.flatnonzero(~np.isfinite(values).all(axis=0)):
+        finite = np.isfinite(values[:, jj])
+        values[~finite, jj] = np.interp(
+            temperature[~finite], temperature[finite], values[finite, jj]
+        )
+    return values
+
+
+def _eval_spline(tck: tuple, temperature: np.ndarray, pressure: np.ndarray) -> np.ndarray:
+    """Function that evaluates a spline at scattered points with function bisplev. Function bisplev evaluates the spline on the grid defined by sorted coordinates, thus points are evaluated in blocks of EVAL_BLOCK_SIZE and the diagonal of each grid is taken, limiting the cost of the grid evaluation.
+
+    Args:
+        tck (tuple): knots along temperature and pressure, coefficients and degrees of the spline (tx, ty, c, kx, ky).
+        temperature (np.ndarray): temperature (K), 1D array.
+        pressure (np.ndarray): pressure (Pa), 1D array with the same shape of temperature.
+
+    Returns:
+        np.ndarray: spline values.
+    """
+    values = np.empty(temperature.shape)
+    for start in range(0, temperature.size, EVAL_BLOCK_SIZE):
+        temp = temperature[start : start + EVAL_BLOCK_SIZE]
+        press = pressure[start : start + EVAL_BLOCK_SIZE]
+        order_t = np.argsort(temp)
+        order_p = np.argsort(press)
+        grid = np.reshape(
+            bisplev(temp[order_t], press[order_p], tck), (temp.size, press.size)
+        )
+        # Row and column of each point in the grid.
+        row = np.empty(temp.size, dtype=int)
+        row[order_t] = np.arange(temp.size)
+        col = np.empty(press.size, dtype=int)
+        col[order_p] = np.arange(press.size)
+        values[start : start + EVAL_BLOCK_SIZE] = grid[row, col]
+    return values
+
+
+class CoolantPropertyTable:
+    """Class that pre-tabulates the properties of a coolant on a (temperature, pressure) grid with CoolProp and evaluates them by vectorized spline interpolation, to avoid the per-call cost of function PropsSI at each time step.
+    The accuracy of the interpolation is checked against CoolProp at CHECK_FRACTIONS**2 points of each cell of the grid: properties at points that fall outside the grid or in a cell where the relative error is larger than the tolerance are evaluated with PropsSI (fallback).
+    Tables are saved in a versioned cache directory, keyed by fluid, CoolProp version, grid, spline degree, tolerance and tabulated properties; tables found in the cache are loaded as memory mapped arrays, so that simulations running at the same time share the memory pages and do not call CoolProp to build the tables.
+    """
+
+    def __init__(self: Self, fluid: str, aliases: dict, transient_input: dict):
+        """Make an instance of class CoolantPropertyTable, loading the tables of all the properties in aliases from the cache directory or, if they are not in the cache, building them and saving them in the cache directory.
+
+        Args:
+            self (Self): property table object.
+            fluid (str): CoolProp name of the coolant (attribute type of Coolant objects).
+            aliases (dict): collection of the properties to be tabulated, the values are the CoolProp aliases (see attribute fluid_prop_aliases of Simulation objects).
+            transient_input (dict): transient input, optional keys COOLANT_TABLE_<NAME> overwrite the defaults in TABLE_DEFAULTS.
+        """
+        self.fluid = fluid
+        self.options = {
+            name: transient_input.get(f"COOLANT_TABLE_{name}", value)
+            for name, value in TABLE_DEFAULTS.items()
+        }
+        self.aliases = sorted(set(aliases.values()))
+        # Counters of the points evaluated by interpolation and by CoolProp.
+        self.n_interpolated = 0
+        self.n_fallback = 0
+        self.path = os.path.join(
+            self.options["CACHE_DIR"], f"v{CACHE_VERSION}", self.__cache_key()
+        )
+        if os.path.isdir(self.path):
+            self.__load()
+        else:
+            self.__build()
+            self.__save()
+
+    def __cache_key(self: Self) -> str:
+        """Private method that evaluates the name of the table in the cache directory, from the fluid, the CoolProp version and a hash of the options (without the cache directory) and of the tabulated properties.
+
+        Args:
+            self (Self): property table object.
+
+        Returns:
+            str: name of the table in the cache directory.
+        """
+        # Options are converted to float since values read from the transient
+        # input can be integers or floats.
+        options = {
+            key: float(value)
+            for key, value in self.options.items()
+            if key != "CACHE_DIR"
+        }
+        digest = hashlib.sha1(
+            json.dumps([options, self.aliases], sort_keys=True).encode()
+        ).hexdigest()[:16]
+        return f"{self.fluid}_CoolProp-{CoolProp.__version__}_{digest}"
+
+    def __build(self: Self):
+        """Private method that builds the tables with CoolProp and checks the accuracy of the interpolation at the check points of the cells of the grid (CHECK_FRACTIONS of the cell size along temperature and pressure).
+
+        Args:
+            self (Self): property table object.
+        """
+        self.temperature = np.geomspace(
+            self.options["TMIN"], self.options["TMAX"], int(self.options["NT"])
+        )
+        self.pressure = np.linspace(
+            self.options["PMIN"], self.options["PMAX"], int(self.options["NP"])
+        )
+        self.splines = dict()
+        # Mask of the valid cells of the grid (shape (NT-1, NP-1)).
+        self.valid = np.ones((self.temperature.size - 1, self.pressure.size - 1), dtype=bool)
+        temp_grid, press_grid = np.meshgrid(
+            self.temperature, self.pressure, indexing="ij"
+        )
+        # Check points of each cell, used to check the accuracy of the
+        # interpolation.
+        temp_check, press_check = np.meshgrid(
+            (
+                self.temperature[:-1, None]
+                + np.diff(self.temperature)[:, None] * CHECK_FRACTIONS
+            ).ravel(),
+            (
+                self.pressure[:-1, None]
+                + np.diff(self.pressure)[:, None] * CHECK_FRACTIONS
+            ).ravel(),
+            indexing="ij",
+        )
+        check_shape = (
+            self.temperature.size - 1,
+            CHECK_FRACTIONS.size,
+            self.pressure.size - 1,
+            CHECK_FRACTIONS.size,
+        )
+        for alias in self.aliases:
+            values = PropsSI(
+                alias, "T", temp_grid.ravel(), "P", press_grid.ravel(), self.fluid
+            ).reshape(temp_grid.shape)
+            values = _fill_non_finite(values, self.temperature)
+            # Knots, coefficients and degrees of the spline (tx, ty, c, kx, ky).
+            self.splines[alias] = (
+                *RectBivariateSpline(
+                    self.temperature,
+                    self.pressure,
+                    values,
+                    kx=self.options["DEGREE"],
+                    ky=self.options["DEGREE"],
+                ).tck,
+                self.options["DEGREE"],
+                self.options["DEGREE"],
+            )
+            reference = PropsSI(
+                alias, "T", temp_check.ravel(), "P", press_check.ravel(), self.fluid
+            ).reshape(temp_check.shape)
+            error = np.abs(
+                _eval_spline(
+                    self.splines[alias], temp_check.ravel(), press_check.ravel()
+                ).reshape(temp_check.shape)
+                - reference
+            )
+            # The error is scaled with the largest value of the property in
+            # the table for properties that are close to zero.
+            scale = np.maximum(np.abs(reference), 1e-6 * np.abs(values).max())
+            # A cell is valid if the error is within tolerance at all its
+            # check points (non finite reference values flag the cell as not
+            # valid).
+            self.valid &= (
+                (error <= self.options["RTOL"] * scale)
+                .reshape(check_shape)
+                .all(axis=(1, 3))
+            )
+        tablelogger.info(
+            f"Built property table of {self.fluid}: {self.temperature.size}x{self.pressure.size} points, {len(self.splines)} properties, {self.valid.mean()*100:.1f} % of valid cells.\n"
+        )
+
+    def __save(self: Self):
+        """Private method that saves the grid, the valid cells mask and the knots and coefficients of the splines in the cache directory (one .npy file for each array). Files are written in a temporary directory that is then renamed, so that simulations running at the same time never load an incomplete table; if the cache directory can not be written the table is used without saving it.
+
+        Args:
+            self (Self): property table object.
+        """
+        arrays = dict(temperature=self.temperature, pressure=self.pressure, valid=self.valid)
+        for alias, spline in self.splines.items():
+            arrays.update(
+                {
+                    f"{alias}_{name}": value
+                    for name, value in zip(("knots_t", "knots_p", "coefficients"), spline[:3])
+                }
+            )
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = tempfile.mkdtemp(dir=os.path.dirname(self.path))
+        except OSError as err:
+            tablelogger.warning(
+                f"Property table of {self.fluid} not saved in {self.path}: {err}.\n"
+            )
+            self.path = None
+            return
+        try:
+            for name, value in arrays.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), value)
+            # Human readable description of the table.
+            with open(os.path.join(tmp_path, "table.json"), "w") as ff:
+                json.dump(
+                    dict(
+                        fluid=self.fluid,
+                        CoolProp=CoolProp.__version__,
+                        options=self.options,
+                        aliases=self.aliases,
+                    ),
+                    ff,
+                    indent=4,
+                    default=float,
+                )
+            os.rename(tmp_path, self.path)
+        except OSError as err:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            # The same table may have been saved by another simulation in the
+            # meanwhile.
+            if not os.path.isdir(self.path):
+                tablelogger.warning(
+                    f"Property table of {self.fluid} not saved in {self.path}: {err}.\n"
+                )
+                self.path = None
+            return
+        tablelogger.info(f"Saved property table of {self.fluid} in {self.path}.\n")
+
+    def __load(self: Self):
+        """Private method that loads the table from the cache directory as memory mapped (read only) arrays.
+
+        Args:
+            self (Self): property table object.
+        """
+        def load(name):
+            return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+        self.temperature = load("temperature")
+        self.pressure = load("pressure")
+        self.valid = load("valid")
+        self.splines = {
+            alias: (
+                load(f"{alias}_knots_t"),
+                load(f"{alias}_knots_p"),
+                load(f"{alias}_coefficients"),
+                self.options["DEGREE"],
+                self.options["DEGREE"],
+            )
+            for alias in self.aliases
+        }
+        tablelogger.info(f"Loaded property table of {self.fluid} from {self.path}.\n")
+
+    def __getstate__(self: Self) -> dict:
+        """Method that returns the state of the object to be pickled (pool of processes): if the table is saved in the cache directory the arrays are not pickled, they are memory mapped again by method __setstate__.
+
+        Args:
+            self (Self): property table object.
+
+        Returns:
+            dict: state of the object.
+        """
+        state = self.__dict__.copy()
+        if self.path is not None:
+            for name in ("temperature", "pressure", "valid", "splines"):
+                del state[name]
+        return state
+
+    def __setstate__(self: Self, state: dict):
+        """Method that restores the state of the object, loading the arrays from the cache directory if they were not pickled.
+
+        Args:
+            self (Self): property table object.
+            state (dict): state of the object.
+        """
+        self.__dict__.update(state)
+        if "splines" not in state:
+            self.__load()
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(fluid: {self.fluid}, T: [{self.temperature[0]}, {self.temperature[-1]}] K, p: [{self.pressure[0]}, {self.pressure[-1]}] Pa, valid cells: {self.valid.mean()*100:.1f} %)"
+
+    def eval(self: Self, alias: str, temperature, pressure):
+        """Method that evaluates a coolant property, with the same interface of function PropsSI with inputs temperature and pressure.
+
+        Args:
+            self (Self): property table object.
+            alias (str): CoolProp alias of the property.
+            temperature (Union[float,np.ndarray]): temperature (K).
+            pressure (Union[float,np.ndarray]): pressure (Pa).
+
+        Returns:
+            Union[float,np.ndarray]: property values, float if temperature and pressure are scalars.
+        """
+        if alias not in self.splines:
+            return PropsSI(alias, "T", temperature, "P", pressure, self.fluid)
+        temp, press = np.broadcast_arrays(
+            np.asarray(temperature, dtype=float), np.asarray(pressure, dtype=float)
+        )
+        temp = temp.ravel()
+        press = press.ravel()
+        # Cell of the grid that contains each point (-1 or the number of
+        # cells if the point is outside the grid).
+        idx_t = np.searchsorted(self.temperature, temp, side="right") - 1
+        idx_p = np.searchsorted(self.pressure, press, side="right") - 1
+        # Points on the upper boundary of the grid belong to the last cell.
+        idx_t[temp == self.temperature[-1]] = self.temperature.size - 2
+        idx_p[press == self.pressure[-1]] = self.pressure.size - 2
+        inside = (
+            (idx_t >= 0)
+            & (idx_t < self.temperature.size - 1)
+            & (idx_p >= 0)
+            & (idx_p < self.pressure.size - 1)
+        )
+        inside[inside] = self.valid[idx_t[inside], idx_p[inside]]
+        values = np.empty(temp.shape)
+        values[inside] = _eval_spline(self.splines[alias], temp[inside], press[inside])
+        if not inside.all():
+            # Fallback to CoolProp.
+            outside = ~inside
+            values[outside] = PropsSI(
+                alias, "T", temp[outside], "P", press[outside], self.fluid
+            )
+        self.n_interpolated += np.count_nonzero(inside)
+        self.n_fallback += inside.size - np.count_nonzero(inside)
+        if np.ndim(temperature) == 0 and np.ndim(pressure) == 0:
+            return float(values[0])
+        return values.reshape(np.broadcast(temperature, pressure).shape)
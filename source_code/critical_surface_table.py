@@ -0,0 +1,452 @@
+import logging
+import numpy as np
+from scipy.interpolate import CubicSpline, RectBivariateSpline
+from typing import Union
+from typing_extensions import Self
+
+from properties_of_materials.niobium_titanium import (
+    critical_current_density_nbti,
+    current_sharing_temperature_nbti,
+)
+from properties_of_materials.niobium3_tin import (
+    SNBSN,
+    critical_current_density_nb3sn,
+    current_sharing_temperature_nb3sn,
+)
+from properties_of_materials.rare_earth_123 import (
+    critical_current_density_re123,
+    current_sharing_temperature_re123,
+)
+from properties_of_materials.magnesium_diboride import (
+    critical_current_density_mgb2,
+    current_sharing_temperature_mgb2,
+)
+from utility_functions.auxiliary_functions import bracketed_root
+
+tablelogger = logging.getLogger("opensc2Logger.critical_surface_table")
+
+# Default values of the optional keys of the transient input that define the
+# critical surface tables (key CRITICAL_SURFACE_TABLE_<NAME>).
+TABLE_DEFAULTS = dict(
+    # Number of points along the reduced temperature (uniformly spaced in
+    # [0, 1]), the reduced magnetic field (geometrically spaced) and the
+    # fraction of the critical current density at 0 K (uniformly spaced in
+    # ]0, 1[).
+    NT=200,
+    NB=200,
+    NJ=200,
+    # Relative margin of the reduced magnetic field window around the values
+    # at the initialization.
+    B_MARGIN=0.25,
+    # Minimum and maximum magnetic field (T) expected in the simulation: if
+    # given they replace the window sized on the values at the
+    # initialization, e.g. for magnetic fields ramped from 0 T.
+    BMIN=None,
+    BMAX=None,
+    # Relative tolerance on the interpolated critical current density and
+    # absolute tolerance on the interpolated current sharing temperature
+    # (K): cells of the tables where the interpolation error is larger are
+    # evaluated with the scaling law.
+    RTOL=1e-4,
+    TCS_ATOL=1e-4,
+)
+
+# Lower limit of the magnetic field used by the scaling laws (T).
+B_LOW = 0.01
+
+# Scaling laws of the critical current density, with signature (inputs,
+# temperature, magnetic_field, strain).
+CRITICAL_CURRENT_DENSITY = dict(
+    NbTi=lambda inputs, temp, field, strain: critical_current_density_nbti(
+        temp, field, inputs["Bc20m"], inputs["c0"], inputs["Tc0m"]
+    ),
+    Nb3Sn=lambda inputs, temp, field, strain: critical_current_density_nb3sn(
+        temp, field, strain, inputs["Tc0m"], inputs["Bc20m"], inputs["c0"]
+    ),
+    YBCO=lambda inputs, temp, field, strain: critical_current_density_re123(
+        temp, field, inputs["Tc0m"], inputs["Bc20m"], inputs["c0"]
+    ),
+    MgB2=lambda inputs, temp, field, strain: critical_current_density_mgb2(
+        temp, field, inputs["Bc20m"], inputs["c0"], inputs["Tc0m"]
+    ),
+)
+
+# Current sharing temperature from the scaling laws, with signature (inputs,
+# magnetic_field, strain, operating_current_density).
+CURRENT_SHARING_TEMPERATURE = dict(
+    NbTi=lambda inputs, field, strain, jop: current_sharing_temperature_nbti(
+        field, jop, inputs["Bc20m"], inputs["c0"], inputs["Tc0m"]
+    ),
+    Nb3Sn=lambda inputs, field, strain, jop: current_sharing_temperature_nb3sn(
+        field, strain, jop, inputs["Tc0m"], inputs["Bc20m"], inputs["c0"]
+    ),
+    YBCO=lambda inputs, field, strain, jop: current_sharing_temperature_re123(
+        field, jop, inputs["Tc0m"], inputs["Bc20m"], inputs["c0"]
+    ),
+    MgB2=lambda inputs, field, strain, jop: current_sharing_temperature_mgb2(
+        field, jop, inputs["Bc20m"], inputs["c0"], inputs["Tc0m"]
+    ),
+)
+
+# Lower bound of the bracket of the current sharing temperature used by the
+# functions in CURRENT_SHARING_TEMPERATURE (K).
+TEMPERATURE_LOWER_BOUND = dict(NbTi=3.5, Nb3Sn=3.5, YBCO=0.0, MgB2=3.5)
+
+
+class CriticalSurfaceTable:
+    """Class that pre-tabulates the critical surface of the superconductor of a strand and evaluates the critical current density Jc(T, B, epsilon) and the current sharing temperature Tcs(B, epsilon, Jop) by vectorized spline interpolation, to avoid the evaluation of the scaling laws (and the root finding for the current sharing temperature) at each time step.
+    The tables are built in the reduced variables t = T/Tc0*(epsilon) and b = max(B, B_LOW)/Bc20*(epsilon), where Tc0* = Tc0m*s(epsilon)^(1/3) and Bc20* = Bc20m*s(epsilon) for Nb3Sn (s is the strain function, see function SNBSN) and Tc0* = Tc0m and Bc20* = Bc20m for the other superconductors: in these variables the scaling laws do not depend on the strain, hence the tables are two dimensional. The current sharing temperature is tabulated as a function of b and of the ratio u = Jop/Jc(0, b).
+    The reduced magnetic field window is sized on the values at the initialization (with a relative margin) or on the user defined magnetic field envelope (options BMIN and BMAX). The accuracy of the interpolation is checked at the center of each cell against the scaling laws: points that fall outside the tables or in a cell where the error is larger than the tolerance are evaluated with the scaling laws (fallback). The fraction of interpolated points and the maximum interpolation error in the valid cells are stored in attributes counter and max_error.
+    """
+
+    def __init__(
+        self: Self,
+        material: str,
+        inputs: dict,
+        magnetic_field: np.ndarray,
+        strain: Union[None, np.ndarray],
+        options: dict,
+    ):
+        """Make an instance of class CriticalSurfaceTable, building the tables.
+
+        Args:
+            self (Self): critical surface table object.
+            material (str): superconducting material of the strand (key of CRITICAL_CURRENT_DENSITY).
+            inputs (dict): inputs of the strand, keys Tc0m, Bc20m and c0 are used.
+            magnetic_field (np.ndarray): magnetic field at the initialization (T), used to size the tables if options BMIN and BMAX are not given.
+            strain (Union[None, np.ndarray]): strain at the initialization (used only for Nb3Sn).
+            options (dict): options of the tables (see TABLE_DEFAULTS).
+        """
+        self.material = material
+        self.inputs = {key: inputs[key] for key in ("Tc0m", "Bc20m", "c0")}
+        self.options = options
+        # Counters of the points evaluated by interpolation and by the
+        # scaling laws.
+        self.counter = dict(
+            J_critical=dict(interpolated=0, analytic=0),
+            T_cur_sharing=dict(interpolated=0, analytic=0),
+        )
+        # Maximum interpolation error in the valid cells: relative for the
+        # critical current density, absolute (K) for the current sharing
+        # temperature.
+        self.max_error = dict()
+        self.__build(np.asarray(magnetic_field, dtype=float), strain)
+
+    def __scales(self: Self, strain: Union[None, np.ndarray]) -> tuple:
+        """Private method that evaluates the critical temperature at 0 T and the critical magnetic field at 0 K at the given strain, used to evaluate the reduced variables.
+
+        Args:
+            self (Self): critical surface table object.
+            strain (Union[None, np.ndarray]): strain (used only for Nb3Sn).
+
+        Returns:
+            tuple: critical temperature (K) and critical magnetic field (T).
+        """
+        if self.material != "Nb3Sn" or strain is None:
+            return self.inputs["Tc0m"], self.inputs["Bc20m"]
+        strain_function = SNBSN(strain)
+        return (
+            self.inputs["Tc0m"] * strain_function ** (1.0 / 3.0),
+            self.inputs["Bc20m"] * strain_function,
+        )
+
+    def __scaling_law(self: Self, reduced_temperature, reduced_field) -> np.ndarray:
+        """Private method that evaluates the critical current density with the scaling law as a function of the reduced variables; the scaling law is evaluated at the reference strain. Non finite values (above the critical surface) are set to 0.
+
+        Args:
+            self (Self): critical surface table object.
+            reduced_temperature (np.ndarray): reduced temperature.
+            reduced_field (np.ndarray): reduced magnetic field.
+
+        Returns:
+            np.ndarray: critical current density (A/m^2).
+        """
+        temp_scale, field_scale = self.__scales(self.reference_strain)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = CRITICAL_CURRENT_DENSITY[self.material](
+                self.inputs,
+                reduced_temperature * temp_scale,
+                reduced_field * field_scale,
+                np.full(np.shape(reduced_temperature), self.reference_strain),
+            )
+        return np.where(np.isfinite(values), values, 0.0)
+
+    def __build(self: Self, magnetic_field: np.ndarray, strain: Union[None, np.ndarray]):
+        """Private method that builds the tables of the critical current density and of the current sharing temperature, checking the accuracy of the interpolation at the center of the cells.
+
+        Args:
+            self (Self): critical surface table object.
+            magnetic_field (np.ndarray): magnetic field at the initialization (T).
+            strain (Union[None, np.ndarray]): strain at the initialization (used only for Nb3Sn).
+        """
+        # The reference strain is the one with the largest critical magnetic
+        # field, so that the magnetic field in the scaling law is always above
+        # its lower limit.
+        if self.material == "Nb3Sn" and strain is not None:
+            strain = np.asarray(strain, dtype=float)
+            self.reference_strain = float(strain.ravel()[np.argmax(SNBSN(strain.ravel()))])
+        else:
+            self.reference_strain = 0.0
+        _, field_scale = self.__scales(strain)
+        reduced_field = np.maximum(magnetic_field, B_LOW) / field_scale
+        b_max = min(reduced_field.max() * (1.0 + self.options["B_MARGIN"]), 1.0)
+        if self.options["BMAX"] is not None:
+            b_max = min(self.options["BMAX"] / np.min(field_scale), 1.0)
+        if self.options["BMIN"] is not None:
+            b_min = max(self.options["BMIN"], B_LOW) / np.max(field_scale)
+        else:
+            b_min = reduced_field.min() * (1.0 - self.options["B_MARGIN"])
+        b_min = min(b_min, 0.5 * b_max)
+
+        # Critical current density table.
+        self.reduced_temperature = np.linspace(0.0, 1.0, int(self.options["NT"]))
+        self.reduced_field = np.geomspace(b_min, b_max, int(self.options["NB"]))
+        t_grid, b_grid = np.meshgrid(
+            self.reduced_temperature, self.reduced_field, indexing="ij"
+        )
+        values = self.__scaling_law(t_grid.ravel(), b_grid.ravel()).reshape(
+            t_grid.shape
+        )
+        self.jc_spline = RectBivariateSpline(
+            self.reduced_temperature, self.reduced_field, values
+        )
+        t_center, b_center = np.meshgrid(
+            (self.reduced_temperature[:-1] + self.reduced_temperature[1:]) / 2.0,
+            np.sqrt(self.reduced_field[:-1] * self.reduced_field[1:]),
+            indexing="ij",
+        )
+        reference = self.__scaling_law(t_center.ravel(), b_center.ravel()).reshape(
+            t_center.shape
+        )
+        # The error is scaled with the largest value of the critical current
+        # density in the table where the critical current density is close to
+        # zero.
+        error = np.abs(self.jc_spline.ev(t_center, b_center) - reference) / np.maximum(
+            np.abs(reference), 1e-6 * np.abs(values).max()
+        )
+        self.jc_valid = error <= self.options["RTOL"]
+        self.max_error["J_critical"] = error[self.jc_valid].max(initial=0.0)
+
+        # Critical current density at 0 K, used to evaluate the ratio u.
+        self.j0_spline = CubicSpline(np.log(self.reduced_field), values[0, :])
+
+        # Current sharing temperature table.
+        self.current_ratio = np.linspace(0.0, 1.0, int(self.options["NJ"]) + 2)[1:-1]
+        b_grid, u_grid = np.meshgrid(
+            self.reduced_field, self.current_ratio, indexing="ij"
+        )
+        self.tcs_spline = RectBivariateSpline(
+            self.reduced_field,
+            self.current_ratio,
+            self.__reduced_current_sharing_temperature(
+                b_grid.ravel(), u_grid.ravel() * np.repeat(values[0, :], u_grid.shape[1])
+            ).reshape(b_grid.shape),
+        )
+        b_center, u_center = np.meshgrid(
+            np.sqrt(self.reduced_field[:-1] * self.reduced_field[1:]),
+            (self.current_ratio[:-1] + self.current_ratio[1:]) / 2.0,
+            indexing="ij",
+        )
+        # The check includes the interpolation of the critical current
+        # density at 0 K.
+        jop_center = u_center * self.__scaling_law(
+            np.zeros(b_center.size), b_center.ravel()
+        ).reshape(b_center.shape)
+        reference = self.__reduced_current_sharing_temperature(
+            b_center.ravel(), jop_center.ravel()
+        ).reshape(b_center.shape)
+        temp_scale, _ = self.__scales(self.reference_strain)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            error = temp_scale * np.abs(
+                self.tcs_spline.ev(
+                    b_center, jop_center / self.j0_spline(np.log(b_center))
+                )
+                - reference
+            )
+        self.tcs_valid = error <= self.options["TCS_ATOL"]
+        self.max_error["T_cur_sharing"] = error[self.tcs_valid].max(initial=0.0)
+        tablelogger.info(
+            f"Built critical surface table of {self.material}: reduced magnetic field in [{b_min:.3e}, {b_max:.3e}], {self.jc_valid.mean()*100:.1f} % (Jc) and {self.tcs_valid.mean()*100:.1f} % (Tcs) of valid cells, maximum interpolation error {self.max_error['J_critical']:.2e} (Jc, relative) and {self.max_error['T_cur_sharing']:.2e} K (Tcs).\n"
+        )
+
+    def __reduced_current_sharing_temperature(
+        self: Self, reduced_field: np.ndarray, jop: np.ndarray
+    ) -> np.ndarray:
+        """Private method that evaluates the reduced current sharing temperature, root of Jc(t, b) = Jop in [0, 1], with the scaling law at the reference strain.
+
+        Args:
+            self (Self): critical surface table object.
+            reduced_field (np.ndarray): reduced magnetic field.
+            jop (np.ndarray): operating current density (A/m^2).
+
+        Returns:
+            np.ndarray: reduced current sharing temperature.
+        """
+        temp_scale, _ = self.__scales(self.reference_strain)
+
+        def residual(reduced_temperature, index):
+            return (
+                self.__scaling_law(reduced_temperature, reduced_field[index])
+                - jop[index]
+            )
+
+        return bracketed_root(
+            residual,
+            np.zeros(reduced_field.shape),
+            np.ones(reduced_field.shape),
+            xtol=1e-3 * self.options["TCS_ATOL"] / temp_scale,
+        )
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(material: {self.material}, reduced magnetic field: [{self.reduced_field[0]:.3e}, {self.reduced_field[-1]:.3e}])"
+
+    def report(self: Self) -> str:
+        """Method that summarizes the fraction of the points evaluated by interpolation (cache hit rate) and the maximum interpolation error against the scaling laws.
+
+        Args:
+            self (Self): critical surface table object.
+
+        Returns:
+            str: summary of the use of the tables.
+        """
+        summary = list()
+        for name, counter in self.counter.items():
+            total = counter["interpolated"] + counter["analytic"]
+            rate = counter["interpolated"] / total * 100 if total else 0.0
+            summary.append(
+                f"{name} interpolated in {rate:.1f} % of {total} points (maximum error {self.max_error[name]:.2e})"
+            )
+        return "; ".join(summary)
+
+    def __lookup(self: Self, grid_x, grid_y, valid, xx, yy) -> np.ndarray:
+        """Private method that finds the points that fall in a valid cell of a table.
+
+        Args:
+            self (Self): critical surface table object.
+            grid_x (np.ndarray): grid of the first variable.
+            grid_y (np.ndarray): grid of the second variable.
+            valid (np.ndarray): mask of the valid cells.
+            xx (np.ndarray): first variable.
+            yy (np.ndarray): second variable.
+
+        Returns:
+            np.ndarray: mask of the points in a valid cell.
+        """
+        idx_x = np.searchsorted(grid_x, xx, side="right") - 1
+        idx_y = np.searchsorted(grid_y, yy, side="right") - 1
+        # Points on the upper boundary of the grid belong to the last cell.
+        idx_x[xx == grid_x[-1]] = grid_x.size - 2
+        idx_y[yy == grid_y[-1]] = grid_y.size - 2
+        inside = (
+            (idx_x >= 0)
+            & (idx_x < grid_x.size - 1)
+            & (idx_y >= 0)
+            & (idx_y < grid_y.size - 1)
+        )
+        inside[inside] = valid[idx_x[inside], idx_y[inside]]
+        return inside
+
+    def eval_jc(
+        self: Self,
+        temperature: np.ndarray,
+        magnetic_field: np.ndarray,
+        strain: Union[None, np.ndarray] = None,
+    ) -> np.ndarray:
+        """Method that evaluates the critical current density, with the same result of the scaling law within the tolerance.
+
+        Args:
+            self (Self): critical surface table object.
+            temperature (np.ndarray): temperature (K).
+            magnetic_field (np.ndarray): magnetic field (T).
+            strain (Union[None, np.ndarray], optional): strain (used only for Nb3Sn). Defaults to None.
+
+        Returns:
+            np.ndarray: critical current density (A/m^2).
+        """
+        temperature, magnetic_field = np.broadcast_arrays(
+            np.asarray(temperature, dtype=float), np.asarray(magnetic_field, dtype=float)
+        )
+        if strain is not None:
+            strain = np.broadcast_to(np.asarray(strain, dtype=float), temperature.shape)
+        temp_scale, field_scale = self.__scales(strain)
+        reduced_temperature = temperature / temp_scale
+        reduced_field = np.maximum(magnetic_field, B_LOW) / field_scale
+        inside = self.__lookup(
+            self.reduced_temperature,
+            self.reduced_field,
+            self.jc_valid,
+            reduced_temperature,
+            reduced_field,
+        )
+        values = np.empty(temperature.shape)
+        values[inside] = self.jc_spline.ev(
+            reduced_temperature[inside], reduced_field[inside]
+        )
+        if not inside.all():
+            # Fallback to the scaling law.
+            outside = ~inside
+            values[outside] = CRITICAL_CURRENT_DENSITY[self.material](
+                self.inputs,
+                temperature[outside],
+                magnetic_field[outside],
+                None if strain is None else strain[outside],
+            )
+        self.counter["J_critical"]["interpolated"] += np.count_nonzero(inside)
+        self.counter["J_critical"]["analytic"] += inside.size - np.count_nonzero(inside)
+        return values
+
+    def eval_tcs(
+        self: Self,
+        magnetic_field: np.ndarray,
+        strain: Union[None, np.ndarray],
+        jop: np.ndarray,
+    ) -> np.ndarray:
+        """Method that evaluates the current sharing temperature, with the same result of the root finding on the scaling law within the tolerance.
+
+        Args:
+            self (Self): critical surface table object.
+            magnetic_field (np.ndarray): magnetic field (T).
+            strain (Union[None, np.ndarray]): strain (used only for Nb3Sn).
+            jop (np.ndarray): operating current density (A/m^2).
+
+        Returns:
+            np.ndarray: current sharing temperature (K).
+        """
+        magnetic_field, jop = np.broadcast_arrays(
+            np.asarray(magnetic_field, dtype=float), np.asarray(jop, dtype=float)
+        )
+        if strain is not None:
+            strain = np.broadcast_to(np.asarray(strain, dtype=float), jop.shape)
+        temp_scale, field_scale = self.__scales(strain)
+        reduced_field = np.maximum(magnetic_field, B_LOW) / field_scale
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current_ratio = jop / self.j0_spline(np.log(reduced_field))
+        inside = self.__lookup(
+            self.reduced_field,
+            self.current_ratio,
+            self.tcs_valid,
+            reduced_field,
+            current_ratio,
+        )
+        values = np.empty(jop.shape)
+        values[inside] = (
+            self.tcs_spline.ev(reduced_field[inside], current_ratio[inside])
+            * (temp_scale if np.isscalar(temp_scale) else temp_scale[inside])
+        )
+        # Points below the lower bound of the bracket used by the scaling law
+        # are evaluated with the scaling law, that deals with them.
+        inside[inside] = values[inside] >= TEMPERATURE_LOWER_BOUND[self.material]
+        if not inside.all():
+            # Fallback to the scaling law.
+            outside = ~inside
+            values[outside] = CURRENT_SHARING_TEMPERATURE[self.material](
+                self.inputs,
+                magnetic_field[outside],
+                None if strain is None else strain[outside],
+                jop[outside],
+            )
+        self.counter["T_cur_sharing"]["interpolated"] += np.count_nonzero(inside)
+        self.counter["T_cur_sharing"]["analytic"] += inside.size - np.count_nonzero(
+            inside
+        )
+        return values
@@ -0,0 +1,185 @@
+import inspect
+
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from scipy.sparse.linalg import LinearOperator, gmres, splu
+from typing_extensions import Self
+
+# Keyword of the relative tolerance of function gmres: it is tol up to scipy
+# 1.11 and rtol from scipy 1.12.
+KRYLOV_RTOL_KEYWORD = (
+    "rtol" if "rtol" in inspect.signature(gmres).parameters else "tol"
+)
+
+# Default values of the options of the electric linear solver (keys
+# ELECTRIC_LU_RTOL, ELECTRIC_KRYLOV_RTOL and ELECTRIC_KRYLOV_MAXITER of the
+# transient input, see method Simulation.__set_electric_solver).
+SOLVER_DEFAULTS = dict(
+    # Relative tolerance on the change of the electric resistances and of the
+    # electric time step below which the LU factorization is reused as it is.
+    LU_RTOL=0.0,
+    # Relative tolerance of the Krylov solver.
+    KRYLOV_RTOL=1e-12,
+    # Maximum number of iterations of the Krylov solver before the LU
+    # factorization is evaluated again.
+    KRYLOV_MAXITER=20,
+)
+
+
+class ElectricLinearSolver:
+    """Class that solves the linear system of the transient electric problem (see function electric_transient_solution of module electric_auxiliary_functions.py) caching the sparse LU factorization of the matrix.
+    The fill reducing ordering (reverse Cuthill-McKee) is evaluated once for each structure of the electric problem (see method reset), the LU factorization is evaluated again only when the electric resistances or the electric time step change. While they are unchanged within tolerance LU_RTOL the factorization is reused as it is, otherwise the system is solved with GMRES preconditioned with the stale factorization; if GMRES does not converge in KRYLOV_MAXITER iterations the factorization is evaluated again.
+    The factorization is not pickled (it is evaluated again after the conductor is sent to another process, see class ConductorPool).
+    """
+
+    def __init__(
+        self: Self,
+        lu_rtol: float = SOLVER_DEFAULTS["LU_RTOL"],
+        krylov_rtol: float = SOLVER_DEFAULTS["KRYLOV_RTOL"],
+        krylov_maxiter: int = SOLVER_DEFAULTS["KRYLOV_MAXITER"],
+    ):
+        """Make an instance of class ElectricLinearSolver.
+
+        Args:
+            self (Self): solver object.
+            lu_rtol (float, optional): relative tolerance on the change of the parameters (electric resistances and electric time step) below which the LU factorization is reused as it is. Defaults to SOLVER_DEFAULTS["LU_RTOL"].
+            krylov_rtol (float, optional): relative tolerance of the Krylov solver. Defaults to SOLVER_DEFAULTS["KRYLOV_RTOL"].
+            krylov_maxiter (int, optional): maximum number of iterations of the Krylov solver. Defaults to SOLVER_DEFAULTS["KRYLOV_MAXITER"].
+        """
+        self.lu_rtol = lu_rtol
+        self.krylov_rtol = krylov_rtol
+        self.krylov_maxiter = krylov_maxiter
+        # Counters of the factorizations, of the solutions with the reused
+        # factorization, of the Krylov solutions and of the Krylov solutions
+        # that did not converge.
+        self.counter = dict(factorizations=0, reuses=0, krylov=0, fallbacks=0)
+        self.reset()
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(LU_RTOL: {self.lu_rtol}, factorizations: {self.counter['factorizations']}, reuses: {self.counter['reuses']}, Krylov solutions: {self.counter['krylov']}, Krylov fallbacks: {self.counter['fallbacks']})"
+
+    def __getstate__(self: Self) -> dict:
+        state = self.__dict__.copy()
+        # SuperLU objects can not be pickled.
+        state["lu"] = None
+        return state
+
+    def reset(self: Self):
+        """Method that releases the ordering and the factorization, to be called when the structure of the electric problem changes (see method Conductor.electric_preprocessing).
+
+        Args:
+            self (Self): solver object.
+        """
+        self.index = None
+        self.ordering = None
+        self.inverse_ordering = None
+        self.lu = None
+        self.parameters = None
+
+    def __build_ordering(self: Self, matrix: csc_matrix):
+        """Private method that evaluates the reverse Cuthill-McKee ordering of the structurally symmetric part of matrix.
+
+        Args:
+            self (Self): solver object.
+            matrix (csc_matrix): matrix of the linear system.
+        """
+        pattern = abs(matrix) + abs(matrix.T)
+        self.ordering = reverse_cuthill_mckee(pattern.tocsr(), symmetric_mode=True)
+        self.inverse_ordering = np.empty_like(self.ordering)
+        self.inverse_ordering[self.ordering] = np.r_[0 : self.ordering.size]
+
+    def __factorize(self: Self, matrix: csc_matrix, parameters: np.ndarray):
+        """Private method that evaluates the LU factorization of matrix permuted according to the stored ordering.
+
+        Args:
+            self (Self): solver object.
+            matrix (csc_matrix): matrix of the linear system.
+            parameters (np.ndarray): parameters of the matrix (electric resistances and electric time step).
+        """
+        self.lu = splu(
+            matrix[self.ordering, :][:, self.ordering].tocsc(),
+            permc_spec="NATURAL",
+        )
+        self.parameters = parameters.copy()
+        self.counter["factorizations"] += 1
+
+    def __lu_solve(self: Self, rhs: np.ndarray) -> np.ndarray:
+        """Private method that solves the linear system with the stored LU factorization.
+
+        Args:
+            self (Self): solver object.
+            rhs (np.ndarray): right hand side of the linear system.
+
+        Returns:
+            np.ndarray: solution of the linear system.
+        """
+        if np.iscomplexobj(rhs):
+            # The factorization of a real matrix can be applied only to real
+            # right hand sides.
+            return self.__lu_solve(rhs.real) + 1j * self.__lu_solve(rhs.imag)
+        return self.lu.solve(rhs[self.ordering])[self.inverse_ordering]
+
+    def solve(
+        self: Self,
+        matrix: csc_matrix,
+        rhs: np.ndarray,
+        parameters: np.ndarray,
+        index: np.ndarray,
+    ) -> np.ndarray:
+        """Method that solves the linear system of the transient electric problem.
+
+        Args:
+            self (Self): solver object.
+            matrix (csc_matrix): reduced matrix of the linear system (see function fixed_value of module electric_auxiliary_functions.py).
+            rhs (np.ndarray): reduced right hand side of the linear system.
+            parameters (np.ndarray): parameters the matrix depends on (electric resistances and electric time step), used to detect when the factorization must be evaluated again.
+            index (np.ndarray): array with the not removed rows and columns of the matrix (output of function fixed_value).
+
+        Returns:
+            np.ndarray: solution of the linear system.
+        """
+        if self.index is None or not np.array_equal(index, self.index):
+            # New structure of the reduced linear system.
+            self.reset()
+            self.index = index.copy()
+            self.__build_ordering(matrix)
+
+        if self.lu is None:
+            self.__factorize(matrix, parameters)
+            return self.__lu_solve(rhs)
+
+        if np.all(
+            np.abs(parameters - self.parameters)
+            <= self.lu_rtol * np.abs(self.parameters)
+        ):
+            # Matrix unchanged within tolerance: reuse the factorization.
+            self.counter["reuses"] += 1
+            return self.__lu_solve(rhs)
+
+        # Krylov solution preconditioned with the stale factorization;
+        # restart is set to the maximum number of iterations to avoid
+        # restarts.
+        self.counter["krylov"] += 1
+        preconditioner = LinearOperator(
+            matrix.shape,
+            matvec=self.__lu_solve,
+            dtype=np.result_type(matrix.dtype, rhs.dtype),
+        )
+        solution, info = gmres(
+            matrix,
+            rhs,
+            x0=self.__lu_solve(rhs),
+            atol=0.0,
+            restart=self.krylov_maxiter,
+            maxiter=1,
+            M=preconditioner,
+            **{KRYLOV_RTOL_KEYWORD: self.krylov_rtol},
+        )
+        if info == 0:
+            return solution
+
+        # Krylov solver did not converge: evaluate again the factorization.
+        self.counter["fallbacks"] += 1
+        self.__factorize(matrix, parameters)
+        return self.__lu_solve(rhs)
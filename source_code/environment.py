@@ -3,7 +3,32 @@ import warnings
 import numpy as np
 import pandas as pd
 from scipy import constants
+from scipy.interpolate import CubicSpline
 from CoolProp.CoolProp import PropsSI
+from CoolProp.HumidAirProp import HAPropsSI
+
+from conductor_flags import ENVIRONMENT_PROPERTIES_COOLPROP, ENVIRONMENT_PROPERTIES_TABLE
+
+# Default values of the optional keys of the transient input that define the
+# table of the environment medium properties (key ENVIRONMENT_TABLE_<NAME>).
+# The table is one dimensional in the film temperature since pressure and
+# relative humidity of the environment are constant.
+ENVIRONMENT_TABLE_DEFAULTS = dict(
+    # Film temperature window (K); if None the window covers outer surface
+    # temperatures from 1 K to the environment temperature + 1000 K.
+    TMIN=None,
+    TMAX=None,
+    # Number of points of the uniformly spaced film temperature grid.
+    NT=400,
+    # Relative tolerance on the interpolated properties: cells of the table
+    # where the interpolation error is larger (e.g. where the medium is not
+    # in gas phase) are evaluated without the table.
+    RTOL=1e-4,
+)
+
+# Maximum number of film temperature distributions stored by the memo of
+# method Environment.eval_prop.
+PROPERTY_MEMO_SIZE = 4
 
 
 class Environment:
@@ -48,6 +73,24 @@ class Environment:
             dynamic_viscosity="viscosity",
             prandtl="Prandtl",
         )
+        # Humid air properties are evaluated only if optional input
+        # Use_humidity is True, at the relative humidity given by optional
+        # input Relative_humidity (see method _eval_humid_air_properties).
+        self.use_humidity = bool(self.inputs.get("Use_humidity", False))
+        self.relative_humidity = self.inputs.get("Relative_humidity", 0.0)
+        # Declare dictionary to decide if evaluate dry or humid properties
+        # according to flag self.use_humidity.
+        self.dict_eval_air_properties = {
+            True: self._eval_humid_air_properties,
+            False: self._eval_dry_air_properties,
+        }
+        # Table of the properties as a function of the film temperature,
+        # built by method set_properties_evaluation if requested in the
+        # transient input.
+        self.property_table = None
+        # Memo of the properties evaluated at the last film temperature
+        # distributions (see method eval_prop).
+        self.property_memo = dict()
 
     # End method __init__.
 
@@ -92,12 +135,13 @@ class Environment:
         film_temperature = (self.inputs["Temperature"] + T_s) / 2.0  # K
         # Evaluate air propreties.
         dict_air_properties = self.eval_prop(film_temperature)
+        # Grashof dimensionless number per unit cube of the characteristic
+        # length, shared by all the surfaces.
+        grashof_unit = self.grashof_number(dict_air_properties, T_s, 1.0)
         # Evaluate Nusselt dimensionless number.
         if conductor.inputs["Is_rectangular"]:
             # Evaluate Grashof dimensionless number for vertical side.
-            grashof_side = self.grashof_number(
-                dict_air_properties, T_s, conductor.inputs["Height"]
-            )
+            grashof_side = grashof_unit * conductor.inputs["Height"] ** 3
             # Evaluate Rayleigh dimensionless number for vertical side.
             rayleigh_side = self.rayleigh_number(
                 grashof_side, dict_air_properties["prandtl"]
@@ -113,9 +157,7 @@ class Environment:
                 / (2 * (conductor.inputs["XLENGHT"] + conductor.inputs["Width"]))
             )
             # Evaluate Grashof dimensionless number lower/upper cold plate.
-            grashof_lu = self.grashof_number(
-                dict_air_properties, T_s, characteristic_length
-            )
+            grashof_lu = grashof_unit * characteristic_length ** 3
             # Evaluate Rayleigh dimensionless number for lower/upper cold plate.
             rayleigh_lu = self.rayleigh_number(
                 grashof_lu, dict_air_properties["prandtl"]
@@ -147,9 +189,7 @@ class Environment:
                 conductor.inputs["external_free_convection_correlation"]
             ]
             # Evaluate Grashof dimensionless numbers.
-            grashof = self.grashof_number(
-                dict_air_properties, T_s, characteristic_length
-            )
+            grashof = grashof_unit * characteristic_length ** 3
             # Evaluate Rayleigh number.
             rayleigh = self.rayleigh_number(grashof, dict_air_properties["prandtl"])
             nusselt = self.dict_nusselt_correlations[
@@ -165,12 +205,141 @@ class Environment:
 
     # End method eval_heat_transfer_coefficient.
 
+    def set_properties_evaluation(self, transient_input):
+        """Method that sets up the evaluation of the environment medium properties according to the transient input. If the tabulated properties are selected (key ENVIRONMENT_PROPERTIES equal to ENVIRONMENT_PROPERTIES_TABLE) the properties are tabulated as a function of the film temperature; the table is defined by the optional keys ENVIRONMENT_TABLE_<NAME> (defaults in ENVIRONMENT_TABLE_DEFAULTS).
+
+        Args:
+            transient_input (dict): transient input.
+        """
+        self.property_memo = dict()
+        self.property_table = None
+        if (
+            transient_input.get("ENVIRONMENT_PROPERTIES", ENVIRONMENT_PROPERTIES_COOLPROP)
+            == ENVIRONMENT_PROPERTIES_TABLE
+        ):
+            self.__build_property_table(
+                {
+                    name: transient_input.get(f"ENVIRONMENT_TABLE_{name}", value)
+                    for name, value in ENVIRONMENT_TABLE_DEFAULTS.items()
+                }
+            )
+
+    # End method set_properties_evaluation.
+
+    def __build_property_table(self, options):
+        """Private method that tabulates the environment medium properties on a uniformly spaced film temperature grid and builds a cubic spline for each property. The accuracy of the interpolation is checked at the center of each cell of the grid: cells where the relative error is larger than the tolerance (or where the properties can not be evaluated) are flagged as not valid and evaluated without the table.
+
+        Args:
+            options (dict): options of the table (see ENVIRONMENT_TABLE_DEFAULTS).
+        """
+        # The film temperature is the average of the environment and of the
+        # outer surface temperatures.
+        if options["TMIN"] is None:
+            options["TMIN"] = (self.inputs["Temperature"] + 1.0) / 2.0
+        if options["TMAX"] is None:
+            options["TMAX"] = self.inputs["Temperature"] + 500.0
+        temperature = np.linspace(options["TMIN"], options["TMAX"], int(options["NT"]))
+        center = (temperature[:-1] + temperature[1:]) / 2.0
+        values = self.dict_eval_air_properties[self.use_humidity](temperature)
+        reference = self.dict_eval_air_properties[self.use_humidity](center)
+        splines = dict()
+        # Mask of the valid cells of the grid (shape (NT-1,)).
+        valid = np.ones(center.shape, dtype=bool)
+        for prop_name, prop_value in values.items():
+            finite = np.isfinite(prop_value)
+            # Points where the properties can not be evaluated are excluded
+            # from the table.
+            valid &= finite[:-1] & finite[1:] & np.isfinite(reference[prop_name])
+            if finite.sum() < 2:
+                valid[:] = False
+                break
+            splines[prop_name] = CubicSpline(temperature[finite], prop_value[finite])
+            with np.errstate(invalid="ignore"):
+                valid &= np.abs(
+                    splines[prop_name](center) - reference[prop_name]
+                ) <= options["RTOL"] * np.abs(reference[prop_name])
+        self.property_table = dict(
+            temperature=temperature, splines=splines, valid=valid
+        )
+
+    # End method __build_property_table.
+
     def eval_prop(self, film_temperature):
         """Function eval_prop evaluates the envirmonment medium (eg. air) properties at the environment pressure and at the film temperature exploiting cool prop library. Properties are: density, thermal conductivity, volumetric thermal expansion coefficient, dynamic viscosity and Prandtl number.
+        Properties are interpolated from the property table if it was built (see method set_properties_evaluation); properties evaluated at the last film temperature distributions are stored in a memo (keyed on the film temperature values and on the relative humidity) and are not evaluated again.
 
         Args:
             film_temperature (np.array): average of the envirmonment medium and outer surface of the jacket temperatures.
 
+        Returns:
+            dict: dictionaty of environment properties.
+        """
+        film_temperature = np.asarray(film_temperature, dtype=float)
+        key = (
+            film_temperature.shape,
+            film_temperature.tobytes(),
+            self.use_humidity and self.relative_humidity,
+        )
+        if key not in self.property_memo:
+            if len(self.property_memo) >= PROPERTY_MEMO_SIZE:
+                # Remove the oldest item (dictionaries preserve the
+                # insertion order).
+                del self.property_memo[next(iter(self.property_memo))]
+            if self.property_table is None:
+                self.property_memo[key] = self.dict_eval_air_properties[
+                    self.use_humidity
+                ](film_temperature)
+            else:
+                self.property_memo[key] = self._interpolate_air_properties(
+                    film_temperature
+                )
+        return self.property_memo[key]
+
+    # End method eval_prop.
+
+    def _interpolate_air_properties(self, film_temperature):
+        """Method that interpolates the environment medium properties from the property table; points that fall outside the table or in a not valid cell are evaluated without the table.
+
+        Args:
+            film_temperature (np.array): film temperature (K).
+
+        Returns:
+            dict: dictionaty of environment properties.
+        """
+        table = self.property_table
+        temperature = table["temperature"]
+        # Cell of the grid that contains each point (-1 or the number of cells
+        # if the point is outside the grid).
+        idx = np.searchsorted(temperature, film_temperature, side="right") - 1
+        # Points on the upper boundary of the grid belong to the last cell.
+        idx[film_temperature == temperature[-1]] = temperature.size - 2
+        inside = (idx >= 0) & (idx < temperature.size - 1)
+        inside[inside] = table["valid"][idx[inside]]
+        dict_air_properties = {
+            prop_name: np.empty(film_temperature.shape)
+            for prop_name in self.fluid_prop_aliases
+        }
+        if inside.any():
+            for prop_name, spline in table["splines"].items():
+                dict_air_properties[prop_name][inside] = spline(
+                    film_temperature[inside]
+                )
+        if not inside.all():
+            outside = ~inside
+            for prop_name, prop_value in self.dict_eval_air_properties[
+                self.use_humidity
+            ](film_temperature[outside]).items():
+                dict_air_properties[prop_name][outside] = prop_value
+        return dict_air_properties
+
+    # End method _interpolate_air_properties.
+
+    def _eval_dry_air_properties(self, temperature):
+        """Method that evaluates the environment medium properties at the environment pressure with function PropsSI of CoolProp.
+
+        Args:
+            temperature (np.array): film temperature (K).
+
         Returns:
             dict: dictionaty of environment properties.
         """
@@ -178,7 +347,7 @@ class Environment:
             prop_name: PropsSI(
                 alias,
                 "T",
-                film_temperature,
+                temperature,
                 "P",
                 self.inputs["Pressure"],
                 self.type,
@@ -186,7 +355,60 @@ class Environment:
             for prop_name, alias in self.fluid_prop_aliases.items()
         }
 
-    # End method eval_air_prop.
+    # End method _eval_dry_air_properties.
+
+    def _eval_humid_air_properties(self, temperature, delta_t=1e-2):
+        """Method that evaluates the humid air properties at the environment pressure and relative humidity with function HAPropsSI of CoolProp. The volumetric thermal expansion coefficient is evaluated from the specific volume by central finite difference; points where HAPropsSI fails (e.g. the water mole fraction is not physical) get inf.
+
+        Args:
+            temperature (np.array): film temperature (K).
+            delta_t (float, optional): temperature step of the finite difference (K). Defaults to 1e-2.
+
+        Returns:
+            dict: dictionaty of environment properties.
+        """
+        def ha_props(alias, temp):
+            # HAPropsSI raises an error if any point fails, hence it is
+            # called point by point.
+            values = np.full(temp.size, np.inf)
+            for ii, tt in enumerate(temp.ravel()):
+                try:
+                    values[ii] = HAPropsSI(
+                        alias,
+                        "T",
+                        tt,
+                        "P",
+                        self.inputs["Pressure"],
+                        "R",
+                        self.relative_humidity,
+                    )
+                except ValueError:
+                    pass
+            return values.reshape(temp.shape)
+
+        temperature = np.asarray(temperature, dtype=float)
+        # Specific volume per unit mass of humid air (m^3/kg).
+        volume = ha_props("Vha", temperature)
+        thermal_conductivity = ha_props("K", temperature)
+        dynamic_viscosity = ha_props("M", temperature)
+        # Points where HAPropsSI fails give inf or nan.
+        with np.errstate(invalid="ignore"):
+            return dict(
+                density=np.where(np.isfinite(volume), 1.0 / volume, np.inf),
+                thermal_conductivity=thermal_conductivity,
+                # betha = 1/v*dv/dT at constant pressure.
+                volumetric_thermal_expansion_coefficient=(
+                    ha_props("Vha", temperature + delta_t)
+                    - ha_props("Vha", temperature - delta_t)
+                )
+                / (2.0 * delta_t * volume),
+                dynamic_viscosity=dynamic_viscosity,
+                prandtl=ha_props("Cha", temperature)
+                * dynamic_viscosity
+                / thermal_conductivity,
+            )
+
+    # End method _eval_humid_air_properties.
 
     def grashof_number(self, dict_air_prop, T_s, characteristic_length):
         """[summary]
@@ -200,12 +422,14 @@ class Environment:
             [type]: [description]
         """
         # Evaluate Grashof dimensionless number:
-        # Gr_L = g*rho^2*betha*(T_s - T_inf)*L^3/mu^2
+        # Gr_L = g*rho^2*betha*|T_s - T_inf|*L^3/mu^2
+        # The absolute value of the temperature difference is used since
+        # the correlations are applied both to hot and cold surfaces.
         return (
             constants.g
             * dict_air_prop["density"] ** 2
             * dict_air_prop["volumetric_thermal_expansion_coefficient"]
-            * (T_s - self.inputs["Temperature"])
+            * np.abs(T_s - self.inputs["Temperature"])
             * characteristic_length ** 3
             * np.reciprocal(dict_air_prop["dynamic_viscosity"] ** 2)
         )
@@ -244,12 +468,10 @@ class Environment:
         self._check_validity_vertical_cylinder(conductor, grashof)
 
         nusselt = np.zeros(rayleigh.shape)
-        nusselt[rayleigh >= 1e4 and rayleigh <= 1e9] = self._vertical_plate_laminar(
-            rayleigh
-        )
-        nusselt[rayleigh >= 1e9 and rayleigh <= 1e13] = self._vertical_plate_turbulent(
-            rayleigh
-        )
+        laminar = (rayleigh >= 1e4) & (rayleigh <= 1e9)
+        nusselt[laminar] = self._vertical_plate_laminar(rayleigh[laminar])
+        turbulent = (rayleigh >= 1e9) & (rayleigh <= 1e13)
+        nusselt[turbulent] = self._vertical_plate_turbulent(rayleigh[turbulent])
         # Evaluate Nusselt dimensionless number.
         return nusselt
 
@@ -296,6 +518,18 @@ class Environment:
         # Check if the correlation for the vertical plate can be applyed also to the case of vertical cylinder.
         self._check_validity_vertical_cylinder(conductor, grashof)
         # Evaluate Nusselt dimensionless number.
+        return self._vertical_plate_churchill_chu_nusselt(rayleigh, prandtl)
+
+    def _vertical_plate_churchill_chu_nusselt(self, rayleigh, prandtl):
+        """Method that evaluates the Nusselt dimensionless number with the Churchill and Chu correlation for the vertical plate, without any validity check (used also on a subset of the nodes by method _vertical_plate_churchill_chu_accurate).
+
+        Args:
+            rayleigh (np.array): Rayleigh dimensionless number.
+            prandtl (np.array): Prandtl dimensionless number.
+
+        Returns:
+            np.array: Nusselt dimensionless number.
+        """
         return (
             0.825
             + 0.387
@@ -341,14 +575,12 @@ class Environment:
         self._check_validity_vertical_cylinder(conductor, grashof)
 
         nusselt = np.zeros(rayleigh.shape)
-        nusselt[rayleigh <= rayleigh_ub] = self._vertical_plate_laminar_accurate(
-            rayleigh[rayleigh <= rayleigh_ub], prandtl[rayleigh <= rayleigh_ub]
+        laminar = rayleigh <= rayleigh_ub
+        nusselt[laminar] = self._vertical_plate_laminar_accurate(
+            rayleigh[laminar], prandtl[laminar], rayleigh_ub
         )
-        nusselt[rayleigh > rayleigh_ub] = self._vertical_plate_churchill_chu(
-            rayleigh[rayleigh > rayleigh_ub],
-            prandtl[rayleigh > rayleigh_ub],
-            grashof[rayleigh > rayleigh_ub],
-            conductor,
+        nusselt[~laminar] = self._vertical_plate_churchill_chu_nusselt(
+            rayleigh[~laminar], prandtl[~laminar]
         )
         return nusselt
 
@@ -381,7 +613,7 @@ class Environment:
         """
         dict_check = {True: self._do_nothing, False: warnings.warn}
         # Print warning message if Rayleigh dimensionless number > 1e12
-        dict_check[rayleigh.max() <= ub](
+        dict_check[bool(np.all(rayleigh <= ub))](
             f"External free convection heat transfer coefficient may be inaccurate since Rayleigh dimensionless number > {ub}."
         )
 
@@ -400,11 +632,13 @@ class Environment:
         # Upper surface of hot plate or lower surface of cold plate (used in the latter way).
         cc = np.zeros(rayleigh.shape)
         nn = np.zeros(rayleigh.shape)
-        cc[rayleigh >= 1e4 and rayleigh <= 1e7 and prandtl >= 0.7] = 0.54
-        cc[rayleigh >= 1e7 and rayleigh <= 1e11] = 0.15
+        laminar = (rayleigh >= 1e4) & (rayleigh <= 1e7) & (prandtl >= 0.7)
+        turbulent = (rayleigh >= 1e7) & (rayleigh <= 1e11)
+        cc[laminar] = 0.54
+        cc[turbulent] = 0.15
 
-        nn[rayleigh >= 1e4 and rayleigh <= 1e7 and prandtl >= 0.7] = 1.0 / 4.0
-        nn[rayleigh >= 1e7 and rayleigh <= 1e11] = 1.0 / 3.0
+        nn[laminar] = 1.0 / 4.0
+        nn[turbulent] = 1.0 / 3.0
 
         return cc * rayleigh ** nn
 
@@ -426,12 +660,14 @@ class Environment:
 
     # End method _horiziontal_upper_surface_cold_plate.
 
-    def _long_horziontal_cylinder_morgan(self, rayleigh, prandtl):
+    def _long_horziontal_cylinder_morgan(self, rayleigh, prandtl, grashof, conductor):
         """[summary]
 
         Args:
             rayleigh ([type]): [description]
             prandtl ([type]): [description]
+            grashof ([type]): [description]
+            conductor ([type]): [description]
 
         Returns:
             [type]: [description]
@@ -440,36 +676,38 @@ class Environment:
         cc = np.zeros(rayleigh.shape)
         nn = np.zeros(rayleigh.shape)
 
-        cc[rayleigh >= 1e-10 and rayleigh <= 1e-2] = 0.675
-        cc[rayleigh >= 1e-2 and rayleigh <= 1e2] = 1.02
-        cc[rayleigh >= 1e2 and rayleigh <= 1e4] = 0.850
-        cc[rayleigh >= 1e4 and rayleigh <= 1e7] = 0.480
-        cc[rayleigh >= 1e7 and rayleigh <= 1e12] = 0.125
-
-        nn[rayleigh >= 1e-10 and rayleigh <= 1e-2] = 0.058
-        nn[rayleigh >= 1e-2 and rayleigh <= 1e2] = 0.148
-        nn[rayleigh >= 1e2 and rayleigh <= 1e4] = 0.188
-        nn[rayleigh >= 1e4 and rayleigh <= 1e7] = 0.250
-        nn[rayleigh >= 1e7 and rayleigh <= 1e12] = 0.333
+        # Ranges of validity of the coefficients (upper bound included).
+        bounds = (1e-10, 1e-2, 1e2, 1e4, 1e7, 1e12)
+        for lb, ub, c_val, n_val in zip(
+            bounds[:-1],
+            bounds[1:],
+            (0.675, 1.02, 0.850, 0.480, 0.125),
+            (0.058, 0.148, 0.188, 0.250, 0.333),
+        ):
+            in_range = (rayleigh >= lb) & (rayleigh <= ub)
+            cc[in_range] = c_val
+            nn[in_range] = n_val
 
         # Evaluate nusselt dimensionless number by Morgan.
         return cc * rayleigh ** nn
 
     def _long_horziontal_cylinder_churchill_chu(
-        self, rayleigh, prandtl, rayleigh_ub=1e12
+        self, rayleigh, prandtl, grashof, conductor, rayleigh_ub=1e12
     ):
         """[summary]
 
         Args:
             rayleigh ([type]): [description]
             prandtl ([type]): [description]
+            grashof ([type]): [description]
+            conductor ([type]): [description]
             rayleigh_ub ([type], optional): [description]. Defaults to 1e12.
 
         Returns:
             [type]: [description]
         """
         # Curchill and Chu correlation Incropera Foundations of heat transfer, sixth edition chapter 9.6.3 pag 581 eq. 9.34.
-        self._check_validity_rayleigh(self, rayleigh, rayleigh_ub)
+        self._check_validity_rayleigh(rayleigh, rayleigh_ub)
         # Evaluate nusselt dimensionless number by Churchill and Chu.
         return (
             0.60
@@ -484,69 +722,3 @@ class Environment:
         pass
 
     # End class Environment
-
-    # -------------------------------------------------------------------------------
-    # old code
-
-    def eval_air_prop(self, film_temperature):
-        """[summary]
-
-        Args:
-            film_temperature ([type]): [description]
-
-        Returns:
-            [type]: [description]
-        """
-        # Declare dictionary to decide if evaluate dry or humid properties according to flag self.inputs["Use_humidity"].
-        dict_eval_air_properties = {
-            True: self._eval_humid_air_properties,
-            False: self._eval_dry_air_properties,
-        }
-
-        # Evaluate air volumetric thermal expansion coefficient, kinematic viscosity and Prandtl number at film temperature.
-        return dict_eval_air_properties[self.inputs["Use_humidity"]](film_temperature)
-
-    # End method eval_air_properties
-
-    def _eval_dry_air_properties(self, temperature):
-        """[summary]
-
-        Args:
-            temperature ([type]): [description]
-
-        Returns:
-            [type]: [description]
-        """
-        # Evaluate dry air thermal conductivity, volumetric thermal expansion coefficient, kinematic viscosity and Prandtl number.
-        return eval_air_properties(
-            temperature,
-            self.inputs["Pressure"],
-            thermal_conductivity=True,
-            volumetric_thermal_expansion_coefficient=True,
-            kinematic_viscosity=True,
-            prandtl=True,
-        )
-
-    # End method dry_air_properties.
-
-    def _eval_humid_air_properties(self, temperature):
-        """[summary]
-
-        Args:
-            temperature ([type]): [description]
-
-        Returns:
-            [type]: [description]
-        """
-        # Evaluate humid air thermal conductivity, volumetric thermal expansion coefficient kinematic viscosity and Prandtl number.
-        return eval_air_properties(
-            temperature,
-            self.inputs["Pressure"],
-            self.ict_input["Relative_humidity"],
-            thermal_conductivity=True,
-            volumetric_thermal_expansion_coefficient=True,
-            kinematic_viscosity=True,
-            prandtl=True,
-        )
-
-    # End method eval_humid_air_properties.
@@ -67,6 +67,10 @@ class FluidComponentInput:
 from channel import Channel
 from coolant import Coolant
 
+# Namedtuple constructors defined at module level to allow pickling of 
+# FluidComponent objects (see class ConductorPool).
+BC_idx = namedtuple("BC_idx",("velocity","pressure","temperature"))
+Flow_dir = namedtuple("Flow_dir",("forward","backward"))
 
 class FluidComponent:
 
@@ -130,10 +134,6 @@ class FluidComponent:
         # pressure and temperaure equations).
         eq_idx = conductor.equation_index[self.identifier]
 
-        # Namedtuple constuctor
-        BC_idx = namedtuple("BC_idx",("velocity","pressure","temperature"))
-        Flow_dir = namedtuple("Flow_dir",("forward","backward"))
-        
         # Build namedtuple with the index used to assign the inlet BC.
         self.inl_idx = BC_idx(
             # Inlet velocity index (forward and backward flow).
@@ -1,5 +1,6 @@
 from pickle import DICT
 from solid_component import SolidComponent
+from time_history import TimeHistory
 import pandas as pd
 import numpy as np
 
@@ -129,17 +130,17 @@ class JacketComponent(SolidComponent):
             # Backward Euler or Crank-Nicolson.
             if conductor.cond_time[-1] == 0:
                 # Initialization.
-                self.radiative_heat_env = np.zeros(
-                    (conductor.grid_features["N_nod"], 2)
+                self.radiative_heat_env = TimeHistory(
+                    2, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
                 if conductor.cond_num_step == 1:
                     # Store the old values only immediately after the initializzation, \
                     # since after that the whole SYSLOD array is saved and there is no \
                     # need to compute twice the same values.
-                    self.radiative_heat_env[:, 1] = self.radiative_heat_env[:, 0].copy()
+                    self.radiative_heat_env.advance()
                 # Update value at the current time step.
-                self.radiative_heat_env[:, 0] = (
+                self.radiative_heat_env[0] = (
                     conductor.dict_interf_peri["env_sol"]["nodal"][key]
                     * conductor.dict_node_pt["HTC"]["env_sol"][key]["rad"]
                     * (
@@ -152,13 +153,14 @@ class JacketComponent(SolidComponent):
             # Adams-Moulton 4.
             if conductor.cond_time[-1] == 0:
                 # Initialization.
-                self.radiative_heat_env = np.zeros(
-                    (conductor.grid_features["N_nod"], 4)
+                self.radiative_heat_env = TimeHistory(
+                    4, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
-                self.radiative_heat_env[:, 1:4] = self.radiative_heat_env[:, 0:3].copy()
+                # Rotate the time levels (no copy).
+                self.radiative_heat_env.advance()
                 # Update value at the current time step.
-                self.radiative_heat_env[:, 0] = (
+                self.radiative_heat_env[0] = (
                     conductor.dict_interf_peri["env_sol"]["nodal"][key]
                     * conductor.dict_node_pt["HTC"]["env_sol"][key]["rad"]
                     * (
@@ -187,19 +189,17 @@ class JacketComponent(SolidComponent):
             # Backward Euler or Crank-Nicolson.
             if conductor.cond_time[-1] == 0:
                 # Initialization.
-                self.radiative_heat_inn[key] = np.zeros(
-                    (conductor.grid_features["N_nod"], 2)
+                self.radiative_heat_inn[key] = TimeHistory(
+                    2, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
                 if conductor.cond_num_step == 1:
                     # Store the old values only immediately after the initializzation, \
                     # since after that the whole SYSLOD array is saved and there is no \
                     # need to compute twice the same values.
-                    self.radiative_heat_inn[key][:, 1] = self.radiative_heat_inn[key][
-                        :, 0
-                    ].copy()
+                    self.radiative_heat_inn[key].advance()
                 # Update value at the current time step.
-                self.radiative_heat_inn[key][:, 0] = (
+                self.radiative_heat_inn[key][0] = (
                     conductor.dict_interf_peri["sol_sol"]["nodal"][key]
                     * conductor.dict_node_pt["HTC"]["sol_sol"]["rad"][key]
                     * (
@@ -212,15 +212,14 @@ class JacketComponent(SolidComponent):
             # Adams-Moulton 4.
             if conductor.cond_time[-1] == 0:
                 # Initialization.
-                self.radiative_heat_inn[key] = np.zeros(
-                    (conductor.grid_features["N_nod"], 4)
+                self.radiative_heat_inn[key] = TimeHistory(
+                    4, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
-                self.radiative_heat_inn[key][:, 1:4] = self.radiative_heat_inn[key][
-                    :, 0:3
-                ].copy()
+                # Rotate the time levels (no copy).
+                self.radiative_heat_inn[key].advance()
                 # Update value at the current time step.
-                self.radiative_heat_inn[key][:, 0] = (
+                self.radiative_heat_inn[key][0] = (
                     conductor.dict_interf_peri["sol_sol"]["nodal"][key]
                     * conductor.dict_node_pt["HTC"]["sol_sol"]["rad"][key]
                     * (
@@ -275,6 +275,94 @@ def rhoecu0_nist(t, rrr):
     return rho  # end of the function
 
 
+# Function properties_cu_nist starts here
+def properties_cu_nist(t, b, rrr, out=None):
+    """Function that evaluates in a single pass density, isobaric specific heat, thermal conductivity and electrical resistivity of copper, sharing the intermediate quantities: the electrical resistivity at zero magnetic field is evaluated once and used both for the electrical resistivity (with the magnetoresistivity effect) and for the thermal conductivity (Wiedemann-Franz scaling). The outcome is the same of functions density_cu, isobaric_specific_heat_cu_nist, thermal_conductivity_cu_nist and electrical_resistivity_cu_nist.
+
+    Args:
+        t (np.ndarray): temperature in K.
+        b (np.ndarray): magnetic field in T.
+        rrr (float): residual resistivity ratio.
+        out (dict, optional): preallocated arrays (same keys of the outcome and same shape of t) where the properties are written. Defaults to None.
+
+    Returns:
+        dict: properties of copper, keys are density (kg/m^3), isobaric_specific_heat (J/kg/K), thermal_conductivity (W/m/K) and electrical_resistivity (Ohm*m).
+    """
+    t, b = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(b, dtype=float))
+    if out is None:
+        out = {
+            key: np.empty(t.shape)
+            for key in (
+                "density",
+                "isobaric_specific_heat",
+                "thermal_conductivity",
+                "electrical_resistivity",
+            )
+        }
+
+    # Density (see function density_cu).
+    out["density"].fill(8900.0)
+
+    # Isobaric specific heat (see function isobaric_specific_heat_cu_nist),
+    # the logarithm is evaluated once.
+    ind = (t >= 4) & (t <= 300)
+    log_t = np.log10(t[ind])
+    out["isobaric_specific_heat"].fill(0.0)
+    out["isobaric_specific_heat"][ind] = 10 ** (
+        -1.91844
+        - 0.15973 * log_t
+        + 8.61013 * log_t**2
+        - 18.996 * log_t**3
+        + 21.9661 * log_t**4
+        - 12.7328 * log_t**5
+        + 3.54322 * log_t**6
+        - 0.3797 * log_t**7
+    )
+
+    # Electrical resistivity at zero magnetic field (see function
+    # rhoecu0_nist), shared by electrical resistivity and thermal
+    # conductivity.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho_zero_field = rhoecu0_nist(t, rrr)
+
+    # Electrical resistivity (see function electrical_resistivity_cu_nist).
+    a = (-2.662, 0.3168, 0.6229, -0.1839, 0.01827)
+    jok = (rrr > 1.0) & (b >= 0) & (t > 0)
+    jokb = jok & (b > 0)
+    log_x = np.log10(rhoecu0_nist(273.0, rrr) / rho_zero_field[jokb] * b[jokb])
+    aaa = np.zeros(log_x.shape)
+    for ij in range(5):
+        aaa = aaa + a[ij] * log_x**ij
+    ccc = np.zeros(t.shape)
+    ccc[jokb] = 10**aaa
+    rho = out["electrical_resistivity"]
+    rho.fill(0.0)
+    rho[jok] = rho_zero_field[jok] * (1.0 + ccc[jok])
+
+    # Thermal conductivity (see function thermal_conductivity_cu_nist).
+    beta = 0.634 / rrr
+    betat = beta / 0.0003
+
+    P1 = 1.754e-8
+    P2 = 2.763
+    P3 = 1102
+    P4 = -0.165
+    P5 = 70
+    P6 = 1.756
+    P7 = 0.838 / (betat**0.1661)
+
+    W0 = beta / t
+    Wi = (P1 * t**P2) / (1 + (P1 * P3 * t ** (P2 + P4) * np.exp(-((P5 / t) ** P6))))
+    Wi0 = P7 * Wi * W0 / (Wi + W0)
+    np.divide(
+        1.0 / (Wi + W0 + Wi0) * rho_zero_field,
+        rho,
+        out=out["thermal_conductivity"],
+    )
+
+    return out
+
+
 # Function rho_cu starts here
 def density_cu(temperature: np.ndarray) -> np.ndarray:
     """
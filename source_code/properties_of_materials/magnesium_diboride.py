@@ -1,8 +1,9 @@
 # Import python libraries and other functions
 import numpy as np
-from scipy import optimize
 import warnings
 
+from utility_functions.auxiliary_functions import bracketed_root
+
 # Is the same function in module copper.py: at the time being mgb2 thermal 
 # conductivity is assumed to be the same of copper with RRR = 100
 def thermal_conductivity_mgb2(t, b, rrr=100):
@@ -188,6 +189,24 @@ def critical_magnetic_field_mgb2(temp, Bc20, Tc0):
 # End function critical_magnetic_field
 
 
+def critical_temperature_mgb2(magnetic_field, Bc20, Tc0):
+    """Function that evaluates the critical temperature of magnesium diboride at the given magnetic field, inverting function critical_magnetic_field_mgb2.
+
+    Args:
+        magnetic_field (numpy array of float): magnetic field in T
+        Bc20 (float): maximum critical magnetic field at 0 K in T
+        Tc0 (float): maximum critical temperature at 0 T in K
+
+    Returns:
+        numpy array of float: critical temperature in K
+    """
+    alpha = 1.2
+    return Tc0 * (1.0 - magnetic_field / Bc20) ** (1.0 / alpha)
+
+
+# End function critical_temperature_mgb2
+
+
 def critical_current_density_mgb2(
     temp,
     magnetic_field,
@@ -308,41 +327,30 @@ def current_sharing_temperature_mgb2(
         return Tc0 * np.ones_like(magnetic_field)
 
     magnetic_field[op_ind_0] = np.maximum(magnetic_field[op_ind_0], 0.01)
-    temp_ub = Tc0
 
     # Convert boolean array to an array of index.
     ind = np.nonzero(op_ind_0 == True)[0]
-    for ii in range(ind.size):
-
-        ex_args = (magnetic_field[ii], Bc20, C0, Tc0, op_current_density[ii])
-        # Evaluate current sharing temperature with bisection method.
-        curr_shar_temp[ind[ii]] = optimize.bisect(
-            _critical_current_density_residual,
-            temp_lb,
-            temp_ub,
-            ex_args,
-            xtol=1e-5,
-            maxiter=10,
-            disp=False
+    # The critical current density is 0 at the critical temperature at the 
+    # given magnetic field, used as upper bound of the bracket.
+    temp_ub = critical_temperature_mgb2(magnetic_field[ind], Bc20, Tc0)
+
+    def critical_current_density_residual(temp, index):
+        return _critical_current_density_residual(
+            temp,
+            magnetic_field[ind[index]],
+            Bc20,
+            C0,
+            Tc0,
+            op_current_density[ind[index]],
         )
-    # End for ii.
-
-    ex_args = (magnetic_field, Bc20, C0, Tc0, op_current_density)
-
-    # Evaluate current sharing temperature with secant method (working!)
-    # curr_shar_temp = optimize.newton(
-    #     _critical_current_density_residual,
-    #     curr_shar_temp,
-    #     args = ex_args,
-    #     full_output = True,
-    # )
-
-    # Evaluate current sharing temperature with Newthon-Rampson method
-    curr_shar_temp = optimize.newton(
-        _critical_current_density_residual,
-        curr_shar_temp,
-        args=ex_args,
-        fprime=_d_critical_current_density,
+
+    # Evaluate current sharing temperature with a bracketed root finder, for 
+    # all the index at once.
+    curr_shar_temp[ind] = bracketed_root(
+        critical_current_density_residual,
+        np.full(ind.shape, temp_lb),
+        temp_ub,
+        xtol=1e-5,
     )
 
     return curr_shar_temp
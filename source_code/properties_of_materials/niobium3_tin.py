@@ -1,8 +1,9 @@
 # Importing python libraries and other funcions
 import numpy as np
-from scipy import optimize
 import warnings
 
+from utility_functions.auxiliary_functions import bracketed_root
+
 # Function BCNBSN starts here
 def BCNBSN(T, EPSLON, TC0M, BC20M):
 
@@ -517,7 +518,7 @@ def current_sharing_temperature_nb3sn(B, EPSLON, JOP, TC0M, BC20M, C):
     #   C0        x            normalization constant             A T/m**2
     #   TCSNSN      x          current sharing temperature           K
     #
-    # Other functions called: JCNBSN
+    # Other functions called: JCNBSN, bracketed_root
     #
     # Author : L.Bottura @ CERN
     # Version: 2  2.4.2008
@@ -526,11 +527,6 @@ def current_sharing_temperature_nb3sn(B, EPSLON, JOP, TC0M, BC20M, C):
     ######################################################################
     """
 
-    def critical_current_density_bisection_nb3sn(TT, BB, EPSLON, JOP, TC0M, BC20M, C):
-        return (
-            critical_current_density_nb3sn([TT], [BB], [EPSLON], TC0M, BC20M, C) - JOP
-        )
-
     # ppp = 0.56
     # qqq = 1.75
     # ppp = 0.63
@@ -578,48 +574,39 @@ def current_sharing_temperature_nb3sn(B, EPSLON, JOP, TC0M, BC20M, C):
     if JC_ind.size == 0:
         return TCS
 
-    # Get index for which JOP[JC_ind] is 0.0 (use <= 0.0 to be sure to get the 
-    # correct index sice JOP is always >= 0.0).
-    ind_0 = np.nonzero(JOP[JC_ind] <= 0)[0]
-    # Check how many zero values there are.
-    if ind_0.size == JC_ind.size:
-        # All values are equal to 0.0 A/m^2: the current sharing temperature is 
-        # equal to the critical temperature at the given magnetic field and 
-        # strain by definition.
-        return critical_temperature_nb3sn(B[ind_0], EPSLON[ind_0], TC0M, BC20M)
-    else:
-        # Not all values are equal to 0.0 A/m^2.
-        # Get index for which JOP[JC_ind] is > 0.0 A/m^2.
-        ind_not_0 = np.nonzero(JOP[JC_ind])[0]
-
-        # Evalutate critical temperature at the given magnetic field and 
-        # strain.
-        T_upper = critical_temperature_nb3sn(B[JC_ind], EPSLON[JC_ind], TC0M, BC20M)
-
-        # Set the current sharing temperature to the critical temperature for 
-        # all the index in which JOP[JC_ind] = 0.0 A/m^2 (by definition).
-        TCS[JC_ind[ind_0]] = T_upper[JC_ind[ind_0]]
-        
-        # FIND CURRENT SHARING TEMPERATURE WITH BISECTION
-
-        # Loop to evaluate the current sharing temperature for all the index in 
-        # which JOP[JC_ind] > 0.0 A/m^2.
-        for ii, vv in enumerate(JC_ind[ind_not_0]):
-            
-            T_lower = np.array([3.5])
-
-            ex_args = (B[vv], EPSLON[vv], JOP[vv], TC0M, BC20M, C)
-            # Evaluate current sharing temperature with bisection method.
-            TCS[vv] = optimize.bisect(
-                critical_current_density_bisection_nb3sn,
-                T_lower,
-                T_upper[ii],
-                ex_args,
-                xtol=1e-5,
+    # Evalutate critical temperature at the given magnetic field and strain: 
+    # it is the current sharing temperature for all the index in which 
+    # JOP[JC_ind] = 0.0 A/m^2 (by definition) and the upper bound of the 
+    # bracket of the current sharing temperature elsewhere.
+    T_upper = critical_temperature_nb3sn(B[JC_ind], EPSLON[JC_ind], TC0M, BC20M)
+    TCS[JC_ind] = T_upper
+
+    # Get index for which JOP[JC_ind] is > 0.0 A/m^2.
+    ind_not_0 = np.nonzero(JOP[JC_ind] > 0.0)[0]
+    if ind_not_0.size == 0:
+        return TCS
+    vv = JC_ind[ind_not_0]
+
+    def critical_current_density_residual_nb3sn(TT, index):
+        return (
+            critical_current_density_nb3sn(
+                TT, B[vv[index]], EPSLON[vv[index]], TC0M, BC20M, C
             )
-        # End for ii.
+            - JOP[vv[index]]
+        )
+
+    # FIND CURRENT SHARING TEMPERATURE WITH A BRACKETED ROOT FINDER
+
+    # The current sharing temperature is evaluated for all the index in which 
+    # JOP[JC_ind] > 0.0 A/m^2 at once.
+    TCS[vv] = bracketed_root(
+        critical_current_density_residual_nb3sn,
+        np.full(vv.shape, 3.5),
+        T_upper[ind_not_0],
+        xtol=1e-5,
+    )
 
-        return TCS  # end of the function
+    return TCS  # end of the function
 
 
 # Function rho_Nb3Sn starts here
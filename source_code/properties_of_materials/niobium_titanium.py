@@ -1,9 +1,10 @@
 # Importing python libraries and other funcions
 import numpy as np
 import pandas as pd
-from scipy import optimize
 import warnings
 
+from utility_functions.auxiliary_functions import bracketed_root
+
 
 # Function CONDNBTI starts here
 def thermal_conductivity_nbti(TT):
@@ -424,15 +425,14 @@ def current_sharing_temperature_nbti(
 
     magnetic_field[op_ind_0] = np.maximum(magnetic_field[op_ind_0], 0.01)
     temp_ub = critical_temp[op_ind_0]
-    root_result_obj = list()
 
     # Convert boolean array to an array of index.
     ind = np.nonzero(op_ind_0 == True)[0]
-    for ii in range(ind.size):
 
-        ex_args = (
-            magnetic_field[ind[ii]],
-            op_current_density[ind[ii]],
+    def critical_current_density_residual_nbti(temperature, index):
+        critical_current_density = critical_current_density_nbti(
+            temperature,
+            magnetic_field[ind[index]],
             B_c20,
             C_0,
             T_c0,
@@ -440,19 +440,23 @@ def current_sharing_temperature_nbti(
             beta,
             gamma,
             delta,
-            nn,
+            nn=nn,
         )
-        # Evaluate current sharing temperature with bisection method.
-        curr_shar_temp[ind[ii]], rr_obj = optimize.bisect(
-            critical_current_density_bisection_nbti,
-            temp_lb,
-            temp_ub[ii],
-            ex_args,
-            xtol=1e-5,
-            full_output=True,
+        # The scaling is not defined above the critical surface (e.g. at the 
+        # critical temperature because of round off), where the critical 
+        # current density is 0.
+        return op_current_density[ind[index]] - np.where(
+            np.isnan(critical_current_density), 0.0, critical_current_density
         )
-        root_result_obj.append(rr_obj)
-    # End for ii.
+
+    # Evaluate current sharing temperature with a bracketed root finder, for 
+    # all the index at once.
+    curr_shar_temp[ind] = bracketed_root(
+        critical_current_density_residual_nbti,
+        np.full(ind.shape, temp_lb),
+        temp_ub,
+        xtol=1e-5,
+    )
 
     return curr_shar_temp
 
@@ -1,6 +1,7 @@
 # Importing python libraries and other funcions
 import numpy as np
-from scipy import optimize
+
+from utility_functions.auxiliary_functions import bracketed_root
 
 # Function BCRE123 starts here
 def critical_magnetic_field_re123(T, TC0M, BC20M, alpha):
@@ -332,7 +333,7 @@ def current_sharing_temperature_re123(B, JOP, TC0M, BC20M, c0):
     #   c0    x    normalization constant     A T/m**2
     #   TCSRe123    x      current sharing temperature       K
     #
-    # Other functions called: TcsRe123
+    # Other functions called: JcRe123, bracketed_root
     #
     # Author : R.Bonifetto @ Politecnico di Torino
     # Version: 1  28.6.2017
@@ -346,9 +347,6 @@ def current_sharing_temperature_re123(B, JOP, TC0M, BC20M, c0):
     ##############################################################################
     """
 
-    def critical_current_density_bisection_re123(TT, BB, JOP, TC0M, BC20M, C):
-        return critical_current_density_re123([TT], [BB], TC0M, BC20M, C) - JOP
-
     # ppp = 5.875e-1
     # qqq = 1.7
     BLOW = 0.01
@@ -384,29 +382,27 @@ def current_sharing_temperature_re123(B, JOP, TC0M, BC20M, c0):
     )
     # *CHECK THAT JOP IS BELOW THE UPPER CRITICAL VALUE
     # Find element index such that JOP < JC[Bstar_ind] (cdp, 06/2020)
-    ind = np.nonzero(JOP < JC[Bstar_ind])[0]  # this is a numpy array (cdp, 06/2020)
+    ind = np.nonzero(JOP[Bstar_ind] < JC[Bstar_ind])[0]  # this is a numpy array (cdp, 06/2020)
     JC_ind = Bstar_ind[ind]  # this is an array (cdp, 06/2020)
     if JC_ind.size == 0:
         return TCSRE123
 
-    # FIND CURRENT SHARING TEMPERATURE WITH BISECTION
-
-    for _, vv in enumerate(JC_ind):
+    # FIND CURRENT SHARING TEMPERATURE WITH A BRACKETED ROOT FINDER
 
-        T_lower = np.array([0])
-        # T_upper = np.array([40.0])
-        T_upper = np.array([TC0M])
-
-        ex_args = (B[vv], JOP[vv], TC0M, BC20M, c0)
-        # Evaluate current sharing temperature with bisection method.
-        TCSRE123[vv] = optimize.bisect(
-            critical_current_density_bisection_re123,
-            T_lower,
-            T_upper,
-            ex_args,
-            xtol=1e-5,
+    def critical_current_density_residual_re123(TT, index):
+        return (
+            critical_current_density_re123(TT, B[JC_ind[index]], TC0M, BC20M, c0)
+            - JOP[JC_ind[index]]
         )
-    # End for ii.
+
+    # The current sharing temperature is evaluated for all the index at once, 
+    # in the bracket [0, TC0M].
+    TCSRE123[JC_ind] = bracketed_root(
+        critical_current_density_residual_re123,
+        np.zeros(JC_ind.shape),
+        np.full(JC_ind.shape, TC0M),
+        xtol=1e-5,
+    )
 
     return TCSRE123
 
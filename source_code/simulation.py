@@ -1,4 +1,5 @@
 from decimal import Decimal
+import logging
 from openpyxl import load_workbook
 import numpy as np
 import pandas as pd
@@ -12,7 +13,24 @@ from pstats import SortKey
 from line_profiler import LineProfiler
 
 from conductor import Conductor
-from conductor_flags import IOP_NOT_DEFINED
+from conductor_flags import (
+    IOP_NOT_DEFINED,
+    IADAPTIME_ERROR_CONTROL,
+    COOLANT_PROPERTIES_COOLPROP,
+    COOLANT_PROPERTIES_TABLE,
+    GAUSS_PROPERTIES_EVALUATION,
+    CRITICAL_SURFACE_ANALYTIC,
+    CRITICAL_SURFACE_TABLE,
+    ELECTRIC_LINEAR_SOLVER_SPSOLVE,
+    ELECTRIC_LINEAR_SOLVER_CACHED_LU,
+)
+from conductor_pool import ConductorPool
+from coolant_property_table import CoolantPropertyTable
+from critical_surface_table import TABLE_DEFAULTS as CRITICAL_SURFACE_DEFAULTS
+from electric_linear_solver import (
+    ElectricLinearSolver,
+    SOLVER_DEFAULTS as ELECTRIC_SOLVER_DEFAULTS,
+)
 from environment import Environment
 from utility_functions.auxiliary_functions import (
     check_repeated_headings,
@@ -20,7 +38,12 @@ from utility_functions.auxiliary_functions import (
     with_read_csv,
     with_read_excel,
 )
-from utility_functions.transient_solution_functions import get_time_step, step
+from utility_functions.transient_solution_functions import (
+    get_time_step,
+    step,
+    eval_local_error,
+    eval_error_controlled_time_step,
+)
 from utility_functions.output import (
     save_simulation_space,
     reorganize_spatial_distribution,
@@ -34,6 +57,9 @@ from utility_functions.plots import (
     update_real_time_plots,
 )
 
+# Get the logger specified in the file
+simulationlogger = logging.getLogger("opensc2Logger.simulation")
+
 
 class Simulation:
 
@@ -196,7 +222,112 @@ class Simulation:
 
     # end method Conductor_instance
 
+    def __set_coolant_properties_evaluation(self):
+        """Private method that sets up the evaluation of the coolant properties of each channel according to the transient input.
+        If the tabulated properties are selected (key COOLANT_PROPERTIES equal to COOLANT_PROPERTIES_TABLE) the property table is assigned to the coolant; tables are built only once for each kind of coolant and are shared by all the channels of all the conductors.
+        The relative tolerance of the incremental update of the properties is read from key COOLANT_PROPERTIES_RTOL (default 0, i.e. properties are evaluated in all the points at each time step).
+        The evaluation of the properties in Gauss points is selected with key COOLANT_GAUSS_PROPERTIES (default GAUSS_PROPERTIES_EVALUATION) and key COOLANT_GAUSS_RTOL (see method Coolant._interpolate_gauss_properties).
+        The evaluation of the environment medium properties is set up by method Environment.set_properties_evaluation.
+        """
+        # Collection of the property tables, the key is the coolant type.
+        self.coolant_property_tables = dict()
+        tabulated = (
+            self.transient_input.get(
+                "COOLANT_PROPERTIES", COOLANT_PROPERTIES_COOLPROP
+            )
+            == COOLANT_PROPERTIES_TABLE
+        )
+        for conductor in self.list_of_Conductors:
+            for fluid_comp in conductor.inventory["FluidComponent"].collection:
+                coolant = fluid_comp.coolant
+                coolant.property_rtol = self.transient_input.get(
+                    "COOLANT_PROPERTIES_RTOL", 0.0
+                )
+                coolant.gauss_properties = self.transient_input.get(
+                    "COOLANT_GAUSS_PROPERTIES", GAUSS_PROPERTIES_EVALUATION
+                )
+                coolant.gauss_property_rtol = self.transient_input.get(
+                    "COOLANT_GAUSS_RTOL", coolant.gauss_property_rtol
+                )
+                if not tabulated:
+                    continue
+                if coolant.type not in self.coolant_property_tables:
+                    self.coolant_property_tables[coolant.type] = (
+                        CoolantPropertyTable(
+                            coolant.type,
+                            self.fluid_prop_aliases,
+                            self.transient_input,
+                        )
+                    )
+                coolant.property_table = self.coolant_property_tables[coolant.type]
+        # Environment medium properties (key ENVIRONMENT_PROPERTIES).
+        self.environment.set_properties_evaluation(self.transient_input)
+
+    def __set_critical_surface_evaluation(self):
+        """Private method that sets up the evaluation of the critical surface of the superconducting strands according to the transient input.
+        If the tabulated critical surface is selected (key CRITICAL_SURFACE equal to CRITICAL_SURFACE_TABLE) the options of the tables are assigned to each strand with a superconducting material; the table (class CriticalSurfaceTable) is built at the first evaluation of the critical properties, sized on the magnetic field and on the strain at the initialization or on the magnetic field envelope given by the user (keys CRITICAL_SURFACE_TABLE_BMIN and CRITICAL_SURFACE_TABLE_BMAX, to be used when the magnetic field changes in time, e.g. ramps from 0 T). Options are read from keys CRITICAL_SURFACE_TABLE_<NAME> (see TABLE_DEFAULTS in module critical_surface_table).
+        """
+        if (
+            self.transient_input.get("CRITICAL_SURFACE", CRITICAL_SURFACE_ANALYTIC)
+            != CRITICAL_SURFACE_TABLE
+        ):
+            return
+        options = {
+            name: self.transient_input.get(f"CRITICAL_SURFACE_TABLE_{name}", value)
+            for name, value in CRITICAL_SURFACE_DEFAULTS.items()
+        }
+        for conductor in self.list_of_Conductors:
+            for strand in conductor.inventory["StrandComponent"].collection:
+                if strand.name != conductor.inventory["StrandStabilizerComponent"].name:
+                    strand.critical_surface_options = dict(options)
+
+    def __set_current_sharing_evaluation(self):
+        """Private method that sets the threshold of the ratio between current and critical current above which the not linear current divider of the strands is solved (key CURRENT_SHARING_THRESHOLD of the transient input, default 0, i.e. the current divider is solved in all the nodes with current); below the threshold the first order expansion of the current divider is used (see method StrandMixedComponent.solve_current_divider).
+        """
+        threshold = self.transient_input.get("CURRENT_SHARING_THRESHOLD", 0.0)
+        for conductor in self.list_of_Conductors:
+            for strand in conductor.inventory["StrandComponent"].collection:
+                strand.current_sharing_threshold = threshold
+
+    def __set_inductance_evaluation(self):
+        """Private method that sets the number of edges of the square blocks in which the analytical mutual inductances are evaluated (key INDUCTANCE_BLOCK_SIZE of the transient input, default Conductor.inductance_block_size); larger blocks are faster but use more memory (see method Conductor.__mutual_inductance).
+        """
+        block_size = int(
+            self.transient_input.get(
+                "INDUCTANCE_BLOCK_SIZE", Conductor.inductance_block_size
+            )
+        )
+        if block_size < 1:
+            raise ValueError(
+                f"Key INDUCTANCE_BLOCK_SIZE of the transient input must be a positive integer; current value is {block_size}.\n"
+            )
+        for conductor in self.list_of_Conductors:
+            conductor.inductance_block_size = block_size
+
+    def __set_electric_solver(self):
+        """Private method that sets up the solver of the linear system of the transient electric problem according to the transient input.
+        If the cached LU factorization is selected (key ELECTRIC_LINEAR_SOLVER equal to ELECTRIC_LINEAR_SOLVER_CACHED_LU) an instance of class ElectricLinearSolver is assigned to each conductor, with options read from keys ELECTRIC_<NAME> (see SOLVER_DEFAULTS in module electric_linear_solver); otherwise function spsolve is used.
+        """
+        if (
+            self.transient_input.get(
+                "ELECTRIC_LINEAR_SOLVER", ELECTRIC_LINEAR_SOLVER_SPSOLVE
+            )
+            != ELECTRIC_LINEAR_SOLVER_CACHED_LU
+        ):
+            return
+        options = {
+            name.lower(): self.transient_input.get(f"ELECTRIC_{name}", value)
+            for name, value in ELECTRIC_SOLVER_DEFAULTS.items()
+        }
+        for conductor in self.list_of_Conductors:
+            conductor.electric_solver = ElectricLinearSolver(**options)
+
     def conductor_initialization(self, gui):
+        self.__set_coolant_properties_evaluation()
+        self.__set_critical_surface_evaluation()
+        self.__set_current_sharing_evaluation()
+        self.__set_inductance_evaluation()
+        self.__set_electric_solver()
         for cond in self.list_of_Conductors:
             # ** INITIALIZATION **
             # s time @ which simulation is started (cdp, 07/2020)
@@ -337,6 +468,14 @@ class Simulation:
                 abs(self.n_digit_time),
             )
         # end for ii (cdp, 10/2020)
+        # Uncoupled conductors are solved concurrently in worker processes if 
+        # the user asks for more than one process (key N_PROCESSES of the 
+        # transient input); else they are solved sequentially.
+        n_processes = self.transient_input.get("N_PROCESSES", 1)
+        if n_processes > 1 and self.numObj > 1 and self.__uncoupled_conductors():
+            pool = ConductorPool(self, n_processes)
+        else:
+            pool = None
         # while loop to solve transient at each timestep (cdp, 07/2020)
         while (
             self.simulation_time[-1]
@@ -344,22 +483,14 @@ class Simulation:
             and stoptime == 0
         ):
             self.num_step = self.num_step + 1
-            time_step = np.zeros(self.numObj)
-            for ii, conductor in enumerate(self.list_of_Conductors):
-                # Call function Get_time_step to select new time step (cdp, 08/2020)
-                get_time_step(conductor, self.transient_input, self.num_step)
-                time_step[ii] = conductor.time_step
-                # Increase time (cdp, 08/2020)
-                conductor.cond_time.append(
-                    conductor.cond_time[-1] + conductor.time_step
-                )
-                # update time step (cdp, 08/2020)
-                conductor.cond_num_step = conductor.cond_num_step + 1
-                # before calling Conductor method initialization adapt mesh if \
-                # necessary as foreseen by ITYMSH. To do later (cdp, 07/2020)
-                # se ho nuova griglia calcolare coefficenti, temperature, pressioni, \
-                # parametri adimensionati sfruttando np.interp (in fortrand è adaptm)
-            # End for conductor (cdp, 08/2020)
+            if pool is None:
+                time_step = np.zeros(self.numObj)
+                for ii, conductor in enumerate(self.list_of_Conductors):
+                    time_step[ii] = self.advance_conductor_time(conductor)
+                # End for conductor (cdp, 08/2020)
+            else:
+                # Time step of all the conductors, evaluated by the workers.
+                time_step = pool.advance_time(self.num_step)
             # Evaluate simulation time and simulation time step (cdp, 08/2020)
             self.simulation_time_step = np.max(time_step)
             self.simulation_time.append(
@@ -368,120 +499,280 @@ class Simulation:
             print(
                 f"Simulation time: {self.simulation_time[-1]:.{self.n_digit_time}f} s; {self.simulation_time[-1]/self.transient_input['TEND']*100:5.2f} %"
             )
-            for conductor in self.list_of_Conductors:
-                
-                # Use electric method only if needed, i.e., user specifies a 
-                # current.
-                if conductor.inputs["I0_OP_MODE"] != IOP_NOT_DEFINED:
-                    # Call to electric_electric method allows to define, 
-                    # initialize, solve and reorganize the electric problem.
-                    conductor.electric_method()
-                else:
-                    # Quick fix to the following silent bug: solid components 
-                    # thermophysical, electromagnetic and critical properties 
-                    # do not update at each time step if flag 
-                    # conductor.inputs ["I0_OP_MODE"] == IOP_NOT_DEFINED. 
-                    # This will not cause the simulation to stop, but will give 
-                    # reasonable but wrong output. Since all solid component 
-                    # properties are updated in method operating_conditions_em 
-                    # of class Conductor, a quick fix is to explicitly call 
-                    # this method when flag 
-                    # conductor.inputs["I0_OP_MODE"] == IOP_NOT_DEFINED and let 
-                    # method electric_method of class Conductor call it in all 
-                    # the other cases.
-                    # A better fix involves a complete refactoring of at least 
-                    # methods operating_conditions_th and 
-                    # operating_conditions_em of class Conductor and should be 
-                    # done later.
-                    conductor.operating_conditions_em()
-                    
-                # Evaluate thermal hydraulic properties and quantities in Gauss 
-                # points, method __eval_Gauss_point_th is invoked inside method 
-                # operating_conditions_th. Method operating_conditions_th is 
-                # called at each time step before function step because the 
-                # method for the integration in time is implicit.
-                conductor.operating_conditions_th(self)
-                
-                conductor.build_heat_source(self)
-                # call step to solve the problem @ new timestep (cdp, 07/2020)
-                step(
-                    conductor,
-                    self.environment,
-                    self.dict_qsource[conductor.identifier],
-                    self.num_step,
+            if pool is None:
+                for ii, conductor in enumerate(self.list_of_Conductors):
+                    time_step[ii] = self.advance_conductor_solution(conductor)
+                # End for conductor (cdp, 07/2020)
+            else:
+                # Synchronize the workers at the simulation time level.
+                time_step = pool.advance_solution(
+                    self.num_step, self.simulation_time[-1]
                 )
-                # Loop on FluidComponent (cdp, 10/2020)
-                for fluid_comp in conductor.inventory["FluidComponent"].collection:
-                    # compute density and mass flow rate in nodal points with the
-                    # updated FluidComponent temperature and velocity (nodal = True by default)
-                    fluid_comp.coolant._compute_density_and_mass_flow_rates_nodal_gauss(
-                        conductor
-                    )
-                    # Enthalpy balance: sum((mdot*w)_out - (mdot*w)_inl), used to check \
-                    # the imposition of SolidComponent temperature initial spatial \
-                    # distribution (cdp, 12/2020)
-                    conductor.enthalpy_balance = (
-                        conductor.enthalpy_balance
-                        + conductor.time_step
-                        * (
-                            fluid_comp.coolant.dict_node_pt["mass_flow_rate"][-1]
-                            * fluid_comp.coolant.dict_node_pt["total_enthalpy"][-1]
-                            - fluid_comp.coolant.dict_node_pt["mass_flow_rate"][0]
-                            * fluid_comp.coolant.dict_node_pt["total_enthalpy"][0]
-                        )
-                    )
-                    conductor.enthalpy_out = (
-                        conductor.enthalpy_out
-                        + conductor.time_step
-                        * fluid_comp.coolant.dict_node_pt["mass_flow_rate"][-1]
-                        * fluid_comp.coolant.dict_node_pt["total_enthalpy"][-1]
+            # The time step can be reduced by the error controlled time step 
+            # selection (IADAPTIME = IADAPTIME_ERROR_CONTROL): update the 
+            # simulation time step and time.
+            self.simulation_time_step = np.max(time_step)
+            self.simulation_time[-1] = (
+                self.simulation_time[-2] + self.simulation_time_step
+            )
+
+            if self.num_step == num_step_store * count_store:
+                # Update counter to store the state of the simulation, still to come \
+                # (cdp, 08/2020)
+                count_store = count_store + 1
+        # end while (cdp, 07/2020)
+        if pool is not None:
+            # Get back the state of the conductors from the workers, needed 
+            # for the post processing.
+            self.list_of_Conductors = pool.close()
+        for conductor in self.list_of_Conductors:
+            for fluid_comp in conductor.inventory["FluidComponent"].collection:
+                counter = fluid_comp.coolant.property_update_counter
+                if fluid_comp.coolant.property_rtol > 0.0:
+                    simulationlogger.info(
+                        f"{conductor.identifier}, {fluid_comp.identifier}: coolant properties recomputed in {counter['recomputed']} points, skipped in {counter['skipped']} points.\n"
                     )
-                    conductor.enthalpy_inl = (
-                        conductor.enthalpy_inl
-                        + conductor.time_step
-                        * fluid_comp.coolant.dict_node_pt["mass_flow_rate"][0]
-                        * fluid_comp.coolant.dict_node_pt["total_enthalpy"][0]
+            for strand in conductor.inventory["StrandComponent"].collection:
+                if strand.critical_surface_table is not None:
+                    simulationlogger.info(
+                        f"{conductor.identifier}, {strand.identifier}: {strand.critical_surface_table.report()}.\n"
                     )
-                # end for fluid_comp (cdp, 10/2020)
-
-                # Compute radiative heat exchanged between jackets.
-                conductor.compute_radiative_heat_exhange_jk()
-                # Compute radiative heat exchanged outer jacket and environment.
-                conductor.compute_heat_exchange_jk_env(self.environment)
-
-                update_real_time_plots(conductor)
-
-                if self.num_step == num_step_store * count_store:
-                    # Update counter to store the state of the simulation, still to come \
-                    # (cdp, 08/2020)
-                    count_store = count_store + 1
-                if (
-                    conductor.i_save < len(conductor.Space_save) - 1
-                    and abs(
-                        conductor.cond_time[-1] - conductor.Space_save[conductor.i_save]
+                counter = strand.current_sharing_counter
+                if counter is not None:
+                    simulationlogger.info(
+                        f"{conductor.identifier}, {strand.identifier}: current divider solved in {counter['active']} of {counter['total']} nodes over {counter['calls']} solutions (maximum active set {counter['max_active']} nodes).\n"
                     )
-                    < conductor.time_step / 2.0
-                ):
-                    # save simulation spatial distribution at user defined time steps \
-                    # (cdp, 08/2020)
-                    save_simulation_space(
-                        conductor,
-                        self.dict_path[
-                            f"Output_Spatial_distribution_{conductor.identifier}_dir"
-                        ],
-                        abs(self.n_digit_time),
+                    # Size of the active set at each time step.
+                    pd.DataFrame(
+                        counter["history"],
+                        columns=["time (s)", "active_set (-)"],
+                    ).to_csv(
+                        os.path.join(
+                            self.dict_path[
+                                f"Output_Solution_{conductor.identifier}_dir"
+                            ],
+                            f"{strand.identifier}_current_sharing_active_set.tsv",
+                        ),
+                        sep="\t",
+                        index=False,
                     )
-                # end if isave
-                # Save variables time evolution at given spatial coordinates \
-                # (cdp, 08/2020)
-                save_simulation_time(self, conductor)
-                # call sensor to plot results at any time the user asks (cdp, 07/2020)
-            # End for conductor (cdp, 07/2020)
-        # end while (cdp, 07/2020)
+            if conductor.electric_solver is not None:
+                simulationlogger.info(
+                    f"{conductor.identifier}: {conductor.electric_solver}.\n"
+                )
         print("End simulation called " + self.transient_input["SIMULATION"] + "\n")
 
     # end method Conductor_solution (cdp, 09/2020)
 
+    def __uncoupled_conductors(self)->bool:
+        """Private method that checks if there is no thermal contact between the conductors, according to sheet CONDUCTOR_coupling of the input file conductor_definition.xlsx.
+
+        Returns:
+            bool: True if the conductors are not coupled, False otherwise.
+        """
+        contact = self.contactBetweenConductors.to_numpy()
+        # Only the off diagonal terms describe the contact between different 
+        # conductors.
+        return not np.any(contact[~np.eye(self.numObj, dtype=bool)])
+
+    def advance_conductor_time(self, conductor:Conductor)->float:
+        """Method that selects the new time step of the conductor and updates the conductor time and time step counter.
+
+        Args:
+            conductor (Conductor): object with all the information of the conductor.
+
+        Returns:
+            float: the new time step of the conductor.
+        """
+        # Call function Get_time_step to select new time step (cdp, 08/2020)
+        get_time_step(conductor, self.transient_input, self.num_step)
+        # Increase time (cdp, 08/2020)
+        conductor.cond_time.append(
+            conductor.cond_time[-1] + conductor.time_step
+        )
+        # update time step (cdp, 08/2020)
+        conductor.cond_num_step = conductor.cond_num_step + 1
+        # before calling Conductor method initialization adapt mesh if \
+        # necessary as foreseen by ITYMSH. To do later (cdp, 07/2020)
+        # se ho nuova griglia calcolare coefficenti, temperature, pressioni, \
+        # parametri adimensionati sfruttando np.interp (in fortrand è adaptm)
+
+        return conductor.time_step
+
+    def advance_conductor_solution(
+        self,
+        conductor:Conductor,
+        real_time_plots:bool=True,
+    )->float:
+        """Method that evaluates the solution of the conductor at the new time step (electric and thermal hydraulic problems) and saves the outcomes at the user defined times and spatial coordinates.
+        If flag IADAPTIME is equal to IADAPTIME_ERROR_CONTROL the local truncation error of the solution is estimated: if it is larger than the tolerance the time step is rejected, the state of the conductor is restored and the solution is evaluated again with the smaller time step proposed by the PI controller (the time step is accepted anyway if it is equal to STPMIN).
+
+        Args:
+            conductor (Conductor): object with all the information of the conductor.
+            real_time_plots (bool, optional): flag to update the real time plots of the conductor. Defaults to True.
+
+        Returns:
+            float: the accepted time step of the conductor.
+        """
+
+        if (
+            self.transient_input["IADAPTIME"] == IADAPTIME_ERROR_CONTROL
+            and conductor.cond_num_step > 1
+        ):
+            # Save the state of the conductor at the beginning of the time 
+            # step.
+            conductor.save_state()
+            self.__solve_conductor(conductor)
+            error = eval_local_error(conductor, self.transient_input)
+            while error > 1.0 and conductor.time_step > self.transient_input["STPMIN"]:
+                time_step = max(
+                    eval_error_controlled_time_step(conductor, error, False),
+                    self.transient_input["STPMIN"],
+                )
+                simulationlogger.info(
+                    f"{conductor.identifier}: rejected time step {conductor.time_step} s (error norm {error:.3e}); retry with time step {time_step} s.\n"
+                )
+                # Restore the state of the conductor and update time and time 
+                # step.
+                conductor.restore_state()
+                conductor.time_step = time_step
+                conductor.cond_time[-1] = conductor.cond_time[-2] + time_step
+                self.__solve_conductor(conductor)
+                error = eval_local_error(conductor, self.transient_input)
+            # End while error.
+            if error > 1.0:
+                simulationlogger.warning(
+                    f"{conductor.identifier}: time step {conductor.time_step} s accepted with error norm {error:.3e} since it is equal to STPMIN.\n"
+                )
+            eval_error_controlled_time_step(conductor, error, True)
+            simulationlogger.info(
+                f"{conductor.identifier}: accepted time step {conductor.time_step} s (error norm {error:.3e}); accepted time steps: {conductor.error_control['accepted']}, rejected time steps: {conductor.error_control['rejected']}.\n"
+            )
+        else:
+            self.__solve_conductor(conductor)
+            if self.transient_input["IADAPTIME"] == IADAPTIME_ERROR_CONTROL:
+                # No error estimate at the first time step (dummy initial 
+                # steady state): store the solution history only.
+                eval_error_controlled_time_step(conductor, 1.0, True)
+                conductor.error_control["next_time_step"] = conductor.time_step
+
+        # Size of the active set of the current divider at the accepted time 
+        # step.
+        for strand in conductor.inventory["StrandComponent"].collection:
+            strand.record_current_sharing_step(conductor.cond_time[-1])
+
+        if real_time_plots:
+            update_real_time_plots(conductor)
+
+        if (
+            conductor.i_save < len(conductor.Space_save) - 1
+            and abs(
+                conductor.cond_time[-1] - conductor.Space_save[conductor.i_save]
+            )
+            < conductor.time_step / 2.0
+        ):
+            # save simulation spatial distribution at user defined time steps \
+            # (cdp, 08/2020)
+            save_simulation_space(
+                conductor,
+                self.dict_path[
+                    f"Output_Spatial_distribution_{conductor.identifier}_dir"
+                ],
+                abs(self.n_digit_time),
+            )
+        # end if isave
+        # Save variables time evolution at given spatial coordinates \
+        # (cdp, 08/2020)
+        save_simulation_time(self, conductor)
+        # call sensor to plot results at any time the user asks (cdp, 07/2020)
+
+        return conductor.time_step
+
+    def __solve_conductor(self, conductor:Conductor):
+        """Private method that evaluates the solution of the electric and thermal hydraulic problems of the conductor at the new time step.
+
+        Args:
+            conductor (Conductor): object with all the information of the conductor.
+        """
+        # Use electric method only if needed, i.e., user specifies a 
+        # current.
+        if conductor.inputs["I0_OP_MODE"] != IOP_NOT_DEFINED:
+            # Call to electric_electric method allows to define, 
+            # initialize, solve and reorganize the electric problem.
+            conductor.electric_method()
+        else:
+            # Quick fix to the following silent bug: solid components 
+            # thermophysical, electromagnetic and critical properties 
+            # do not update at each time step if flag 
+            # conductor.inputs ["I0_OP_MODE"] == IOP_NOT_DEFINED. 
+            # This will not cause the simulation to stop, but will give 
+            # reasonable but wrong output. Since all solid component 
+            # properties are updated in method operating_conditions_em 
+            # of class Conductor, a quick fix is to explicitly call 
+            # this method when flag 
+            # conductor.inputs["I0_OP_MODE"] == IOP_NOT_DEFINED and let 
+            # method electric_method of class Conductor call it in all 
+            # the other cases.
+            # A better fix involves a complete refactoring of at least 
+            # methods operating_conditions_th and 
+            # operating_conditions_em of class Conductor and should be 
+            # done later.
+            conductor.operating_conditions_em()
+
+        # Evaluate thermal hydraulic properties and quantities in Gauss 
+        # points, method __eval_Gauss_point_th is invoked inside method 
+        # operating_conditions_th. Method operating_conditions_th is 
+        # called at each time step before function step because the 
+        # method for the integration in time is implicit.
+        conductor.operating_conditions_th(self)
+
+        conductor.build_heat_source(self)
+        # call step to solve the problem @ new timestep (cdp, 07/2020)
+        step(
+            conductor,
+            self.environment,
+            self.dict_qsource[conductor.identifier],
+            self.num_step,
+        )
+        # Loop on FluidComponent (cdp, 10/2020)
+        for fluid_comp in conductor.inventory["FluidComponent"].collection:
+            # compute density and mass flow rate in nodal points with the
+            # updated FluidComponent temperature and velocity (nodal = True by default)
+            fluid_comp.coolant._compute_density_and_mass_flow_rates_nodal_gauss(
+                conductor
+            )
+            # Enthalpy balance: sum((mdot*w)_out - (mdot*w)_inl), used to check \
+            # the imposition of SolidComponent temperature initial spatial \
+            # distribution (cdp, 12/2020)
+            conductor.enthalpy_balance = (
+                conductor.enthalpy_balance
+                + conductor.time_step
+                * (
+                    fluid_comp.coolant.dict_node_pt["mass_flow_rate"][-1]
+                    * fluid_comp.coolant.dict_node_pt["total_enthalpy"][-1]
+                    - fluid_comp.coolant.dict_node_pt["mass_flow_rate"][0]
+                    * fluid_comp.coolant.dict_node_pt["total_enthalpy"][0]
+                )
+            )
+            conductor.enthalpy_out = (
+                conductor.enthalpy_out
+                + conductor.time_step
+                * fluid_comp.coolant.dict_node_pt["mass_flow_rate"][-1]
+                * fluid_comp.coolant.dict_node_pt["total_enthalpy"][-1]
+            )
+            conductor.enthalpy_inl = (
+                conductor.enthalpy_inl
+                + conductor.time_step
+                * fluid_comp.coolant.dict_node_pt["mass_flow_rate"][0]
+                * fluid_comp.coolant.dict_node_pt["total_enthalpy"][0]
+            )
+        # end for fluid_comp (cdp, 10/2020)
+
+        # Compute radiative heat exchanged between jackets.
+        conductor.compute_radiative_heat_exhange_jk()
+        # Compute radiative heat exchanged outer jacket and environment.
+        conductor.compute_heat_exchange_jk_env(self.environment)
+
     def conductor_post_processing(self):
         # loop to save the norm of the solution at the end of the transient for 
         # each conductor, usefull to make space convergence
@@ -897,6 +1188,31 @@ class Simulation:
                     pp.sort_stats(SortKey.CUMULATIVE,SortKey.CALLS)
                     # Print out the statistics to stdout (mandatory to not get an empty file).
                     pp.print_stats()
+                    # Workspace buffers allocations, to measure the 
+                    # allocations saved by the workspace.
+                    ff.write(
+                        f"Workspace of {conductor.identifier}: {conductor.workspace.allocations} allocations over {conductor.workspace.requests} buffer requests.\n"
+                    )
+                    # Coolant properties incremental update, to tune the
+                    # tolerance COOLANT_PROPERTIES_RTOL.
+                    for fluid_comp in conductor.inventory["FluidComponent"].collection:
+                        ff.write(
+                            f"Coolant properties of {fluid_comp.identifier}: {fluid_comp.coolant.property_update_counter}.\n"
+                        )
+                    # Active set of the current divider, to tune the threshold 
+                    # CURRENT_SHARING_THRESHOLD.
+                    for strand in conductor.inventory["StrandComponent"].collection:
+                        # The current divider is not solved in 
+                        # StrandStabilizerComponent objects.
+                        if strand.current_sharing_counter is not None:
+                            ff.write(
+                                f"Current divider of {strand.identifier}: {strand.current_sharing_counter}.\n"
+                            )
+                    # Reuse of the LU factorization of the electric problem, 
+                    # to tune the tolerance ELECTRIC_LU_RTOL.
+                    ff.write(
+                        f"Electric solver of {conductor.identifier}: {conductor.electric_solver}.\n"
+                    )
 
             # Instance of the line profiler class.
             lp = LineProfiler()
@@ -14,8 +14,19 @@ from conductor_flags import (
     IOP_FROM_FILE,
     IOP_FROM_EXT_FUNCTION,
 )
+from time_history import TimeHistory
 
 class SolidComponent:
+
+    # Fused evaluators of the materials of the component (key is the material, 
+    # e.g. function properties_cu_nist), assigned by the subclasses; the 
+    # properties evaluated by them are stored in attribute fused_properties.
+    fused_properties_function = dict()
+    fused_properties = dict()
+    # Flag to write the outcome of the fused evaluators in preallocated 
+    # buffers, reused at each evaluation.
+    FUSED_PROPERTIES_BUFFERED = True
+
     def __init__(self, simulation, s_comp):
 
         """
@@ -74,6 +85,9 @@ class SolidComponent:
             dict: dictionary with updated material properties in nodal points or Gauss points according to the value of flag nodal in method eval_sol_comp_properties of class SolidComponent.
         """
 
+        # Evaluate in a single pass all the properties of the materials with a 
+        # fused evaluator, used by the methods below.
+        self.eval_fused_properties(dict_dummy)
         if (
             self.name == inventory["StrandMixedComponent"].name
             or self.name == inventory["StrandStabilizerComponent"].name
@@ -129,9 +143,73 @@ class SolidComponent:
                     dict_dummy
                 )
             )
+        # The outcome of the fused evaluators is valid only for dict_dummy: 
+        # methods called outside this method (e.g. the update of the 
+        # electrical resistivity at each electric time step) use the 
+        # functions of the single properties.
+        self.fused_properties = dict()
 
         return dict_dummy
 
+    def eval_fused_properties(self, dict_dummy: dict):
+        """Method that evaluates in a single pass all the properties of the materials of the component that have a fused evaluator (attribute fused_properties_function), sharing the intermediate quantities between the properties. The outcome is stored in attribute fused_properties (key is the material) and is used by method material_property instead of calling the functions of the single properties.
+
+        Args:
+            dict_dummy (dict): dictionary with material properties in nodal points or Gauss points according to the value of flag nodal in method eval_sol_comp_properties of class SolidComponent.
+        """
+        self.fused_properties = {
+            material: func(
+                dict_dummy["temperature"],
+                dict_dummy["B_field"],
+                self.inputs["RRR"],
+                out=self.__fused_properties_buffer(
+                    material, dict_dummy["temperature"].size
+                ),
+            )
+            for material, func in self.fused_properties_function.items()
+        }
+
+    def __fused_properties_buffer(self, material: str, size: int):
+        """Private method that gets the preallocated arrays where the fused evaluator of the material writes the properties; arrays are allocated at the first call for each material and size (nodal or Gauss points).
+
+        Args:
+            material (str): material identifier.
+            size (int): number of points.
+
+        Returns:
+            Union[None, dict]: preallocated arrays (key is the property), None if flag FUSED_PROPERTIES_BUFFERED is False.
+        """
+        if not self.FUSED_PROPERTIES_BUFFERED:
+            return None
+        buffers = self.__dict__.setdefault("fused_properties_buffers", dict())
+        if (material, size) not in buffers:
+            buffers[material, size] = {
+                key: np.empty(size)
+                for key in (
+                    "density",
+                    "isobaric_specific_heat",
+                    "thermal_conductivity",
+                    "electrical_resistivity",
+                )
+            }
+        return buffers[material, size]
+
+    def material_property(self, material: str, name: str, func, *args) -> np.ndarray:
+        """Method that gets a property of a material from the outcome of the fused evaluator (see method eval_fused_properties) if available, otherwise evaluates it with the function of the single property.
+
+        Args:
+            material (str): material identifier.
+            name (str): property name (density, isobaric_specific_heat, thermal_conductivity or electrical_resistivity).
+            func (callable): function that evaluates the single property.
+            *args: arguments of func.
+
+        Returns:
+            np.ndarray: property of the material.
+        """
+        if material in self.fused_properties:
+            return self.fused_properties[material][name]
+        return func(*args)
+
     def get_current_fractions(
         self, total_sc_area: float, total_so_area: float, inventory: dict
     ):
@@ -913,45 +991,40 @@ class SolidComponent:
             # Backward Euler or Crank-Nicolson (cdp, 10/2020)
             if conductor.cond_time[-1] == 0:
                 # Initialization (cdp, 10/2020)
-                self.dict_node_pt["EEXT"] = np.zeros(
-                    (conductor.grid_features["N_nod"], 2)
+                self.dict_node_pt["EEXT"] = TimeHistory(
+                    2, (conductor.grid_features["N_nod"],)
                 )
-                self.dict_node_pt["EJHT"] = np.zeros(
-                    (conductor.grid_features["N_nod"], 2)
+                self.dict_node_pt["EJHT"] = TimeHistory(
+                    2, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
                 if conductor.cond_num_step == 1:
                     # Store the old values only immediately after the initializzation, \
                     # since after that the whole SYSLOD array is saved and there is no \
                     # need to compute twice the same values (cdp, 10/2020)
-                    self.dict_node_pt["EEXT"][:, 1] = self.dict_node_pt["EEXT"][
-                        :, 0
-                    ].copy()
-                self.dict_node_pt["EJHT"][:, 1] = self.dict_node_pt["EJHT"][:, 0].copy()
-                # Update value at the current time step (cdp, 10/2020)
-                self.dict_node_pt["EEXT"][:, 0] = 0.0
-                self.dict_node_pt["EJHT"][:, 0] = 0.0
+                    self.dict_node_pt["EEXT"].advance()
+                else:
+                    # Update value at the current time step (cdp, 10/2020)
+                    self.dict_node_pt["EEXT"][0] = 0.0
+                # Rotate the time levels and set the value at the current time 
+                # step to zeros.
+                self.dict_node_pt["EJHT"].advance()
             # end if conductor.cond_time[-1] (cdp, 10/2020)
         elif conductor.inputs["METHOD"] == "AM4":
             # Adams-Moulton 4 (cdp, 10/2020)
             if conductor.cond_time[-1] == 0:
                 # Initialization (cdp, 10/2020)
-                self.dict_node_pt["EEXT"] = np.zeros(
-                    (conductor.grid_features["N_nod"], 4)
+                self.dict_node_pt["EEXT"] = TimeHistory(
+                    4, (conductor.grid_features["N_nod"],)
                 )
-                self.dict_node_pt["EJHT"] = np.zeros(
-                    (conductor.grid_features["N_nod"], 4)
+                self.dict_node_pt["EJHT"] = TimeHistory(
+                    4, (conductor.grid_features["N_nod"],)
                 )
             elif conductor.cond_time[-1] > 0:
-                self.dict_node_pt["EEXT"][:, 1:4] = self.dict_node_pt["EEXT"][
-                    :, 0:3
-                ].copy()
-                self.dict_node_pt["EJHT"][:, 1:4] = self.dict_node_pt["EJHT"][
-                    :, 0:3
-                ].copy()
-                # Update value at the current time step (cdp, 10/2020)
-                self.dict_node_pt["EEXT"][:, 0] = 0.0
-                self.dict_node_pt["EJHT"][:, 0] = 0.0
+                # Rotate the time levels (no copy) and set the value at the 
+                # current time step to zeros.
+                self.dict_node_pt["EEXT"].advance()
+                self.dict_node_pt["EJHT"].advance()
             # end if conductor.cond_time[-1] (cdp, 10/2020)
         # end if conductor.inputs["METHOD"] (cdp, 10/2020)
 
@@ -1,14 +1,13 @@
 # Import libraries
 import numpy as np
 import pandas as pd
-from scipy import optimize
-from typing import Tuple, Union
+from typing import Tuple
 
 # Import classes
 from solid_component import SolidComponent
 from strand_component import StrandComponent
 
-from utility_functions.auxiliary_functions import check_costheta
+from utility_functions.auxiliary_functions import check_costheta, safeguarded_halley
 
 # Cu properties
 from properties_of_materials.copper import (
@@ -16,6 +15,7 @@ from properties_of_materials.copper import (
     isobaric_specific_heat_cu_nist,
     density_cu,
     electrical_resistivity_cu_nist,
+    properties_cu_nist,
 )
 
 # RE123 properties
@@ -115,6 +115,11 @@ ELECTRICAL_RESISTIVITY_FUNC = dict(
     ss=electrical_resistivity_ss,
 )
 
+# Materials with a fused evaluator of all the properties.
+FUSED_PROPERTIES_FUNC = dict(
+    cu=properties_cu_nist,
+)
+
 INGEGNERISTIC_MODE = 0
 PHYSICAL_MODE = 1
 
@@ -172,6 +177,12 @@ class StackComponent(StrandComponent):
             delta_voltage_along_sum=dict(),
         )
         self.dict_scaling_input = dict()
+        # Options of the critical surface table, assigned by method 
+        # Simulation.__set_critical_surface_evaluation if the tabulated 
+        # critical surface is selected; the table (class CriticalSurfaceTable) 
+        # is built at the first evaluation of the critical properties.
+        self.critical_surface_options = None
+        self.critical_surface_table = None
         # Dictionary initialization: inputs.
         self.inputs = pd.read_excel(
             dict_file_path["input"],
@@ -368,6 +379,14 @@ class StackComponent(StrandComponent):
             [THERMAL_CONDUCTIVITY_FUNC[key] for key in self.tape_material]
         )
 
+        # Dictionary with the fused evaluators of the tape materials (see 
+        # method SolidComponent.eval_fused_properties).
+        self.fused_properties_function = {
+            key: FUSED_PROPERTIES_FUNC[key]
+            for key in self.tape_material
+            if key in FUSED_PROPERTIES_FUNC
+        }
+
     def __check_consistency(self, conductor):
         """Private method that checks consistency of stack and or tape user definition.
 
@@ -457,7 +476,12 @@ class StackComponent(StrandComponent):
         # specific heat.
         self.__stack_density_flag = True
         density = np.array(
-            [func(property["temperature"]) for func in self.density_function]
+            [
+                self.material_property(
+                    material, "density", func, property["temperature"]
+                )
+                for material, func in zip(self.tape_material, self.density_function)
+            ]
         )
         # Evaluate homogenized density of the stack:
         # rho_eq = sum(s_i*rho_i)/s
@@ -489,7 +513,12 @@ class StackComponent(StrandComponent):
             (property["temperature"].size, self.inputs["Material_number"])
         )
         for ii, func in enumerate(self.isobaric_specific_heat_function):
-            isobaric_specific_heat[:, ii] = func(property["temperature"])
+            isobaric_specific_heat[:, ii] = self.material_property(
+                self.tape_material[ii],
+                "isobaric_specific_heat",
+                func,
+                property["temperature"],
+            )
         # Evaluate homogenized isobaric specific heat of the stack:
         # cp_eq = sum(s_i*rho_i*cp_i)/sum(s_i*rho_i)
         return (isobaric_specific_heat * self.__density_numerator).sum(
@@ -510,7 +539,10 @@ class StackComponent(StrandComponent):
         )
         for ii, func in enumerate(self.thermal_conductivity_function):
             if "cu" in func.__name__:
-                thermal_conductivity[:, ii] = func(
+                thermal_conductivity[:, ii] = self.material_property(
+                    self.tape_material[ii],
+                    "thermal_conductivity",
+                    func,
                     property["temperature"],
                     property["B_field"],
                     self.inputs["RRR"],
@@ -537,7 +569,10 @@ class StackComponent(StrandComponent):
         )
         for ii, func in enumerate(self.electrical_resistivity_function_not_sc):
             if "cu" in func.__name__:
-                electrical_resistivity[:, ii] = func(
+                electrical_resistivity[:, ii] = self.material_property(
+                    self.tape_material_not_sc[ii],
+                    "electrical_resistivity",
+                    func,
                     property["temperature"],
                     property["B_field"],
                     self.inputs["RRR"],
@@ -604,13 +639,16 @@ class StackComponent(StrandComponent):
         rho_el_stabilizer: np.ndarray,
         critical_current: np.ndarray,
         current: np.ndarray,
+        sc_current_guess: np.ndarray = None,
     ) -> Tuple[np.ndarray, np.ndarray]:
         """Method that solves the not linear system of the current divider between superconduting and stabilizer material in the case of current sharing regime.
+        The not linear problem is solved only in the active set of nodes near or above current sharing (I/I_c above attribute current_sharing_threshold), elsewhere the first order expansion of the current divider is used. The equations of the active nodes are solved at once with Halley's method safeguarded by bisection on the bracket [0, I] (see function safeguarded_halley); the equations are solved for the absolute value of the current and the sign of the current is given to the outcome.
 
         Args:
             rho_el_stabilizer (np.ndarray): array with stabilizer electrical resistivity in Ohm*m.
             critical_current (np.ndarray): array with superconductor critical current in A.
             current (np.ndarray): electric total current array in A.
+            sc_current_guess (np.ndarray, optional): initial guess of the superconducting current in A, e.g. the solution at the previous electric time step (warm start). Defaults to None (midpoint of the bracket).
 
         Raises:
             ValueError: if arrays rho_el_stabilizer and critical_current does not have the same shape.
@@ -633,147 +671,79 @@ class StackComponent(StrandComponent):
                 f"Arrays critical_current and current must have the same shape.\n {critical_current.shape = };\n{current.shape}.\n"
             )
         
-        # Evaluate constant value:
-        # psi = rho_el_stab*I_c^n/(E_0*A_stab)
-        psi = (
-            rho_el_stabilizer
-            * critical_current ** self.inputs["nn"]
-            / self.inputs["E0"]
-            / self.cross_section["stab"]
+        abs_current = np.abs(current)
+        nn = self.inputs["nn"]
+        # Active set: nodes near or above current sharing (I/I_c above the 
+        # threshold), where the not linear problem is solved.
+        active = abs_current > self.current_sharing_threshold * critical_current
+        self.count_current_sharing_active_set(active)
+
+        sc_current = np.empty(current.shape)
+        # Far below current sharing almost all the current flows in the 
+        # superconductor; the stabilizer carries the current that gives the 
+        # electric field of the superconductor at I_sc = I (first order 
+        # expansion of the current divider):
+        # I_stab = E_0*A_stab*(I/I_c)^n/rho_el_stab
+        passive = ~active
+        sc_current[passive] = abs_current[passive] - (
+            self.inputs["E0"]
+            * self.cross_section["stab"]
+            * (abs_current[passive] / critical_current[passive]) ** nn
+            / rho_el_stabilizer[passive]
         )
 
-        # Initialize guess.
-        sc_current_guess = np.zeros(current.shape)
-        for ii, val in enumerate(current):
-            # Evaluate superconducting current guess with bisection method.
-            # Set the maximum itaration to 10 and disp to False in order to not
-            # rise an error due to not reached convergence.
-            sc_current_guess[ii] = optimize.bisect(
-                self.__sc_current_residual,
-                0.0,
-                val,
-                args=(psi[ii], val),
-                maxiter=10,
-                disp=False,
+        if active.any():
+            # Evaluate constant value:
+            # psi = rho_el_stab*I_c^n/(E_0*A_stab)
+            psi = (
+                rho_el_stabilizer[active]
+                * critical_current[active] ** nn
+                / self.inputs["E0"]
+                / self.cross_section["stab"]
             )
-
-        # Tolerance on newton halley increased in case I_critical is very small,
-        # to avoid inaccuracies on the divider that could lead to voltage 
-        # differences between sc and stab that are not expected in the parallel
-        # of electric resistances.
-        if min(critical_current)>1e-6:
-            # Default tollerance in optimize.newton method
-            tollerance = 1.48e-8
-        else:
-            # Value found trial and error iteration
-            # tollerance = 1e-12
-            # Other possible solution for the correct tollerance
-            tollerance = min(critical_current)/1e3
-        
-        # Evaluate superconducting with Halley's method
-        sc_current = optimize.newton(
-            self.__sc_current_residual,
-            sc_current_guess,
-            args=(psi, current),
-            fprime=self.__d_sc_current_residual,
-            fprime2=self.__d2_sc_current_residual,
-            tol = tollerance,
-            maxiter=1000,
-        )
-
-        return sc_current, current - sc_current
-
-    def __sc_current_residual(
-        self,
-        sc_current: Union[float, np.ndarray],
-        psi: Union[float, np.ndarray],
-        so_current: Union[float, np.ndarray],
-    ) -> Union[float, np.ndarray]:
-        """Private method that defines the residual function for the evaluation of the superconducting current with bysection and/or Newton-Rampson methods.
-
-        Args:
-            sc_current (Union(float, np.ndarray)): superconducting current (guess).
-            psi (Union(float, np.ndarray)): costant value in the equation
-            so_current (Union[float, np.ndarray]): total current in A.
-
-        Raises:
-            ValueError: if arguments sc_current, psi and so_current are not of the same type (float).
-            ValueError: if arguments sc_current, psi and so_current are not of the same type (np.ndarray).
-            ValueError: if arrays sc_current and psi does not have the same shape.
-            ValueError: if arrays sc_current and so_current does not have the same shape.
-
-        Returns:
-           Union[float, np.ndarray]: residual value
-        """
-        # Checks on input arguments.
-        if isinstance(sc_current, float):
-            if (
-                isinstance(psi, float) == False
-                or isinstance(so_current, float) == False
-            ):
-                raise ValueError(
-                    f"Arguments sc_current, psi and so_current must be of the same type (float).\n{type(sc_current) = };\n{type(psi) = };\n{type(so_current) = }.\n"
-                )
-        if isinstance(sc_current, np.ndarray):
-            if (
-                isinstance(psi, np.ndarray) == False
-                or isinstance(so_current, np.ndarray) == False
-            ):
-                raise ValueError(
-                    f"Arguments sc_current, psi and so_current must be of the same type (np.ndarray).\n{type(sc_current) = };\n{type(psi) = };\n{type(so_current) = }.\n"
-                )
-            if sc_current.shape != psi.shape:
-                raise ValueError(
-                    f"Arrays sc_current and psi must have the same shape.\n {sc_current.shape = };\n{psi.shape}.\n"
-                )
-            if sc_current.shape != so_current.shape:
-                raise ValueError(
-                    f"Arrays sc_current and so_current must have the same shape.\n {sc_current.shape = };\n{so_current.shape}.\n"
+            abs_current_active = abs_current[active]
+
+            # Tolerance on newton halley increased in case I_critical is very small,
+            # to avoid inaccuracies on the divider that could lead to voltage 
+            # differences between sc and stab that are not expected in the parallel
+            # of electric resistances.
+            if np.min(critical_current[active])>1e-6:
+                # Default tollerance in optimize.newton method
+                tollerance = 1.48e-8
+            else:
+                # Value found trial and error iteration
+                # tollerance = 1e-12
+                # Other possible solution for the correct tollerance
+                tollerance = np.min(critical_current[active])/1e3
+
+            def sc_current_residual(sc_current, index):
+                # Residual of the current divider and its first and second 
+                # derivatives wrt the superconducting current:
+                # f = I_sc^n + (I_sc - I)*psi
+                power = sc_current ** (nn - 2)
+                return (
+                    power * sc_current**2
+                    + (sc_current - abs_current_active[index]) * psi[index],
+                    nn * power * sc_current + psi[index],
+                    nn * (nn - 1) * power,
                 )
 
-        return sc_current ** self.inputs["nn"] + (sc_current - so_current) * psi
-
-    def __d_sc_current_residual(
-        self,
-        sc_current: Union[float, np.ndarray],
-        psi: Union[float, np.ndarray],
-        so_current: Union[float, np.ndarray],
-    ) -> Union[float, np.ndarray]:
-        """Private method that defines the first derivative of residual function wrt sc_current for the evaluation of the superconducting current with Newton-Rampson or Halley's methods.
-
-        Args:
-            sc_current (Union(float, np.ndarray)): superconducting current (guess).
-            psi (Union(float, np.ndarray)): costant value in the equation.
-            so_current (Union[float, np.ndarray]): total current in A, not used but passed by function optimize.newton.
-
-        Returns:
-           Union[float, np.ndarray]: residual derivative value
-        """
-
-        return self.inputs["nn"] * sc_current ** (self.inputs["nn"] - 1) + psi
-
-    def __d2_sc_current_residual(
-        self,
-        sc_current: Union[float, np.ndarray],
-        psi: Union[float, np.ndarray],
-        so_current: Union[float, np.ndarray],
-    ) -> Union[float, np.ndarray]:
-        """Private method that defines the second derivative of residual function wrt sc_current for the evaluation of the superconducting current with Newton-Rampson or Halley's methods.
-
-        Args:
-            sc_current (Union(float, np.ndarray)): superconducting current (guess).
-            psi (Union(float, np.ndarray)): costant value in the equation, not needed for this fuction.
-            so_current (Union[float, np.ndarray]): total current in A, not used but passed by function optimize.newton
-
-        Returns:
-           Union[float, np.ndarray]: second derivative of the residual.
-        """
+            # Evaluate superconducting current with Halley's method.
+            sc_current[active] = safeguarded_halley(
+                sc_current_residual,
+                np.zeros(abs_current_active.shape),
+                abs_current_active,
+                guess=(
+                    None
+                    if sc_current_guess is None
+                    else np.abs(sc_current_guess[active])
+                ),
+                xtol=tollerance,
+                maxiter=1000,
+            )
+        sc_current *= np.sign(current)
 
-        return (
-            self.inputs["nn"]
-            * (self.inputs["nn"] - 1)
-            * sc_current ** (self.inputs["nn"] - 2)
-        )
+        return sc_current, current - sc_current
 
     def get_electric_resistance(self, conductor: object) -> np.ndarray:
         f"""Method that evaluate the electrical resistance in Gauss node only, used to build the electric_resistance_matrix.
@@ -805,6 +775,13 @@ class StackComponent(StrandComponent):
                 self.dict_Gauss_pt["temperature"], None
             )
 
+            # Initialize array of superconducting current in Gauss point, used 
+            # as initial guess of the current divider at the next electric 
+            # time step (warm start).
+            self.sc_current_gauss = np.full_like(
+                self.dict_Gauss_pt["temperature"], np.nan
+            )
+
         # Get index for which abs(critical_current_gauss) == 0 (inside normal 
         # zone by definition).
         ind_zero = np.nonzero(abs(critical_current_gauss) == 0)[0]
@@ -829,8 +806,10 @@ class StackComponent(StrandComponent):
             sc_current_gauss, stab_current_gauss = self.solve_current_divider(
                 self.dict_Gauss_pt["electrical_resistivity_stabilizer"][ind_not_zero],
                 critical_current_gauss[ind_not_zero],
-                self.dict_Gauss_pt["op_current"][ind_not_zero]
-                )
+                self.dict_Gauss_pt["op_current"][ind_not_zero],
+                self.sc_current_gauss[ind_not_zero],
+            )
+            self.sc_current_gauss[ind_not_zero] = sc_current_gauss
             
             self.dict_Gauss_pt["electrical_resistivity_superconductor"][
                 ind_not_zero
@@ -0,0 +1,77 @@
+import numpy as np
+from typing_extensions import Self
+
+
+class StepWorkspace:
+    """Class that collects the preallocated buffers used by function step to build and solve the thermal hydraulic problem of a conductor.
+    Buffers are identified by a name and are allocated only the first time they are requested or when their shape changes; all the buffers are released when the number of nodes of the spatial discretization changes. The number of allocations and of requests are counted to measure the effectiveness of the workspace (see method Simulation.__profiling).
+    """
+
+    def __init__(self: Self, n_nod: int):
+        """Make an instance of class StepWorkspace.
+
+        Args:
+            self (Self): workspace object.
+            n_nod (int): number of nodes of the spatial discretization.
+        """
+        self.n_nod = n_nod
+        self.buffers = dict()
+        # Counter of the buffers allocations.
+        self.allocations = 0
+        # Counter of the buffers requests.
+        self.requests = 0
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(N_nod: {self.n_nod}, buffers: {len(self.buffers)}, allocations: {self.allocations}, requests: {self.requests})"
+
+    def resize(self: Self, n_nod: int):
+        """Method that releases all the buffers if the number of nodes of the spatial discretization changes, so that they are allocated again with the new shape at the next request.
+
+        Args:
+            self (Self): workspace object.
+            n_nod (int): number of nodes of the spatial discretization.
+        """
+        if n_nod != self.n_nod:
+            self.buffers.clear()
+            self.n_nod = n_nod
+
+    def zeros(self: Self, name: str, shape: tuple) -> np.ndarray:
+        """Method that returns the buffer called name filled with zeros, like function np.zeros. The buffer is allocated only if it does not exist or if its shape is not equal to shape.
+
+        Args:
+            self (Self): workspace object.
+            name (str): name of the buffer.
+            shape (tuple): shape of the buffer.
+
+        Returns:
+            np.ndarray: buffer filled with zeros.
+        """
+        self.requests += 1
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.zeros(shape)
+            self.buffers[name] = buffer
+            self.allocations += 1
+        else:
+            buffer.fill(0.0)
+        return buffer
+
+    def empty(self: Self, name: str, shape: tuple, order: str = "C") -> np.ndarray:
+        """Method that returns the buffer called name without initializing its values, like function np.empty; to be used when all the values are overwritten. The buffer is allocated only if it does not exist or if its shape is not equal to shape.
+
+        Args:
+            self (Self): workspace object.
+            name (str): name of the buffer.
+            shape (tuple): shape of the buffer.
+            order (str, optional): memory layout of the buffer ("C" or "F"), used only when the buffer is allocated. Defaults to "C".
+
+        Returns:
+            np.ndarray: buffer with undefined values.
+        """
+        self.requests += 1
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, order=order)
+            self.buffers[name] = buffer
+            self.allocations += 1
+        return buffer
@@ -35,10 +35,18 @@ from properties_of_materials.magnesium_diboride import (
     critical_current_density_mgb2,
     current_sharing_temperature_mgb2,
 )
+from critical_surface_table import CRITICAL_CURRENT_DENSITY, CriticalSurfaceTable
 
 
 class StrandComponent(SolidComponent):
 
+    # Threshold of the ratio between current and critical current above which 
+    # the not linear current divider is solved (active set), assigned by 
+    # method Simulation.__set_current_sharing_evaluation; the counter of the 
+    # active set is made at the first solution of the current divider.
+    current_sharing_threshold = 0.0
+    current_sharing_counter = None
+
     ### INPUT PARAMETERS
 
     ### OPERATIONAL PARAMETERS
@@ -188,19 +196,87 @@ class StrandComponent(SolidComponent):
 
     # End of Method get_superconductor_critical_prop
 
+    def __get_critical_surface_table(self, dict_dummy):
+        """Private method that gets the critical surface table of the strand, building it at the first call with the magnetic field and the strain in dict_dummy.
+
+        Args:
+            dict_dummy (dict): nodal or Gauss point properties of the strand.
+
+        Returns:
+            Union[None, CriticalSurfaceTable]: critical surface table, None if the scaling laws should be used.
+        """
+        if (
+            self.critical_surface_options is None
+            or self.inputs["superconducting_material"] not in CRITICAL_CURRENT_DENSITY
+        ):
+            return None
+        if self.critical_surface_table is None:
+            self.critical_surface_table = CriticalSurfaceTable(
+                self.inputs["superconducting_material"],
+                self.inputs,
+                dict_dummy["B_field"],
+                dict_dummy.get("Epsilon"),
+                self.critical_surface_options,
+            )
+        return self.critical_surface_table
+
+    def count_current_sharing_active_set(self, active: np.ndarray):
+        """Method that updates the counter of the active set of the current divider (nodes near or above current sharing where the not linear problem is solved): number of solutions, cumulated number of active and total nodes, size of the active set at the last solution and maximum size of the active set. The size of the active set at each time step is recorded by method record_current_sharing_step.
+
+        Args:
+            active (np.ndarray): boolean array that flags the nodes in the active set.
+        """
+        if self.current_sharing_counter is None:
+            self.current_sharing_counter = dict(
+                calls=0,
+                active=0,
+                total=0,
+                last_active=0,
+                max_active=0,
+                history=list(),
+            )
+        counter = self.current_sharing_counter
+        counter["last_active"] = np.count_nonzero(active)
+        counter["calls"] += 1
+        counter["active"] += counter["last_active"]
+        counter["total"] += active.size
+        counter["max_active"] = max(counter["max_active"], counter["last_active"])
+
+    def record_current_sharing_step(self, time: float):
+        """Method that records the size of the active set of the current divider at the end of an accepted time step (key history of the counter, list of tuples (time, size of the active set)). Nothing is recorded if the current divider was never solved.
+
+        Args:
+            time (float): time of the accepted time step in s.
+        """
+        if self.current_sharing_counter is not None:
+            self.current_sharing_counter["history"].append(
+                (time, self.current_sharing_counter["last_active"])
+            )
+
     def eval_critical_properties(self, dict_dummy):
 
+        table = self.__get_critical_surface_table(dict_dummy)
+        if table is not None:
+            # Critical current density interpolated from the critical surface 
+            # table; the critical temperature is still evaluated below.
+            dict_dummy["J_critical"] = table.eval_jc(
+                dict_dummy["temperature"],
+                dict_dummy["B_field"],
+                dict_dummy.get("Epsilon"),
+            )
+
         if self.inputs["superconducting_material"] == "NbTi":
             dict_dummy["T_critical"] = critical_temperature_nbti(
                 dict_dummy["B_field"], self.inputs["Bc20m"], self.inputs["Tc0m"]
             )
-            dict_dummy["J_critical"] = critical_current_density_nbti(
-                dict_dummy["temperature"],
-                dict_dummy["B_field"],
-                self.inputs["Bc20m"],
-                self.inputs["c0"],
-                self.inputs["Tc0m"],
-            )
+            if table is None:
+                dict_dummy["J_critical"] = critical_current_density_nbti(
+                    dict_dummy["temperature"],
+                    dict_dummy["B_field"],
+                    self.inputs["Bc20m"],
+                    self.inputs["c0"],
+                    self.inputs["Tc0m"],
+                )
         elif self.inputs["superconducting_material"] == "Nb3Sn":
             dict_dummy["T_critical"] = critical_temperature_nb3sn(
                 dict_dummy["B_field"],
@@ -208,36 +284,39 @@ class StrandComponent(SolidComponent):
                 self.inputs["Tc0m"],
                 self.inputs["Bc20m"],
             )
-            dict_dummy["J_critical"] = critical_current_density_nb3sn(
-                dict_dummy["temperature"],
-                dict_dummy["B_field"],
-                dict_dummy["Epsilon"],
-                self.inputs["Tc0m"],
-                self.inputs["Bc20m"],
-                self.inputs["c0"],
-            )
+            if table is None:
+                dict_dummy["J_critical"] = critical_current_density_nb3sn(
+                    dict_dummy["temperature"],
+                    dict_dummy["B_field"],
+                    dict_dummy["Epsilon"],
+                    self.inputs["Tc0m"],
+                    self.inputs["Bc20m"],
+                    self.inputs["c0"],
+                )
         elif self.inputs["superconducting_material"] == "YBCO":
             dict_dummy["T_critical"] = self.inputs["Tc0m"] * np.ones(
                 dict_dummy["temperature"].shape
             )
-            dict_dummy["J_critical"] = critical_current_density_re123(
-                dict_dummy["temperature"],
-                dict_dummy["B_field"],
-                self.inputs["Tc0m"],
-                self.inputs["Bc20m"],
-                self.inputs["c0"],
-            )
+            if table is None:
+                dict_dummy["J_critical"] = critical_current_density_re123(
+                    dict_dummy["temperature"],
+                    dict_dummy["B_field"],
+                    self.inputs["Tc0m"],
+                    self.inputs["Bc20m"],
+                    self.inputs["c0"],
+                )
         elif self.inputs["superconducting_material"] == "MgB2":
             dict_dummy["T_critical"] = self.inputs["Tc0m"] * np.ones(
                 dict_dummy["temperature"].shape
             )
-            dict_dummy["J_critical"] = critical_current_density_mgb2(
-                dict_dummy["temperature"],
-                dict_dummy["B_field"],
-                self.inputs["Bc20m"],
-                self.inputs["c0"],
-                self.inputs["Tc0m"],
-            )
+            if table is None:
+                dict_dummy["J_critical"] = critical_current_density_mgb2(
+                    dict_dummy["temperature"],
+                    dict_dummy["B_field"],
+                    self.inputs["Bc20m"],
+                    self.inputs["c0"],
+                    self.inputs["Tc0m"],
+                )
         elif self.inputs["superconducting_material"] == "scaling.dat":
             # Get user defined scaling invoking method User_scaling_margin \
             # (cdp, 10/2020)
@@ -275,7 +354,15 @@ class StrandComponent(SolidComponent):
         )
 
         bmax = dict_dummy["B_field"] * (1 + dict_dummy["alpha_B"])
-        if self.inputs["superconducting_material"] == "NbTi":
+        table = self.__get_critical_surface_table(dict_dummy)
+        if table is not None:
+            # Current sharing temperature interpolated from the critical 
+            # surface table.
+            dict_dummy["T_cur_sharing"] = table.eval_tcs(
+                dict_dummy["B_field"], dict_dummy.get("Epsilon"), jop
+            )
+            dict_dummy["T_cur_sharing_min"] = dict_dummy["T_cur_sharing"]
+        elif self.inputs["superconducting_material"] == "NbTi":
             dict_dummy["T_cur_sharing"] = current_sharing_temperature_nbti(
                 dict_dummy["B_field"],
                 jop,
@@ -19,6 +19,7 @@ from properties_of_materials.copper import (
     isobaric_specific_heat_cu_nist,
     density_cu,
     electrical_resistivity_cu_nist,
+    properties_cu_nist,
 )
 
 DENSITY_FUNC = dict(
@@ -41,11 +42,21 @@ ELECTRICAL_RESISTIVITY_FUNC = dict(
     cu=electrical_resistivity_cu_nist,
 )
 
+# Materials with a fused evaluator of all the properties.
+FUSED_PROPERTIES_FUNC = dict(
+    cu=properties_cu_nist,
+)
+
 
 class StrandStabilizerComponent(StrandComponent):
 
     # Class for copper strands objects
 
+    # The properties of the stabilizer are stored as they are in the nodal and 
+    # Gauss point dictionaries, hence the fused evaluator can not write them 
+    # in buffers reused at the next evaluation.
+    FUSED_PROPERTIES_BUFFERED = False
+
     ### INPUT PARAMETERS
     # some are inherited form the parent classes StrandComponent and SolidComponent
 
@@ -103,6 +114,12 @@ class StrandStabilizerComponent(StrandComponent):
             delta_voltage_along_sum=dict(),
         )
         self.dict_scaling_input = dict()
+        # Options of the critical surface table, assigned by method 
+        # Simulation.__set_critical_surface_evaluation if the tabulated 
+        # critical surface is selected; the table (class CriticalSurfaceTable) 
+        # is built at the first evaluation of the critical properties.
+        self.critical_surface_options = None
+        self.critical_surface_table = None
         # Dictionary initialization: inputs.
         self.inputs = pd.read_excel(
             dict_file_path["input"],
@@ -132,6 +149,13 @@ class StrandStabilizerComponent(StrandComponent):
         if self.inputs["stabilizer_material"] != "cu":
             # remove key RRR from inputs if stabilizer is not Cu (cdp, 07/2020)
             self.inputs.pop("RRR")
+        # Dictionary with the fused evaluator of the stabilizer material (see 
+        # method SolidComponent.eval_fused_properties).
+        self.fused_properties_function = {
+            key: FUSED_PROPERTIES_FUNC[key]
+            for key in [self.inputs["stabilizer_material"]]
+            if key in FUSED_PROPERTIES_FUNC
+        }
         if self.operations["IBIFUN"] != -1:
             # Remove key B_field_units.
             del self.operations["B_field_units"]
@@ -162,7 +186,12 @@ class StrandStabilizerComponent(StrandComponent):
         Returns:
             np.ndarray: array with density of the stabilizer in kg/m^3.
         """
-        return DENSITY_FUNC[self.inputs["stabilizer_material"]](property["temperature"])
+        return self.material_property(
+            self.inputs["stabilizer_material"],
+            "density",
+            DENSITY_FUNC[self.inputs["stabilizer_material"]],
+            property["temperature"],
+        )
 
     def strand_isobaric_specific_heat(self, property: dict) -> np.ndarray:
         """Method that evaluates isobaric specific heat of the stabilizer.
@@ -173,8 +202,11 @@ class StrandStabilizerComponent(StrandComponent):
         Returns:
             np.ndarray: array with isobaric specific heat of the stabilizer in kg/m^3.
         """
-        return ISOBARIC_SPECIFIC_HEAT_FUNC[self.inputs["stabilizer_material"]](
-            property["temperature"]
+        return self.material_property(
+            self.inputs["stabilizer_material"],
+            "isobaric_specific_heat",
+            ISOBARIC_SPECIFIC_HEAT_FUNC[self.inputs["stabilizer_material"]],
+            property["temperature"],
         )
 
     def strand_thermal_conductivity(self, property: dict) -> np.ndarray:
@@ -187,7 +219,10 @@ class StrandStabilizerComponent(StrandComponent):
             np.ndarray: array with thermal conductivity of the stabilizer in W/m/K.
         """
         if self.inputs["stabilizer_material"] == "cu":
-            return THERMAL_CONDUCTIVITY_FUNC[self.inputs["stabilizer_material"]](
+            return self.material_property(
+                self.inputs["stabilizer_material"],
+                "thermal_conductivity",
+                THERMAL_CONDUCTIVITY_FUNC[self.inputs["stabilizer_material"]],
                 property["temperature"],
                 property["B_field"],
                 self.inputs["RRR"],
@@ -207,7 +242,10 @@ class StrandStabilizerComponent(StrandComponent):
             np.ndarray: array with electrical resistivity of the stabilizer in Ohm*m.
         """
         if self.inputs["stabilizer_material"] == "cu":
-            return ELECTRICAL_RESISTIVITY_FUNC[self.inputs["stabilizer_material"]](
+            return self.material_property(
+                self.inputs["stabilizer_material"],
+                "electrical_resistivity",
+                ELECTRICAL_RESISTIVITY_FUNC[self.inputs["stabilizer_material"]],
                 property["temperature"],
                 property["B_field"],
                 self.inputs["RRR"],
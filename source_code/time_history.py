@@ -0,0 +1,76 @@
+import numpy as np
+from typing_extensions import Self
+
+
+class TimeHistory:
+    """Class that stores the values of a quantity at consecutive time steps (time levels) in a circular buffer, used for the multi-level time history arrays of the time integration methods (SYSLOD, AM4_AA, EEXT, EJHT and the radiative heat arrays).
+    Level 0 is the value at the current time step, level 1 the value at the previous time step and so on. Advancing a time step rotates the index of level 0 instead of shifting the data of all the levels, hence no copy is performed.
+    """
+
+    def __init__(self: Self, n_levels: int, shape: tuple):
+        """Make an instance of class TimeHistory with all the levels initialized to zeros.
+
+        Args:
+            self (Self): time history object.
+            n_levels (int): number of stored time levels.
+            shape (tuple): shape of the quantity at each time level.
+        """
+        self.n_levels = n_levels
+        # Each level is a contiguous block of memory.
+        self.data = np.zeros((n_levels, *shape))
+        # Index of level 0 (current time step) along the first axis of data.
+        self.head = 0
+
+    def __repr__(self: Self) -> str:
+        return f"{self.__class__.__name__}(levels: {self.n_levels}, shape: {self.data.shape[1:]}, head: {self.head})"
+
+    def __getitem__(self: Self, level: int) -> np.ndarray:
+        """Method that returns a view of the values at the given time level.
+
+        Args:
+            self (Self): time history object.
+            level (int): time level (0 for the current time step, 1 for the previous one and so on).
+
+        Returns:
+            np.ndarray: view of the values at time level level.
+        """
+        return self.data[(self.head + level) % self.n_levels]
+
+    def __setitem__(self: Self, level: int, value):
+        """Method that assigns value to the given time level (in place).
+
+        Args:
+            self (Self): time history object.
+            level (int): time level (0 for the current time step, 1 for the previous one and so on).
+            value (Union[float,np.ndarray]): value to be assigned.
+        """
+        self.data[(self.head + level) % self.n_levels] = value
+
+    def advance(self: Self, carry: bool = False) -> np.ndarray:
+        """Method that advances the time history by one time step: the current level becomes level 1, level 1 becomes level 2 and so on, while the oldest level is discarded and its memory is reused for the new current level.
+
+        Args:
+            self (Self): time history object.
+            carry (bool, optional): if True the new current level is initialized with the values of the previous one, otherwise it is initialized to zeros. Defaults to False.
+
+        Returns:
+            np.ndarray: view of the new current level.
+        """
+        self.head = (self.head - 1) % self.n_levels
+        if carry:
+            self[0] = self[1]
+        else:
+            self[0] = 0.0
+        return self[0]
+
+    def stack(self: Self, axis: int = 0) -> np.ndarray:
+        """Method that returns a copy of all the levels stacked in time order (level 0 first) along axis axis, i.e. the layout of the multi-level arrays with shifted columns.
+
+        Args:
+            self (Self): time history object.
+            axis (int, optional): axis of the time levels in the returned array. Defaults to 0.
+
+        Returns:
+            np.ndarray: array with the time levels stacked along axis axis.
+        """
+        return np.stack([self[level] for level in range(self.n_levels)], axis=axis)
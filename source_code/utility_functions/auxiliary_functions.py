@@ -1,5 +1,6 @@
 import bisect
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from openpyxl import load_workbook
 import pandas as pd
 from collections import namedtuple
@@ -771,6 +772,166 @@ def filter_component(iterable:Union[list,tuple],item:object)->tuple:
     else:
         raise TypeError(f"Iterable should be of type list or tuple; current type is {type(iterable)}")
 
+def band_sliding_window(vector:np.ndarray, main_diag:int)->np.ndarray:
+    """Function that builds the sliding window of vector aligned with the band storage used for the thermal hydraulic system matrices (coefficient (ii,jj) of the matrix is stored in row jj - ii + main_diag and column ii of the band storage). The window is padded with zeros outside the vector, i.e. window[ii,kk] = vector[ii + kk - main_diag] if 0 <= ii + kk - main_diag < vector.shape[0], 0 otherwise.
+
+    Args:
+        vector (np.ndarray): array of shape (total,).
+        main_diag (int): main diagonal index within the band.
+
+    Returns:
+        np.ndarray: read only view of shape (total, 2 * main_diag + 1).
+    """
+
+    padded = np.zeros(vector.shape[0] + 2 * main_diag)
+    padded[main_diag:main_diag + vector.shape[0]] = vector
+    return sliding_window_view(padded, 2 * main_diag + 1)
+
+def band_matvec(band:np.ndarray, vector:np.ndarray)->np.ndarray:
+    """Function that evaluates the product between a matrix in band storage (coefficient (ii,jj) of the matrix is stored in row jj - ii + main_diag and column ii of the band, as for the thermal hydraulic system matrices) and a vector, with a fixed number of vector operations.
+
+    Args:
+        band (np.ndarray): matrix in band storage, of shape (2 * main_diag + 1, total).
+        vector (np.ndarray): array of shape (total,).
+
+    Returns:
+        np.ndarray: matrix vector product, of shape (total,).
+    """
+
+    main_diag = (band.shape[0] - 1) // 2
+    # Products are summed in the same order of the band (row by row).
+    return np.sum(band.T * band_sliding_window(vector, main_diag), axis=1)
+
+def bracketed_root(func, lower:np.ndarray, upper:np.ndarray, xtol:float=1e-5, maxiter:int=100)->np.ndarray:
+    """Function that finds the roots of a collection of independent scalar equations func(x)[ii] = 0, each bracketed by [lower[ii], upper[ii]], solving all of them at once with the array form of the Chandrupatla method (inverse quadratic interpolation safeguarded by bisection, as the Brent method). At each iteration the residual is evaluated only for the equations that are not converged yet. Each root is found within xtol, as function scipy.optimize.bisect.
+    Ref: T. R. Chandrupatla, A new hybrid quadratic/bisection algorithm for finding the zero of a nonlinear function without using derivatives, Advances in Engineering Software 28 (1997) 145-149.
+
+    Args:
+        func (callable): function with signature func(x, index) that evaluates the residual of the equations index (np.ndarray of int) at points x (np.ndarray, same shape of index).
+        lower (np.ndarray): lower bound of the brackets.
+        upper (np.ndarray): upper bound of the brackets.
+        xtol (float, optional): absolute tolerance on the roots. Defaults to 1e-5.
+        maxiter (int, optional): maximum number of iterations. Defaults to 100.
+
+    Raises:
+        ValueError: if the residual has the same sign at the bounds of a bracket.
+        RuntimeError: if the roots are not found within maxiter iterations.
+
+    Returns:
+        np.ndarray: roots of the equations.
+    """
+
+    x_1 = np.array(lower, dtype=float).ravel()
+    x_2 = np.array(upper, dtype=float).ravel()
+    index = np.arange(x_1.size)
+    f_1 = func(x_1, index)
+    f_2 = func(x_2, index)
+    if np.any(np.sign(f_1) * np.sign(f_2) > 0):
+        raise ValueError("f(a) and f(b) must have different signs")
+    # Roots found at the bounds of the brackets.
+    root = np.where(f_2 == 0.0, x_2, x_1)
+    active = (f_1 != 0.0) & (f_2 != 0.0)
+    x_3 = x_2.copy()
+    f_3 = f_2.copy()
+    # Position of the next point within the bracket (bisection at the first
+    # iteration).
+    tt = np.full(x_1.shape, 0.5)
+    for _ in range(maxiter):
+        if not active.any():
+            return root
+        idx = index[active]
+        x1, x2, f1, f2 = x_1[idx], x_2[idx], f_1[idx], f_2[idx]
+        xt = x1 + tt[idx] * (x2 - x1)
+        ft = func(xt, idx)
+        # Keep the bracket: the new point replaces the bound with the same
+        # sign of the residual, the replaced bound is stored as third point
+        # for the interpolation.
+        same = np.sign(ft) == np.sign(f1)
+        x3 = np.where(same, x1, x2)
+        f3 = np.where(same, f1, f2)
+        x2 = np.where(same, x2, x1)
+        f2 = np.where(same, f2, f1)
+        x1, f1 = xt, ft
+        # Best estimate of the root.
+        best = np.abs(f1) < np.abs(f2)
+        root[idx] = np.where(best, x1, x2)
+        # Converged if the bracket is narrower than xtol or if the residual
+        # is zero.
+        tl = 0.5 * xtol / np.abs(x2 - x1)
+        converged = (tl > 0.5) | (np.where(best, f1, f2) == 0.0)
+        # Inverse quadratic interpolation if the three points allow it,
+        # bisection otherwise.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xi = (x1 - x2) / (x3 - x2)
+            phi = (f1 - f2) / (f3 - f2)
+            t_iqi = f1 / (f2 - f1) * f3 / (f2 - f3) + (x3 - x1) / (x2 - x1) * f1 / (
+                f3 - f1
+            ) * f2 / (f3 - f2)
+        iqi = (phi ** 2 < xi) & ((1.0 - phi) ** 2 < 1.0 - xi)
+        tt[idx] = np.clip(np.where(iqi, t_iqi, 0.5), tl, 1.0 - tl)
+        x_1[idx], x_2[idx], x_3[idx] = x1, x2, x3
+        f_1[idx], f_2[idx], f_3[idx] = f1, f2, f3
+        active[idx[converged]] = False
+    if active.any():
+        raise RuntimeError(
+            f"Failed to converge after {maxiter} iterations for {np.count_nonzero(active)} equations."
+        )
+    return root
+
+def safeguarded_halley(func, lower:np.ndarray, upper:np.ndarray, guess:np.ndarray=None, xtol:float=1.48e-8, maxiter:int=100)->np.ndarray:
+    """Function that finds the roots of a collection of independent scalar increasing functions func(x)[ii] = 0, each bracketed by [lower[ii], upper[ii]] (func(lower) <= 0 <= func(upper)), solving all of them at once with the array form of Halley's method safeguarded by bisection: the bracket is shrunk at each iteration according to the sign of the residual and the Halley step is replaced by the midpoint of the bracket when it falls outside. At each iteration the residual is evaluated only for the equations that are not converged yet. Convergence is reached when the step or the width of the bracket is below xtol, as function scipy.optimize.newton.
+
+    Args:
+        func (callable): function with signature func(x, index) that evaluates residual, first and second derivative of the equations index (np.ndarray of int) at points x (np.ndarray, same shape of index).
+        lower (np.ndarray): lower bound of the brackets.
+        upper (np.ndarray): upper bound of the brackets.
+        guess (np.ndarray, optional): initial guess of the roots (e.g. the solution at the previous time step), values outside the brackets or not finite are replaced by the midpoint of the bracket. Defaults to None (midpoint of the brackets).
+        xtol (float, optional): absolute tolerance on the roots. Defaults to 1.48e-8.
+        maxiter (int, optional): maximum number of iterations. Defaults to 100.
+
+    Raises:
+        RuntimeError: if the roots are not found within maxiter iterations.
+
+    Returns:
+        np.ndarray: roots of the equations.
+    """
+
+    x_lo = np.array(lower, dtype=float).ravel()
+    x_hi = np.array(upper, dtype=float).ravel()
+    index = np.arange(x_lo.size)
+    if guess is None:
+        root = 0.5 * (x_lo + x_hi)
+    else:
+        root = np.array(guess, dtype=float).ravel()
+        outside = ~((root >= x_lo) & (root <= x_hi))
+        root[outside] = 0.5 * (x_lo[outside] + x_hi[outside])
+    active = x_hi - x_lo > xtol
+    for _ in range(maxiter):
+        if not active.any():
+            return root
+        idx = index[active]
+        xx = root[idx]
+        ff, df, d2f = func(xx, idx)
+        # Shrink the bracket according to the sign of the residual.
+        lo = np.where(ff < 0.0, xx, x_lo[idx])
+        hi = np.where(ff > 0.0, xx, x_hi[idx])
+        # Halley step, bisection if the new point is outside the bracket.
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            x_new = xx - 2.0 * ff * df / (2.0 * df**2 - ff * d2f)
+        use_bisection = ~((x_new >= lo) & (x_new <= hi))
+        x_new[use_bisection] = 0.5 * (lo[use_bisection] + hi[use_bisection])
+        converged = (
+            (ff == 0.0) | (np.abs(x_new - xx) <= xtol) | (hi - lo <= xtol)
+        )
+        root[idx] = x_new
+        x_lo[idx], x_hi[idx] = lo, hi
+        active[idx[converged]] = False
+    if active.any():
+        raise RuntimeError(
+            f"Failed to converge after {maxiter} iterations for {np.count_nonzero(active)} equations."
+        )
+    return root
+
 def natural_sort(comp_a, comp_b):
     # Use the regexes to sort naturally (human like) the IDs of the components to be able to deal with all the interfaces in a general way.
     match_a = re.search(
@@ -223,13 +223,15 @@ def electric_transient_solution(conductor: object):
         # current electric time step for each conductor component.
         conductor.eval_total_operating_current()
         # Evaluate all matrices needed to solve the electromagnetic problem.
-        # N.B. it is not needed to evaluate at each time step the inductance 
-        # matrix, only the resistance matrix should be updated at each time 
-        # step: to be improved with refactoring. A good optimization would be 
-        # to actually update only the resistivity of the superconductor since 
-        # it depends also from the current, and the electrical resistivity of 
-        # the copper since it also depends on the magnetic fields. Other 
-        # materials should be updated only in the thermal loop.
+        # N.B. the structure of the electric problem (incidence, conductance 
+        # and inductance matrices) is built only once if the discretization 
+        # grid does not change, only the resistance block of the electric 
+        # stiffness matrix is updated at each time step. A good optimization 
+        # would be to actually update only the resistivity of the 
+        # superconductor since it depends also from the current, and the 
+        # electrical resistivity of the copper since it also depends on the 
+        # magnetic fields. Other materials should be updated only in the 
+        # thermal loop.
         conductor.electric_preprocessing()
 
         electric_stiffness_matrix = conductor.electric_stiffness_matrix.copy()
@@ -263,11 +265,24 @@ def electric_transient_solution(conductor: object):
         conductor.build_right_hand_side(foo, electric_known_term_vector_reduced, idx)
 
         # Solution.
-        electric_solution = spsolve(
-            conductor.electric_stiffness_matrix,
-            conductor.electric_right_hand_side,
-            permc_spec="NATURAL",
-        )
+        if conductor.electric_solver is None:
+            electric_solution = spsolve(
+                conductor.electric_stiffness_matrix,
+                conductor.electric_right_hand_side,
+                permc_spec="NATURAL",
+            )
+        else:
+            # Reuse the LU factorization of the matrix while the electric 
+            # resistances and the electric time step do not change.
+            electric_solution = conductor.electric_solver.solve(
+                conductor.electric_stiffness_matrix,
+                conductor.electric_right_hand_side,
+                np.append(
+                    conductor.electric_resistance_matrix.data,
+                    conductor.electric_time_step,
+                ),
+                idx,
+            )
 
         # Update old known therm vector.
         conductor.electric_known_term_vector_old = (
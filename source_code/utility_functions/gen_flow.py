@@ -43,6 +43,149 @@ def gen_flow(cond):
     get_inlet_conductor_mfr(cond)
 
 
+def eval_friction_factor_and_derivative(chan_group, reynolds, step=1e-6):
+    """Function that evaluates the total friction factor of each channel of a group and its derivative with respect to the Reynolds number, by forward finite difference with relative step step. The friction factor correlation of each channel is the one defined in input (nodal = None, i.e. the gen_flow sub dictionary of attribute dict_friction_factor is used).
+
+    Args:
+        chan_group (list): channels (FluidComponent objects).
+        reynolds (np.ndarray): Reynolds number of each channel.
+        step (float, optional): relative step of the finite difference. Defaults to 1e-6.
+
+    Returns:
+        tuple: total friction factor (np.ndarray) and its derivative with respect to the Reynolds number (np.ndarray) for each channel.
+    """
+    fric = np.zeros(len(chan_group))
+    dfric = np.zeros(len(chan_group))
+    for ii, fluid_comp in enumerate(chan_group):
+        fluid_comp.channel.eval_friction_factor(
+            np.array([reynolds[ii] * (1.0 + step)]), nodal=None
+        )
+        fric_step = fluid_comp.channel.dict_friction_factor[None]["total"][0]
+        # Evaluated last to leave the friction factor at reynolds in the
+        # gen_flow sub dictionary.
+        fluid_comp.channel.eval_friction_factor(np.array([reynolds[ii]]), nodal=None)
+        fric[ii] = fluid_comp.channel.dict_friction_factor[None]["total"][0]
+        dfric[ii] = (fric_step - fric[ii]) / (reynolds[ii] * step)
+    return fric, dfric
+
+
+# end function eval_friction_factor_and_derivative
+
+
+def newton_flow_split(
+    chan_group, g0, rho, mu, mdot_guess, Max_iter, tol, delta_p=None, mdot_group=None
+):
+    """Function that solves with a vectorized Newton method the flow in a group of channels subject to the same pressure drop, described for each channel by the hydraulic characteristic:
+    delta_p = g0*f(Re)*mdot**2/rho
+    with Re = mdot*D/(A*mu) and density and dynamic viscosity fixed. Two problems are solved according to the given input:
+    * delta_p known (abs(INTIAL) = 1): the mass flow rate of each channel is evaluated, the Jacobian is diagonal;
+    * mdot_group known (abs(INTIAL) = 2 or 3): the mass flow rate of each channel and the pressure drop are evaluated with the further equation sum(mdot) = mdot_group; the Jacobian is a diagonal matrix bordered by the pressure drop column and the mass conservation row, and the Newton step is evaluated in closed form (Schur complement).
+    Mass flow rates are absolute values: the sign according to the flow direction is assigned by the caller.
+
+    Args:
+        chan_group (list): channels (FluidComponent objects).
+        g0 (np.ndarray): geometry coefficient of each channel (1/m^3).
+        rho (np.ndarray): density of each channel (kg/m^3).
+        mu (np.ndarray): dynamic viscosity of each channel (Pa*s).
+        mdot_guess (np.ndarray): initial guess of the mass flow rate of each channel (kg/s).
+        Max_iter (int): maximum number of iterations.
+        tol (float): tolerance on the relative variation of the unknowns.
+        delta_p (float, optional): pressure drop of the group (Pa) if mdot_group is None, otherwise its initial guess. Defaults to None.
+        mdot_group (float, optional): total mass flow rate of the group (kg/s). Defaults to None.
+
+    Returns:
+        tuple: mass flow rate of each channel (np.ndarray), pressure drop (float), number of iterations (int) and relative variation of the unknowns at the last iteration (float).
+    """
+    # Lower bound of the denominators of the relative variations.
+    TINY = 1.0e-20
+    if (mdot_group is None and delta_p == 0.0) or (
+        mdot_group is not None and mdot_group == 0.0
+    ):
+        # No pressure drop or no mass flow rate: fluid at rest in all the
+        # channels.
+        return np.zeros(len(chan_group)), 0.0, 0, 0.0
+    hydiameter = np.array([fc.coolant.inputs["HYDIAMETER"] for fc in chan_group])
+    crossection = np.array([fc.coolant.inputs["CROSSECTION"] for fc in chan_group])
+    mdot = np.array(mdot_guess, dtype=float)
+    if delta_p is None:
+        # Pressure drop of the group evaluated with the initial guess of the
+        # mass flow rate and friction factor.
+        delta_p = np.mean(g0 * 0.01 * mdot ** 2 / rho)
+    error = 10.0
+    iteration = 0
+    while error >= tol and iteration < Max_iter:
+        iteration = iteration + 1
+        reynolds = mdot * hydiameter / (crossection * mu)
+        fric, dfric = eval_friction_factor_and_derivative(chan_group, reynolds)
+        # Residual of the hydraulic characteristic of each channel and its
+        # derivative with respect to the mass flow rate.
+        residual = g0 * fric * mdot ** 2 / rho - delta_p
+        jac = g0 * mdot / rho * (2.0 * fric + dfric * reynolds)
+        if mdot_group is None:
+            d_delta_p = 0.0
+        else:
+            # Pressure drop variation from the mass conservation equation.
+            d_delta_p = (np.sum(residual / jac) - (np.sum(mdot) - mdot_group)) / np.sum(
+                1.0 / jac
+            )
+        d_mdot = (d_delta_p - residual) / jac
+        # Mass flow rates are kept positive.
+        mdot_new = np.maximum(mdot + d_mdot, 0.1 * mdot)
+        error = max(
+            np.max(np.abs(mdot_new - mdot) / np.maximum(np.abs(mdot), TINY)),
+            abs(d_delta_p) / max(abs(delta_p), TINY),
+        )
+        mdot = mdot_new
+        delta_p = delta_p + d_delta_p
+    return mdot, float(delta_p), iteration, error
+
+
+# end function newton_flow_split
+
+
+def eval_mass_flow_rate_from_pressure_drop(
+    cond, chan_group, delta_p, rho, mu, Max_iter, tol
+):
+    """Function that evaluates the mass flow rate of a group of channels subject to the same known pressure drop (abs(INTIAL) = 1), solving all the channels at once with function newton_flow_split.
+
+    Args:
+        cond (Conductor): conductor object.
+        chan_group (list): channels (FluidComponent objects).
+        delta_p (float): pressure drop (Pa).
+        rho (np.ndarray): density of each channel (kg/m^3).
+        mu (np.ndarray): dynamic viscosity of each channel (Pa*s).
+        Max_iter (int): maximum number of iterations.
+        tol (float): tolerance on the relative variation of the mass flow rates.
+
+    Returns:
+        np.ndarray: mass flow rate of each channel, absolute value (kg/s).
+    """
+    # Geometry coefficient with the effective length of the channels, Fanning
+    # friction factor considered.
+    g0 = np.array(
+        [
+            2.0
+            * cond.inputs["ZLENGTH"]
+            / fc.coolant.inputs["COSTETA"]
+            / (fc.coolant.inputs["HYDIAMETER"] * fc.coolant.inputs["CROSSECTION"] ** 2)
+            for fc in chan_group
+        ]
+    )
+    # Initial guess with friction factor equal to 0.01.
+    mdot_guess = np.sqrt(delta_p * rho / (g0 * 0.01))
+    mdot, _, iteration, error = newton_flow_split(
+        chan_group, g0, rho, mu, mdot_guess, Max_iter, tol, delta_p=delta_p
+    )
+    if error >= tol:
+        warnings.warn(
+            f"WARNING. TOLERANCE NOT ACHIEVED FOR {[fc.identifier for fc in chan_group]} IN GENFLW after {iteration} iterations:\nerr = {error}"
+        )
+    return mdot
+
+
+# end function eval_mass_flow_rate_from_pressure_drop
+
+
 def get_flow_no_hydraulic_parallel_channels(cond, path, Max_iter, tol):
 
     """
@@ -135,23 +278,14 @@ def initialize_flow_no_hydraulic_parallel(cond, fluid_comp, path, Max_iter, tol)
                 f"""Error in function {gen_flow.__name__}!\nNegative 
       pressure drop: delta_p = {delta_p}"""
             )
-        # Compute velocity invoking method compute_velocity_gen_flow
-        velocity = fluid_comp.coolant.compute_velocity_gen_flow(
-            cond.inputs["ZLENGTH"],
-            fluid_comp.channel,
-            Max_iter,
-            delta_p,
-            rho,
-            mu,
-            tol,
-        )
         # DETERMINE THE MASSFLOW (WITH SIGN !)
         # The float is introduced to convert the result from np array of shape \
         # (1,) to a scalar float (cdp, 09/2020)
         mdot_inl = float(
-            fluid_comp.coolant.compute_mass_flow_with_direction(
-                fluid_comp.channel.flow_dir[1], rho, velocity
-            )
+            fluid_comp.channel.flow_dir[1]
+            * eval_mass_flow_rate_from_pressure_drop(
+                cond, [fluid_comp], delta_p, rho, mu, Max_iter, tol
+            )[0]
         )
         if abs(mdot_inl) != fluid_comp.coolant.operations["MDTIN"]:
             warnings.warn(
@@ -428,13 +562,13 @@ def get_flow_hydraulic_parallel_channels(cond, path, Max_iter, tol):
             # Call function Abs_INTIAL_equal_2_or_3_hp to initialize flow parameters \
             # for channel groups characterized by abs(INTIAL) = 2 (cdp, 09/2020)
             abs_intial_equal_2_or_3_hp(
-                cond, chan_group, N_group, path, tol, intial=INTIAL_ref
+                cond, chan_group, N_group, path, Max_iter, tol, intial=INTIAL_ref
             )
         elif INTIAL_ref == 3:
             # Call function Abs_INTIAL_equal_2_or_3_hp to initialize flow parameters \
             # for channel groups characterized by abs(INTIAL) = 3 (cdp, 09/2020)
             abs_intial_equal_2_or_3_hp(
-                cond, chan_group, N_group, path, tol, intial=INTIAL_ref
+                cond, chan_group, N_group, path, Max_iter, tol, intial=INTIAL_ref
             )
         else:
             # Raise error (cdp, 09/2020)
@@ -589,34 +723,26 @@ def abs_intial_equal_1_hp(cond, chan_group, N_group, path, Max_iter, tol):
         raise ValueError(
             f"Error in function {gen_flow.__name__}!\nNegative pressure drop: delta_p = {delta_p}"
         )
-    # Compute mass flow rate (cdp, 09/2020)
+    # Density and dynamic viscosity at average pressure and inlet temperature.
+    rho_inl = np.zeros(N_group)
+    mu_inl = np.zeros(N_group)
     for ii in range(N_group):
-        fluid_comp = chan_group[ii]
         # Invoke method eval_coolant_density_din_viscosity_gen_flow to evaluate density and dynamic viscosity at average pressure and inlet Temperature
         (
-            rho_inl,
-            mu_inl,
-        ) = fluid_comp.coolant.eval_coolant_density_din_viscosity_gen_flow(
-            [p_ave], [T_inl[ii]]
-        )
-        # Compute velocity invoking method compute_velocity_gen_flow
-        velocity = fluid_comp.coolant.compute_velocity_gen_flow(
-            cond.inputs["ZLENGTH"],
-            fluid_comp.channel,
-            Max_iter,
-            delta_p,
-            rho_inl,
-            mu_inl,
-            tol,
+            rho_inl[ii],
+            mu_inl[ii],
+        ) = chan_group[ii].coolant.eval_coolant_density_din_viscosity_gen_flow(
+            p_ave, T_inl[ii]
         )
+    # Mass flow rate of all the channels of the group, absolute value.
+    mdot_abs = eval_mass_flow_rate_from_pressure_drop(
+        cond, chan_group, delta_p, rho_inl, mu_inl, Max_iter, tol
+    )
+    # Compute mass flow rate (cdp, 09/2020)
+    for ii in range(N_group):
+        fluid_comp = chan_group[ii]
         # DETERMINE THE MASSFLOW (WITH SIGN !)
-        # The float is introduced to convert the result from np array of shape \
-        # (1,) to a scalar float (cdp, 09/2020)
-        mdot_inl = float(
-            fluid_comp.coolant.compute_mass_flow_with_direction(
-                fluid_comp.channel.flow_dir[1], rho_inl, velocity
-            )
-        )
+        mdot_inl = float(fluid_comp.channel.flow_dir[1] * mdot_abs[ii])
         if abs(mdot_inl) != fluid_comp.coolant.operations["MDTIN"]:
             warnings.warn(
                 f"Function {gen_flow.__name__}, {fluid_comp.identifier}, INTIAL == {fluid_comp.coolant.operations['INTIAL']}. Evaluated inlet mass flow rate is different from the one in Worksheet CHAN of input file {cond.file_input['OPERATION']}: {abs(mdot_inl)} != {fluid_comp.coolant.operations['MDTIN']}.\n This value is overwritten by the evaluated one with the correct sign according to the flow direction:\nMDTIN = {mdot_inl}\n"
@@ -653,7 +779,9 @@ def abs_intial_equal_1_hp(cond, chan_group, N_group, path, Max_iter, tol):
 # end function Abs_INTIAL_equal_1_hp (cdp, 09/2020)
 
 
-def abs_intial_equal_2_or_3_hp(cond, chan_group, N_group, path, tol, intial=2):
+def abs_intial_equal_2_or_3_hp(
+    cond, chan_group, N_group, path, Max_iter, tol, intial=2
+):
 
     """
     Function that evaluate initial flow parameters for a channel group in hydraulic parallel characterized by the same fluid and the same value of flag INTIAL: asb(INTIAL) = 2 or asb(INTIAL) = 3 in this case. This two cases are treated with the same function since they are similar; it should be remembered however that all the channels of a group are characterized by the same INTIAL value. (cdp, 09/2020)
@@ -790,13 +918,26 @@ def abs_intial_equal_2_or_3_hp(cond, chan_group, N_group, path, tol, intial=2):
             "Channels in hydraulic parallel must all have the same flow direction.\nPlease, check flag FLOWDIR in sheet CHANNEL of input file conductor_operation.xlsx.\n"
         )
     # End if flow_dir.count("forward") != len(flow_dir)
-    # Real mass flow rate distribution, absolute value
-    mdot_known = np.sqrt(delta_p_group * rho / (g0 * fric))
+    # Real mass flow rate distribution, absolute value: the above estimate,
+    # with the friction factor evaluated at the known mass flow rates, is the
+    # initial guess of the Newton method that solves the whole group of
+    # channels for the mass flow rate repartition and the pressure drop.
+    mdot_known, delta_p_group, iteration, error = newton_flow_split(
+        chan_group,
+        g0,
+        rho,
+        mu,
+        np.sqrt(delta_p_group * rho / (g0 * fric)),
+        Max_iter,
+        tol,
+        delta_p=delta_p_group,
+        mdot_group=abs(mdot_known_group),
+    )
     # Evaluate relative error on mass flow rate (cdp, 09/2020)
-    error_mfr = abs((np.sum(mdot_known) - mdot_known_group) / mdot_known_group)
-    if error_mfr > tol:
+    error_mfr = abs((np.sum(mdot_known) - abs(mdot_known_group)) / mdot_known_group)
+    if error_mfr > tol or error >= tol:
         warnings.warn(
-            f"""Channel in hydraulic parallel:\nabs(INTIAL) = {abs(intial)}\nerror_mfr = {error_mfr}\nis larger than specified tolerance ({tol}); this may have some effects in the solution.\n"""
+            f"""Channel in hydraulic parallel:\nabs(INTIAL) = {abs(intial)}\nerror_mfr = {error_mfr}\nNewton iterations: {iteration}, error = {error}\nis larger than specified tolerance ({tol}); this may have some effects in the solution.\n"""
         )
     # Evaluate missing pressure (cdp, 09/2020)
     if abs(intial) == 2:
@@ -7,6 +7,15 @@ import os
 import numpy as np
 import pandas as pd
 
+# Attributes of the conductor components that store the real time plots (see 
+# functions create_real_time_plots_max_temperature and 
+# create_real_time_plots_inlet_outlet_mfr).
+REAL_TIME_PLOT_ATTRIBUTES = (
+    "figure_max_temp",
+    "axes_max_temp",
+    "figure_io_mfr",
+    "axes_io_mfr",
+)
 
 def plot_properties(simulation, cond, what="initialization"):
 
@@ -6,22 +6,49 @@ from typing import Union, NamedTuple
 from fluid_component import FluidComponent
 from solid_component import SolidComponent
 from conductor import Conductor
-
-def matrix_initialization(row:int,col:int,matrix_names:tuple)->dict:
+from step_workspace import StepWorkspace
+from time_history import TimeHistory
+from utility_functions.auxiliary_functions import (
+    band_matvec,
+    band_sliding_window,
+)
+
+def matrix_initialization(
+    row:int,
+    col:int,
+    matrix_names:tuple,
+    n_elem:int=0,
+    workspace:StepWorkspace=None,
+    )->dict:
     """Wrapper of function np.zeros that inizializes five identical rectangular matrices and collects them in a dictionary.
 
     Args:
         row (int): number of rows of the matrix.
         col (int): number of columns of the matrix.
         matrix_names (tuple): collection of valid keywords to build the dictionary of initialized matrices.
+        n_elem (int, optional): number of stacked matrices. If n_elem is 0, the matrix shape is (row,col), else the matrix shape is (n_elem,row,col) (one matrix for each element of the spatial discretization, used by the vectorized assembly). Defaults to 0.
+        workspace (StepWorkspace, optional): workspace with the preallocated buffers; if given, buffers are reused instead of allocating new matrices. Defaults to None.
 
     Returns:
         dict: collection of initialized matrices.
     """
     
-    return {name:np.zeros((row,col)) for name in matrix_names}
-
-def array_initialization(dimension:int, num_step:int, col:int=0)-> Union[NamedTuple,np.ndarray]:
+    if n_elem:
+        shape = (n_elem,row,col)
+    else:
+        shape = (row,col)
+    if workspace is not None:
+        return {name:workspace.zeros(name,shape) for name in matrix_names}
+    return {name:np.zeros(shape) for name in matrix_names}
+
+def array_initialization(
+    dimension:int,
+    num_step:int,
+    col:int=0,
+    n_elem:int=0,
+    name:str="",
+    workspace:StepWorkspace=None,
+    )-> Union[NamedTuple,np.ndarray]:
     """Wrapper of function np.zeros that initializes array of shape (dimension, col) according to the time step number.
     N.B. the application of the theta method should be completely rivisited in the whole code.
 
@@ -29,11 +56,25 @@ def array_initialization(dimension:int, num_step:int, col:int=0)-> Union[NamedTu
         dimension (int): number of elements (rows) of the array to be initialized.
         num_step (int): time step number.
         col (int, optional): number of columns to be assigned to the array. If col is 0, the array shape is (dimension,), else array shape is (dimension,col). Defaults to 0.
+        n_elem (int, optional): number of stacked arrays. If n_elem is not 0, the array shape is prefixed by n_elem, i.e. (n_elem,dimension) or (n_elem,dimension,col) (one array for each element of the spatial discretization, used by the vectorized assembly). Defaults to 0.
+        name (str, optional): name of the array, used as buffer name in workspace. Defaults to "".
+        workspace (StepWorkspace, optional): workspace with the preallocated buffers; if given, buffers are reused instead of allocating new arrays. Defaults to None.
 
     Returns:
         Union[NamedTuple,np.ndarray]: namedtuple with array if num_step is 1; np.ndarray in all other cases.
     """
 
+    if n_elem:
+        # Prefix the shape with the number of stacked arrays.
+        dimension = (n_elem, dimension)
+    else:
+        dimension = (dimension,)
+    
+    if workspace is not None:
+        zeros = lambda shape, suffix="": workspace.zeros(name + suffix, shape)
+    else:
+        zeros = lambda shape, suffix="": np.zeros(shape)
+
     if num_step == 1:
         Array = namedtuple("Array",("previous","present"))
         # To correctly apply the theta method (to be rivisited in the whole 
@@ -44,25 +85,25 @@ def array_initialization(dimension:int, num_step:int, col:int=0)-> Union[NamedTu
         # Check on col to assign the correct shape to the array.
         if col: # used to define SVEC.
             return Array(
-                previous=np.zeros((dimension, col)),
-                present=np.zeros((dimension, col)),
+                previous=zeros((*dimension, col), "_previous"),
+                present=zeros((*dimension, col), "_present"),
             )
         else: # used to define ELSLOD.
             return Array(
-                previous=np.zeros(dimension),
-                present=np.zeros(dimension),
+                previous=zeros(dimension, "_previous"),
+                present=zeros(dimension, "_present"),
             )
     else:
         # Check on col to assign the correct shape to the array.
         if col: # used to define SVEC.
-            return np.zeros((dimension, col))
+            return zeros((*dimension, col))
         else: # used to define ELSLOD.
-            return np.zeros(dimension)
+            return zeros(dimension)
 
 def build_amat(
     matrix:np.ndarray,
     f_comp:FluidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:NamedTuple,
     )->np.ndarray:
     """Function that builds the A matrix (AMAT) at the Gauss point (flux Jacobian).
@@ -70,7 +111,7 @@ def build_amat(
     Args:
         matrix (np.ndarray): initialized A matrix (np.zeros)
         f_comp (FluidComponent): fluid component object from which get all info to buld the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (NamedTuple): collection of fluid equation index (velocity, pressure and temperaure equations).
 
     Returns:
@@ -82,18 +123,20 @@ def build_amat(
     diag_idx = np.array(eq_idx)
     
     # Set diagonal elements (exploit broadcasting).
-    matrix[diag_idx,diag_idx] = f_comp.coolant.dict_Gauss_pt["velocity"][elem_idx]
+    matrix[...,diag_idx,diag_idx] = f_comp.coolant.dict_Gauss_pt["velocity"][
+        elem_idx
+    ][...,np.newaxis]
 
     # Set off diagonal coefficients.
     # from velocity equation.
-    matrix[eq_idx.velocity, eq_idx.pressure] = 1. / density
+    matrix[...,eq_idx.velocity, eq_idx.pressure] = 1. / density
     # from pressure equation.
-    matrix[eq_idx.pressure, eq_idx.velocity] = (
+    matrix[...,eq_idx.pressure, eq_idx.velocity] = (
         density
         * f_comp.coolant.dict_Gauss_pt["total_speed_of_sound"][elem_idx] ** 2.
     )
     # from temperature equation.
-    matrix[eq_idx.temperature, eq_idx.velocity] = (
+    matrix[...,eq_idx.temperature, eq_idx.velocity] = (
         f_comp.coolant.dict_Gauss_pt["Gruneisen"][elem_idx]
         * f_comp.coolant.dict_Gauss_pt["temperature"][elem_idx]
     )
@@ -222,7 +265,7 @@ def build_kmat_fluid(
     upweqt:np.ndarray,
     f_comp:FluidComponent,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
 
     """Function that builds the K matrix (KMAT) at the Gauss point, UPWIND is included.
@@ -233,7 +276,7 @@ def build_kmat_fluid(
         upweqt (np.ndarray): array with the upwind numerical scheme.
         f_comp (FluidComponent): fluid component object from which get all info to buld the coefficients.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -255,14 +298,17 @@ def build_kmat_fluid(
     # velocity, pressure and temperature equations.
     # Diagonal therms definition: dz * upweqt * v / 2
     # Set diagonal elements (exploit broadcasting).
-    matrix[diag_idx,diag_idx] = delta_z * upweqt[diag_idx] * velocity / 2.0
+    matrix[...,diag_idx,diag_idx] = (
+        delta_z[...,np.newaxis] * upweqt[diag_idx] * velocity[...,np.newaxis]
+        / 2.0
+    )
 
     return matrix
 
 def build_smat_fluid(
     matrix:np.ndarray,
     f_comp:FluidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:NamedTuple,
     )->np.ndarray:
 
@@ -271,7 +317,7 @@ def build_smat_fluid(
     Args:
         matrix (np.ndarray): initialized S matrix (np.zeros)
         f_comp (FluidComponent): fluid component object from which get all info to build the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (NamedTuple): collection of fluid equation index (velocity, pressure and temperaure equations).
 
     Returns:
@@ -283,7 +329,7 @@ def build_smat_fluid(
     velocity = f_comp.coolant.dict_Gauss_pt["velocity"][elem_idx]
     # velocity equation: main diagonal elements construction
     # (j,j) [vel_j]
-    matrix[eq_idx.velocity,eq_idx.velocity] = (
+    matrix[...,eq_idx.velocity,eq_idx.velocity] = (
         2.0
         # dict_friction_factor[False]["total"]: total friction factor in Gauss 
         # points (see __init__ of class Channel for details).
@@ -293,8 +339,8 @@ def build_smat_fluid(
     
     # pressure equation: elements below main diagonal construction
     # (j+num_fluid_components,0:num_fluid_components) [Pres]
-    matrix[eq_idx.pressure,eq_idx.velocity] = (
-        - matrix[eq_idx.velocity,eq_idx.velocity]
+    matrix[...,eq_idx.pressure,eq_idx.velocity] = (
+        - matrix[...,eq_idx.velocity,eq_idx.velocity]
         * f_comp.coolant.dict_Gauss_pt["Gruneisen"][elem_idx]
         * f_comp.coolant.dict_Gauss_pt["total_density"][elem_idx]
         * velocity
@@ -302,8 +348,8 @@ def build_smat_fluid(
     
     # temperature equation: elements below main diagonal construction
     # (j+2*num_fluid_components,0:num_fluid_components) [Temp]
-    matrix[eq_idx.temperature,eq_idx.velocity] = (
-        - matrix[eq_idx.velocity,eq_idx.velocity]
+    matrix[...,eq_idx.temperature,eq_idx.velocity] = (
+        - matrix[...,eq_idx.velocity,eq_idx.velocity]
         / f_comp.coolant.dict_Gauss_pt["total_isochoric_specific_heat"][elem_idx]
         * velocity
     )
@@ -313,7 +359,7 @@ def build_smat_fluid(
 def build_smat_fluid_interface(
     matrix:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
 
     """Function that builds the S matrix (SMAT) therms due to fluid component interfaces at the Gauss point (SOURCE JACOBIAN).
@@ -321,7 +367,7 @@ def build_smat_fluid_interface(
     Args:
         matrix (np.ndarray): S matrix after call to function buld_smat_fluid.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -384,7 +430,7 @@ def __smat_fluid_interface(
     matrix:np.ndarray,
     comp_1:FluidComponent,
     comp_2:FluidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:dict,
     **kwargs
     )->np.ndarray:
@@ -394,7 +440,7 @@ def __smat_fluid_interface(
         matrix (np.ndarray): S matrix after call to function buld_smat_fluid.
         comp_1 (FluidComponent): fluid component object from which get all info to build the coefficients.
         comp_2 (FluidComponent): fluid component object from which get all info to build the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (dict): collection of NamedTuple with fluid equation index (velocity, pressure and temperaure equations).
     
     Kwargs:
@@ -442,6 +488,7 @@ def __smat_fluid_interface(
     s_vj_pj = (K1 * comp_1_v - K2) / (comp_1_A * comp_1_rho)
 
     matrix[
+        ...,
         eq_idx[comp_1.identifier].velocity,
         eq_idx[comp_1.identifier].pressure,
     ] -= s_vj_pj
@@ -449,6 +496,7 @@ def __smat_fluid_interface(
     # (j,k + num_fluid_components:2*num_fluid_components) 
     # [Pres_k]
     matrix[
+        ...,
         eq_idx[comp_1.identifier].velocity,
         eq_idx[comp_2.identifier].pressure,
     ] = s_vj_pj
@@ -469,6 +517,7 @@ def __smat_fluid_interface(
     )
 
     matrix[
+        ...,
         eq_idx[comp_1.identifier].pressure,
         eq_idx[comp_1.identifier].pressure,
     ] += s_pj_pj
@@ -477,6 +526,7 @@ def __smat_fluid_interface(
     # (j+num_fluid_components,\
     # k + num_fluid_components:2*num_fluid_components) [Pres_k]
     matrix[
+        ...,
         eq_idx[comp_1.identifier].pressure,
         eq_idx[comp_2.identifier].pressure,
     ] = - s_pj_pj
@@ -488,6 +538,7 @@ def __smat_fluid_interface(
     s_pj_tj = coef_grun_area * coef_htc
 
     matrix[
+        ...,
         eq_idx[comp_1.identifier].pressure,
         eq_idx[comp_1.identifier].temperature,
     ] += s_pj_tj
@@ -496,6 +547,7 @@ def __smat_fluid_interface(
     # k + 2*num_fluid_components:dict_N_equation
     # ["FluidComponent"]) [Temp_j]
     matrix[
+        ...,
         eq_idx[comp_1.identifier].pressure,
         eq_idx[comp_2.identifier].temperature,
     ] = - s_pj_tj
@@ -521,6 +573,7 @@ def __smat_fluid_interface(
     )
 
     matrix[
+        ...,
         eq_idx[comp_1.identifier].temperature,
         eq_idx[comp_1.identifier].pressure,
     ] += s_tj_pj
@@ -528,6 +581,7 @@ def __smat_fluid_interface(
     # (j+2*num_fluid_components,\
     # k + num_fluid_components:2*num_fluid_components) [Pres_k]
     matrix[
+        ...,
         eq_idx[comp_1.identifier].temperature,
         eq_idx[comp_2.identifier].pressure,
     ] = - s_tj_pj
@@ -541,6 +595,7 @@ def __smat_fluid_interface(
     s_tj_tj = coef_rho_cv_area * coef_htc
 
     matrix[
+        ...,
         eq_idx[comp_1.identifier].temperature,
         eq_idx[comp_1.identifier].temperature,
     ] += s_tj_tj
@@ -550,6 +605,7 @@ def __smat_fluid_interface(
     # (j+2*num_fluid_components,k + 2*num_fluid_components) 
     # [Temp_k]
     matrix[
+        ...,
         eq_idx[comp_1.identifier].temperature,
         eq_idx[comp_2.identifier].temperature,
     ] = - s_tj_tj
@@ -559,7 +615,7 @@ def __smat_fluid_interface(
 def build_smat_fluid_solid_interface(
     matrix:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
 
     """Function that builds the S matrix (SMAT) therms due to fluid-solid component interfaces at the Gauss point (SOURCE JACOBIAN).
@@ -567,7 +623,7 @@ def build_smat_fluid_solid_interface(
     Args:
         matrix (np.ndarray): S matrix after call to function buld_smat_fluid_interface.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (dict): collection of NamedTuple with fluid equation index (velocity, pressure and temperaure equations) and of integer for solid equation index.
 
     Returns:
@@ -613,12 +669,14 @@ def build_smat_fluid_solid_interface(
         s_pj_tj = coef_grun_area * coef_htc
 
         matrix[
+            ...,
             eq_idx[interface.comp_1.identifier].pressure,
             eq_idx[interface.comp_1.identifier].temperature
         ] += s_pj_tj
         
         # (j+num_fluid_components,l + dict_N_equation["FluidComponent"]) [Temp_l]
         matrix[
+            ...,
             eq_idx[interface.comp_1.identifier].pressure,
             eq_idx[interface.comp_2.identifier],
         ] = - s_pj_tj
@@ -640,6 +698,7 @@ def build_smat_fluid_solid_interface(
         s_tj_tj = coef_rho_cv_area * coef_htc
         
         matrix[
+            ...,
             eq_idx[interface.comp_1.identifier].temperature,
             eq_idx[interface.comp_1.identifier].temperature,
         ] += s_tj_tj
@@ -647,6 +706,7 @@ def build_smat_fluid_solid_interface(
         # temperature equation: above main diagonal elements construction
         # (j+2*num_fluid_components,l + dict_N_equation["FluidComponent"]) [Temp_l]
         matrix[
+            ...,
             eq_idx[interface.comp_1.identifier].temperature,
             eq_idx[interface.comp_2.identifier],
         ] = - s_tj_tj
@@ -655,6 +715,7 @@ def build_smat_fluid_solid_interface(
         # construction.
         # (l + dict_N_equation["FluidComponent"],l + dict_N_equation["FluidComponent"]) [Temp_l] I
         matrix[
+            ...,
             eq_idx[interface.comp_2.identifier],
             eq_idx[interface.comp_2.identifier],
         ] += coef_htc
@@ -663,6 +724,7 @@ def build_smat_fluid_solid_interface(
         # construction.
         # (l + dict_N_equation["FluidComponent"],l + 2*num_fluid_components) [Temp_j]
         matrix[
+            ...,
             eq_idx[interface.comp_2.identifier],
             eq_idx[interface.comp_1.identifier].temperature,
         ] = -coef_htc
@@ -672,7 +734,7 @@ def build_smat_fluid_solid_interface(
 def build_mmat_solid(
     matrix:np.ndarray,
     s_comp:SolidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:int,
     )->np.ndarray:
 
@@ -681,7 +743,7 @@ def build_mmat_solid(
     Args:
         matrix (np.ndarray): M matrix with the element from the fluid equations.
         s_comp (SolidComponent): solid component object from which get all info to build the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (int): solid component equation index.
 
     Returns:
@@ -691,7 +753,7 @@ def build_mmat_solid(
     # FORM THE M MATRIX AT THE GAUSS POINT (MASS AND CAPACITY)
     # SolidComponent (homogenized) equation.
     # A * rho *cp / cos(theta)
-    matrix[eq_idx, eq_idx] = (
+    matrix[...,eq_idx, eq_idx] = (
         s_comp.inputs["CROSSECTION"]
         * s_comp.dict_Gauss_pt["total_density"][elem_idx]
         * s_comp.dict_Gauss_pt["total_isobaric_specific_heat"][elem_idx]
@@ -703,7 +765,7 @@ def build_mmat_solid(
 def build_kmat_solid(
     matrix:np.ndarray,
     s_comp:SolidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:int,
     )->np.ndarray:
 
@@ -712,7 +774,7 @@ def build_kmat_solid(
     Args:
         matrix (np.ndarray): K matrix after call to build_kmat_fluid.
         s_comp (SolidComponent): solid component object from which get all info to build the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (int): solid component equation index.
 
     Returns:
@@ -721,7 +783,7 @@ def build_kmat_solid(
 
     # FORM THE K MATRIX AT THE GAUSS POINT (INCLUDING UPWIND)
     # A_{s_comp}*k_{s_comp,homo}; homo = homogenized
-    matrix[eq_idx,eq_idx] = (
+    matrix[...,eq_idx,eq_idx] = (
         s_comp.inputs["CROSSECTION"]
         * s_comp.dict_Gauss_pt["total_thermal_conductivity"][elem_idx]
         / s_comp.inputs["COSTETA"]
@@ -732,7 +794,7 @@ def build_kmat_solid(
 def build_smat_solid_interface(
     matrix:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
 
     """Function that builds the S matrix (SMAT) therms due to solid component interfaces at the Gauss point (SOURCE JACOBIAN).
@@ -740,7 +802,7 @@ def build_smat_solid_interface(
     Args:
         matrix (np.ndarray): S matrix after call to function build_smat_fluid_solid_interface.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -812,6 +874,7 @@ def __smat_solid_interface(
     # (l + dict_N_equation["FluidComponent"],l 
     # + dict_N_equation["FluidComponent"]) [Temp_l] II + III
     matrix[
+        ...,
         eq_idx[comp_1.identifier],
         eq_idx[comp_1.identifier],
         ] += coef_htc
@@ -821,6 +884,7 @@ def __smat_solid_interface(
     # (l + dict_N_equation["FluidComponent"],m 
     # + dict_N_equation["FluidComponent"]) [Temp_m]
     matrix[
+        ...,
         eq_idx[comp_1.identifier],
         eq_idx[comp_2.identifier],
     ] = - coef_htc
@@ -831,7 +895,7 @@ def build_smat_env_solid_interface(
     matrix:np.ndarray,
     conductor:Conductor,
     interface:NamedTuple,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
 
     """Function that builds the S matrix (SMAT) therms due to environment and solid component interfaces at the Gauss point (SOURCE JACOBIAN).
@@ -840,7 +904,7 @@ def build_smat_env_solid_interface(
         matrix (np.ndarray): S matrix after call to function build_smat_solid_interface.
         conductor (Conductor): object with all the information of the conductor.
         interface (NamedTuple): collection of interface information like interface name and components that constitute the interface.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -879,6 +943,7 @@ def build_smat_env_solid_interface(
         )
     # Update matrix coefficients.
     matrix[
+            ...,
             eq_idx[interface.comp_2.identifier],
             eq_idx[interface.comp_2.identifier],
         ] += coef_htc
@@ -888,7 +953,7 @@ def build_smat_env_solid_interface(
 def build_svec(
     array:np.ndarray,
     s_comp: SolidComponent,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     eq_idx:int,
     **kwargs,
     )->np.ndarray:
@@ -898,7 +963,7 @@ def build_svec(
     Args:
         array (np.ndarray): initialized SVEC array.
         s_comp (SolidComponent): solid component object from which get all info to build the coefficients.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         eq_idx (int): solid equation index.
 
     Kwargs:
@@ -923,25 +988,25 @@ def build_svec(
     # the dummy steady state corresponding to the initialization.
     if kwargs["num_step"] == 1:
         # Present time step.
-        array.present[eq_idx,0] = (
+        array.present[...,eq_idx,0] = (
             Q1[elem_idx,0] - qsource[elem_idx,comp_idx]
         )
-        array.present[eq_idx,1] = (
+        array.present[...,eq_idx,1] = (
             Q2[elem_idx,0] - qsource[elem_idx + 1, comp_idx]
         )
         # Previous time step.
-        array.previous[eq_idx,0] = (
+        array.previous[...,eq_idx,0] = (
             Q1[elem_idx,1] - qsource[elem_idx,comp_idx]
         )
-        array.previous[eq_idx,1] = (
+        array.previous[...,eq_idx,1] = (
             Q2[elem_idx,1] - qsource[elem_idx + 1, comp_idx]
         )
     else:
         # Compute only at the current time step.
-        array[eq_idx,0] = (
+        array[...,eq_idx,0] = (
             Q1[elem_idx,0] - qsource[elem_idx, comp_idx]
         )
-        array[eq_idx,1] = (
+        array[...,eq_idx,1] = (
             Q2[elem_idx,0] - qsource[elem_idx + 1, comp_idx]
         )
     
@@ -951,14 +1016,14 @@ def build_svec_env_jacket_interface(
     array:np.ndarray,
     conductor: Conductor,
     interface:NamedTuple,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
     """Function that builds the source vector (SVEC) terms at the Gauss point due to heat transfer by convection and/or radiation between environment and jacket component objects.
 
     Args:
         array (np.ndarray): SVEC array after call to function build_svec.
         interface (NamedTuple): collection of interface information like interface name and components that constitute the interface.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: array with updated elements.
@@ -1000,15 +1065,15 @@ def build_svec_env_jacket_interface(
 
         if conductor.cond_num_step == 1:
             # Present time step.
-            array.present[eq_idx[s_comp.identifier],0] += env_heat
-            array.present[eq_idx[s_comp.identifier],1] += env_heat
+            array.present[...,eq_idx[s_comp.identifier],0] += env_heat
+            array.present[...,eq_idx[s_comp.identifier],1] += env_heat
             # Previous time step.
-            array.previous[eq_idx[s_comp.identifier],0] += env_heat
-            array.previous[eq_idx[s_comp.identifier],1] += env_heat
+            array.previous[...,eq_idx[s_comp.identifier],0] += env_heat
+            array.previous[...,eq_idx[s_comp.identifier],1] += env_heat
         else:
             # Present time step.
-            array[eq_idx[s_comp.identifier],0] += env_heat
-            array[eq_idx[s_comp.identifier],1] += env_heat
+            array[...,eq_idx[s_comp.identifier],0] += env_heat
+            array[...,eq_idx[s_comp.identifier],1] += env_heat
 
     return array
 
@@ -1016,7 +1081,7 @@ def build_elmmat(
     matrix:np.ndarray,
     mmat:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     alpha:float=0,
     )->np.ndarray:
     """Function that builds the mass and capacity matrix (ELMMAT) at the Gauss point exploiting slicing.
@@ -1025,7 +1090,7 @@ def build_elmmat(
         matrix (np.ndarray): Initialized ELM matrix
         mmat (np.ndarray): mass and capacity matrix MMAT after call to function build_mmat_solid.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
         alpha (float, optional): Lumped/consistent mass parameter. Defaults to 0.
 
     Returns:
@@ -1040,6 +1105,10 @@ def build_elmmat(
     # Twice the number of degrees of freedom, used to slice ELMMAT matrix.
     ndf2 = conductor.dict_N_equation["NODOFS2"]
 
+    # Add trailing axes to broadcast the element length over the matrix (needed
+    # by the vectorized assembly).
+    dz = np.asarray(dz)[...,np.newaxis,np.newaxis]
+
     # Build diagonal block of the matrix.
     diag_block = dz * (1. / 3. + alpha) * mmat
     # Build off diagonal block of the matrix.
@@ -1047,10 +1116,10 @@ def build_elmmat(
     
     # COMPUTE THE MASS AND CAPACITY MATRIX
     # array smart
-    matrix[:ndf,:ndf] = diag_block
-    matrix[:ndf,ndf:ndf2] = off_diag_block
-    matrix[ndf:ndf2,:ndf] = off_diag_block
-    matrix[ndf:ndf2,ndf:ndf2] = diag_block
+    matrix[...,:ndf,:ndf] = diag_block
+    matrix[...,:ndf,ndf:ndf2] = off_diag_block
+    matrix[...,ndf:ndf2,:ndf] = off_diag_block
+    matrix[...,ndf:ndf2,ndf:ndf2] = diag_block
 
     return matrix
 
@@ -1078,10 +1147,10 @@ def build_elamat(
 
     block = amat / 2.
 
-    matrix[:ndf,:ndf] = -block
-    matrix[:ndf,ndf:ndf2] = block
-    matrix[ndf:ndf2,:ndf] = -block
-    matrix[ndf:ndf2,ndf:ndf2] = block
+    matrix[...,:ndf,:ndf] = -block
+    matrix[...,:ndf,ndf:ndf2] = block
+    matrix[...,ndf:ndf2,:ndf] = -block
+    matrix[...,ndf:ndf2,ndf:ndf2] = block
 
     return matrix
 
@@ -1089,7 +1158,7 @@ def build_elkmat(
     matrix:np.ndarray,
     kmat:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
     """
     Function that builds the diffusion matrix (ELKMAT) at the Gauss point exploiting slicing.
@@ -1098,7 +1167,7 @@ def build_elkmat(
         matrix (np.ndarray): Initialized ELK matrix.
         kmat (np.ndarray): mass and capacity matrix KMAT after call to function build_kmat_solid.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -1112,14 +1181,16 @@ def build_elkmat(
     # Twice the number of degrees of freedom, used to slice ELKMAT matrix.
     ndf2 = conductor.dict_N_equation["NODOFS2"]
 
-    block = kmat / dz
+    # Add trailing axes to broadcast the element length over the matrix (needed
+    # by the vectorized assembly).
+    block = kmat / np.asarray(dz)[...,np.newaxis,np.newaxis]
     
     # COMPUTE THE DIFFUSION MATRIX
     # array smart
-    matrix[:ndf,:ndf] = block
-    matrix[:ndf,ndf:ndf2] = - block
-    matrix[ndf:ndf2,:ndf] = - block
-    matrix[ndf:ndf2,ndf:ndf2] = block
+    matrix[...,:ndf,:ndf] = block
+    matrix[...,:ndf,ndf:ndf2] = - block
+    matrix[...,ndf:ndf2,:ndf] = - block
+    matrix[...,ndf:ndf2,ndf:ndf2] = block
 
     return matrix
 
@@ -1127,7 +1198,7 @@ def build_elsmat(
     matrix:np.ndarray,
     smat:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
     """
     Function that builds the source matrix (ELSMAT) at the Gauss point exploiting slicing.
@@ -1136,7 +1207,7 @@ def build_elsmat(
         matrix (np.ndarray): Initialized ELS matrix.
         smat (np.ndarray): source matrix SMAT after call to function build_smat_env_solid_interface.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: matrix with updated elements.
@@ -1150,22 +1221,24 @@ def build_elsmat(
     # Twice the number of degrees of freedom, used to slice ELSMAT matrix.
     ndf2 = conductor.dict_N_equation["NODOFS2"]
 
-    diag_block = smat * dz / 3.
+    # Add trailing axes to broadcast the element length over the matrix (needed
+    # by the vectorized assembly).
+    diag_block = smat * np.asarray(dz)[...,np.newaxis,np.newaxis] / 3.
     off_diag_block = diag_block / 2.
 
     # COMPUTE THE SOURCE MATRIX
     # array smart
-    matrix[:ndf,:ndf] = diag_block
-    matrix[:ndf,ndf:ndf2] = off_diag_block
-    matrix[ndf:ndf2,:ndf] = off_diag_block
-    matrix[ndf:ndf2,ndf:ndf2] = diag_block
+    matrix[...,:ndf,:ndf] = diag_block
+    matrix[...,:ndf,ndf:ndf2] = off_diag_block
+    matrix[...,ndf:ndf2,:ndf] = off_diag_block
+    matrix[...,ndf:ndf2,ndf:ndf2] = diag_block
 
     return matrix
 
 def build_elslod(array:np.ndarray,
     svec:np.ndarray,
     conductor:Conductor,
-    elem_idx:int,
+    elem_idx:Union[int,np.ndarray],
     )->np.ndarray:
     """
     Function that builds the source matrix (ELSLOD) at the Gauss point exploiting slicing.
@@ -1174,7 +1247,7 @@ def build_elslod(array:np.ndarray,
         array (np.ndarray): Initialized ELSLOD array.
         svec (np.ndarray): source array SVEC after call to function build_svec_env_jacket_interface.
         conductor (Conductor): object with all the information of the conductor.
-        elem_idx (int): index of the i-th element of the spatial discretization.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
 
     Returns:
         np.ndarray: array with updated elements.
@@ -1188,7 +1261,9 @@ def build_elslod(array:np.ndarray,
     # Twice the number of degrees of freedom, used to slice ELSMAT matrix.
     ndf2 = conductor.dict_N_equation["NODOFS2"]
 
-    dz_6 = dz / 6.
+    # Add a trailing axis to broadcast the element length over the array
+    # (needed by the vectorized assembly).
+    dz_6 = np.asarray(dz)[...,np.newaxis] / 6.
 
     # COMPUTE THE SOURCE VECTOR (ANALYTIC INTEGRATION)
     # array smart
@@ -1198,19 +1273,27 @@ def build_elslod(array:np.ndarray,
         # To correctly apply the theta method (to be rivisited in the whole 
         # code!).
         # Current time step
-        array.present[:ndf] = 2. * svec.present[:,0] + svec.present[:,1]
-        array.present[ndf:ndf2] = svec.present[:,0] + 2. * svec.present[:,1]
+        array.present[...,:ndf] = (
+            2. * svec.present[...,0] + svec.present[...,1]
+        )
+        array.present[...,ndf:ndf2] = (
+            svec.present[...,0] + 2. * svec.present[...,1]
+        )
         # Not use simply array.present: raises AttributeError
         array.present[:] *= dz_6
         # Previous time step
-        array.previous[:ndf] = 2. * svec.previous[:,0] + svec.previous[:,1]
-        array.previous[ndf:ndf2] = svec.previous[:,0] + 2. * svec.previous[:,1]
+        array.previous[...,:ndf] = (
+            2. * svec.previous[...,0] + svec.previous[...,1]
+        )
+        array.previous[...,ndf:ndf2] = (
+            svec.previous[...,0] + 2. * svec.previous[...,1]
+        )
         # Not use simply array.previous: raises AttributeError
         array.previous[:] *= dz_6
     else:
         # Compute only at the current time step
-        array[:ndf] = 2. * svec[:,0] + svec[:,1]
-        array[ndf:ndf2] = svec[:,0] + 2. * svec[:,1]
+        array[...,:ndf] = 2. * svec[...,0] + svec[...,1]
+        array[...,ndf:ndf2] = svec[...,0] + 2. * svec[...,1]
         array *= dz_6
     
     return array
@@ -1265,8 +1348,8 @@ def assemble_syslod(
     array:np.ndarray,
     conductor:Conductor,
     jump_idx:int,
-)->np.ndarray:
-    """Function that assembles the source term vector syslod exploiting the information stored in array ELSLOD.
+)->TimeHistory:
+    """Function that assembles the source term vector syslod exploiting the information stored in array ELSLOD. The time levels of syslod are updated in place; the rotation of the time levels at each time step is performed by function step.
 
     Args:
         array (np.ndarray): ELSLOD array after call to funciton build_elslod.
@@ -1274,27 +1357,28 @@ def assemble_syslod(
         jump_idx (int): index to jump over NODOFS * elem_idx position in syslod array, used to slice syslod.
 
     Returns:
-        np.ndarray: array with updated elements (the sliced updated part f syslod).
+        TimeHistory: time history of syslod with updated elements.
     """
 
     # Alias
     method = conductor.inputs["METHOD"]
     num_step = conductor.cond_num_step
     half = conductor.dict_band["Half"]
-    syslod = conductor.dict_Step["SYSLOD"][jump_idx:jump_idx + half,:]
+    syslod = conductor.dict_Step["SYSLOD"]
+    rows = slice(jump_idx,jump_idx + half)
     
     if method == "BE" or method == "CN":
         # Backward Euler or Crank-Nicolson
         if num_step == 1:
             # Construct key SYSLOD of dictionary dict_Step
             # Current time step
-            syslod[:,0] += array.present
+            syslod[0][rows] += array.present
             # Previous time step
-            syslod[:,1] += array.previous
+            syslod[1][rows] += array.previous
         else:
-            # Update only the first column, that correspond to the current time
+            # Update only the first level, that correspond to the current time
             # step
-            syslod[:,0] += array
+            syslod[0][rows] += array
     elif method == "AM4":
         # Adams-Moulton order 4
         # The implementation of higher order numerical schemes for time 
@@ -1302,27 +1386,108 @@ def assemble_syslod(
         if num_step == 1:
             # Construct key SYSLOD of dictionary dict_Step
             # Current time step
-            syslod[:,0] += array.present
+            syslod[0][rows] += array.present
             # This loop should be checked carefully!
-            for cc in range(syslod.shape[1]):
+            for level in range(syslod.n_levels):
                 # Dummy initial steady state
-                syslod[:,cc] += array.previous
+                syslod[level][rows] += array.previous
         else:
-            # Shift the colums by one towards right and compute the new first 
-            # column at the current time step
-            syslod[:,1:] = syslod[:,:3].copy()
-            syslod[:,0] += array
+            # Levels are already shifted by function step, compute the new 
+            # first level at the current time step
+            syslod[0][rows] += array
         # end if conductor.cond_num_step
     # end conductor.inputs["METHOD"]
 
     return syslod
 
+def assemble_matrix_vectorized(
+    fin_mat:dict,
+    el_mat:dict,
+    conductor:Conductor,
+    )->dict:
+    """Function that assembles matrices MASMAT, FLXMAT, DIFMAT and SORMAT starting from the values of matrices ELMMAT, ELAMAT, ELKMAT and ELSMAT of all the elements of the spatial discretization (stacked along the first axis), with the same matrix match of function assemble_matrix.
+    The contributions are summed in the same order of the element by element assembly, hence the result is identical to the one of function assemble_matrix.
+
+    Args:
+        fin_mat (dict): collection of matrices MASMAT, FLXMAT, DIFMAT and SORMAT.
+        el_mat (dict): collection of stacked matrices ELMMAT, ELAMAT, ELKMAT and ELSMAT, each of shape (NELEMS,NODOFS2,NODOFS2).
+        conductor (Conductor): object with all the information of the conductor.
+
+    Returns:
+        dict: collection of matrices MASMAT, FLXMAT, DIFMAT and SORMAT with updated elements.
+    """
+
+    # Rows of the second node of element i are summed before the rows of the
+    # first node of element i + 1 (shared node), as in the element loop; 
+    # index are evaluated once per mesh in method Conductor.initialization.
+    for node_rows, row_idx, col_idx in conductor.sparse_pattern[
+        "assembly_index"
+    ]:
+        for fmat, elmat in zip(fin_mat.values(),el_mat.values()):
+            fmat[row_idx,col_idx[:,:,np.newaxis]] += elmat[:,node_rows,:]
+
+    return fin_mat
+
+def assemble_syslod_vectorized(
+    array:np.ndarray,
+    conductor:Conductor,
+)->TimeHistory:
+    """Function that assembles the source term vector syslod exploiting the information stored in array ELSLOD of all the elements of the spatial discretization (stacked along the first axis).
+    The contributions are summed in the same order of the element by element assembly, hence the result is identical to the one of function assemble_syslod.
+
+    Args:
+        array (np.ndarray): ELSLOD array after call to funciton build_elslod, of shape (NELEMS,NODOFS2).
+        conductor (Conductor): object with all the information of the conductor.
+
+    Returns:
+        TimeHistory: time history of syslod with updated elements.
+    """
+
+    # Alias
+    method = conductor.inputs["METHOD"]
+    num_step = conductor.cond_num_step
+    syslod = conductor.dict_Step["SYSLOD"]
+
+    # Rows of the second node of element i are summed before the rows of the
+    # first node of element i + 1 (shared node), as in the element loop; 
+    # index are evaluated once per mesh in method Conductor.initialization.
+    for node_rows, _, rows in conductor.sparse_pattern["assembly_index"]:
+        if num_step == 1:
+            present = array.present[:,node_rows]
+            previous = array.previous[:,node_rows]
+        else:
+            present = array[:,node_rows]
+        
+        if method == "BE" or method == "CN":
+            # Backward Euler or Crank-Nicolson
+            if num_step == 1:
+                # Current time step
+                syslod[0][rows] += present
+                # Previous time step
+                syslod[1][rows] += previous
+            else:
+                syslod[0][rows] += present
+        elif method == "AM4":
+            # Adams-Moulton order 4
+            if num_step == 1:
+                syslod[0][rows] += present
+                for level in range(syslod.n_levels):
+                    # Dummy initial steady state
+                    syslod[level][rows] += previous
+            else:
+                # Levels are already shifted by function step.
+                syslod[0][rows] += present
+            # end if conductor.cond_num_step
+        # end conductor.inputs["METHOD"]
+
+    return syslod
+
 def eval_system_matrix(
     matrix:np.ndarray,
     aux_matrices:dict,
     conductor:Conductor,
     )->np.ndarray:
-    """Function that evaluates the system matrix using the values of the matrix MASMAT, FLXMAT, DIFMAT and SORMAT, according to the selected method for time integration.
+    """Function that evaluates the system matrix using the values of the matrix MASMAT, FLXMAT, DIFMAT and SORMAT, according to the selected method for time integration. The system matrix is evaluated in place.
 
     Args:
         matrix (np.ndarray): initialized SYSMAT matrix
@@ -1340,10 +1505,11 @@ def eval_system_matrix(
     # ** COMPUTE SYSTEM MATRIX **
     if method == "BE" or method == "CN":
         # Backward Euler or Crank-Nicolson
-        matrix = (
-            masmat / conductor.time_step
-            + conductor.theta_method * (flxmat + difmat + sormat)
-        )
+        # matrix = masmat / time_step + theta * (flxmat + difmat + sormat)
+        np.add(flxmat, difmat, out=matrix)
+        matrix += sormat
+        matrix *= conductor.theta_method
+        matrix += masmat / conductor.time_step
         
     elif method == "AM4":
         # Adams-Moulton order 4
@@ -1351,15 +1517,17 @@ def eval_system_matrix(
         am4_aa = conductor.dict_Step["AM4_AA"] # shallow copy
         if conductor.cond_num_step == 1:
             # This is due to the dummy initial steady state
-            for cc in range(am4_aa.shape[2]):
-                am4_aa[cc,:,:] = flxmat + difmat + sormat
+            for level in range(am4_aa.n_levels):
+                np.add(flxmat, difmat, out=am4_aa[level])
+                am4_aa[level] += sormat
         else:
-            # Shift the matrices by one towards right and compute the new first
+            # Rotate the time levels (no copy) and compute the new first
             # matrix at the current time step.
-            am4_aa[1:4,:,:] = am4_aa[0:3,:,:]
-            am4_aa[0,:,:] = flxmat + difmat + sormat
+            np.add(flxmat, difmat, out=am4_aa.advance())
+            am4_aa[0] += sormat
         # compute SYSMAT
-        matrix = masmat / conductor.time_step + 9. / 24. * am4_aa[0,:,:]
+        np.multiply(9. / 24., am4_aa[0], out=matrix)
+        matrix += masmat / conductor.time_step
     
     return matrix
 
@@ -1380,9 +1548,7 @@ def build_known_therm_vector(
     """
 
     # Alias
-    total = conductor.dict_N_equation["Total"]
-    half = conductor.dict_band["Half"]
-    half_1 = half - 1
+    half_1 = conductor.dict_band["Half"] - 1
     method = conductor.inputs["METHOD"]
     syslod = conductor.dict_Step["SYSLOD"] # shallow copy
     sysvar = conductor.dict_Step["SYSVAR"] # shallow copy
@@ -1396,72 +1562,41 @@ def build_known_therm_vector(
     masmat,flxmat,difmat,sormat = aux_matrices.values()
     
     # ADD THE LOAD CONTRIBUTION FROM PREVIOUS STEP
-    # c_mat_idx: column index of the auxiliary matrices (MASMAT,FLXMAT,DIFMAT,
-    # SORMAT); used also as row index of the known term vector.
-    for c_mat_idx in range(total):
-        if c_mat_idx <= half_1:
-            # remember that arange stops before the stop value:
-            # last value = stop - step
-            # r_arr_idx: row index of the sysvar array
-            r_arr_idx = np.arange(
-                start=0,
-                stop=half + c_mat_idx,
-                step=1,
-                dtype=int,
-            )
-        elif c_mat_idx >= total - half_1:
-            r_arr_idx = np.arange(
-                start=c_mat_idx - half_1,
-                stop=total,
-                step=1,
-                dtype=int,
-            )
-        else:
-            r_arr_idx = np.arange(
-                start=c_mat_idx - half_1,
-                stop=c_mat_idx + half,
-                step=1,
-                dtype=int,
-            )
-        # r_mat_idx: row index of the auxiliary matrices (MASMAT,FLXMAT,DIFMAT,
-        # SORMAT)
-        r_mat_idx = r_arr_idx - c_mat_idx + half_1
-        if method == "BE" or method == "CN":
-            # Backward Euler or Crank-Nicolson
-            # Matrix vector product contribution
-            array[c_mat_idx] = np.sum(
-                (
-                    masmat[r_mat_idx,c_mat_idx] / conductor.time_step
-                    - (1.0 - conductor.theta_method)
-                    * (
-                        flxmat[r_mat_idx, c_mat_idx]
-                        + difmat[r_mat_idx, c_mat_idx]
-                        + sormat[r_mat_idx, c_mat_idx]
-                    )
-                )
-                * sysvar[r_arr_idx,0]
-            )
-        elif method == "AM4":
-            # Adams-Moulton order 4
-            # Matrices vectors product contribution
-            # np.sum(am4_coef[2:] * am4_aa[2:,r_mat_idx,c_mat_idx].T * sysvar[r_arr_idx,1:3],1) should be equivalent to 5. / 24.* am4_aa[2,r_mat_idx,c_mat_idx] * sysvar[r_arr_idx, 1] - 1. / 24. * am4_aa[3,r_mat_idx,c_mat_idx] * sysvar[r_arr_idx, 2]
-            array[c_mat_idx] = np.sum(
-                (
-                    masmat[r_mat_idx, c_mat_idx] / conductor.time_step
-                    - am4_coef[1] * am4_aa[1,r_mat_idx,c_mat_idx]
-                ) * sysvar[r_arr_idx,0] # array of shape (r_arr_idx.shape[0],)
-                + np.sum(
-                    am4_coef[2:] * am4_aa[2:,r_mat_idx,c_mat_idx].T
-                    * sysvar[r_arr_idx,1:3],1
-                ) # array of shape (r_arr_idx.shape[0],)
-            ) # array of shape (1,)
+    # Banded matrix vector products (array smart, see function band_matvec).
+    if method == "BE" or method == "CN":
+        # Backward Euler or Crank-Nicolson
+        # Matrix vector product contribution
+        array[:] = band_matvec(
+            masmat / conductor.time_step
+            - (1.0 - conductor.theta_method) * (flxmat + difmat + sormat),
+            sysvar[:,0],
+        )
+    elif method == "AM4":
+        # Adams-Moulton order 4
+        # Matrices vectors product contribution; sliding windows of sysvar 
+        # columns are aligned with the band storage.
+        window = [
+            band_sliding_window(sysvar[:,cc], half_1)
+            for cc in range(sysvar.shape[1])
+        ]
+        array[:] = np.sum(
+            (
+                masmat / conductor.time_step
+                - am4_coef[1] * am4_aa[1]
+            ).T * window[0]
+            + (
+                am4_coef[2] * am4_aa[2].T * window[1]
+                + am4_coef[3] * am4_aa[3].T * window[2]
+            ),
+            axis=1,
+        )
 
     if method == "BE" or method == "CN":
         # Backward Euler or Crank-Nicolson
         # External sources (SYSLOD) contribution
         array += (
-            + conductor.theta_method * syslod[:,0]
-            + (1.0 - conductor.theta_method) * syslod[:,1]
+            + conductor.theta_method * syslod[0]
+            + (1.0 - conductor.theta_method) * syslod[1]
         )
     elif method == "AM4":
         # Adams-Moulton order 4
@@ -1469,6 +1604,6 @@ def build_known_therm_vector(
         # Chance coefficient sign to exploit sum (array smart).
         am4_coef[2:] = - am4_coef[2:]
         # External sources (SYSLOD) contribution
-        array += np.sum(am4_coef * syslod,1)
+        array += np.sum(am4_coef * syslod.stack(axis=1),1)
 
     return array
\ No newline at end of file
@@ -3,12 +3,22 @@
 import numpy as np
 import os
 from scipy.linalg import solve_banded
+from scipy.linalg.lapack import dgbtrf, dgbtrs
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
 from utility_functions.auxiliary_functions import (
     get_from_xlsx,
 )
 from typing import Union
 
 from conductor import Conductor
+from conductor_flags import (
+    VECTORIZED_ASSEMBLY,
+    GAUSS_BANDED_SOLVER,
+    LAPACK_BANDED_SOLVER,
+    SPARSE_LU_SOLVER,
+    IADAPTIME_ERROR_CONTROL,
+)
 from utility_functions.step_matrix_construction import (
     matrix_initialization,
     array_initialization,
@@ -31,10 +41,31 @@ from utility_functions.step_matrix_construction import (
     build_elslod,
     assemble_matrix,
     assemble_syslod,
+    assemble_matrix_vectorized,
+    assemble_syslod_vectorized,
     eval_system_matrix,
     build_known_therm_vector,
 )
 
+# Default relative and absolute tolerances on the local truncation error of 
+# each variable group for the error controlled time step selection; they can 
+# be overwritten by keys RTOL_<GROUP> and ATOL_<GROUP> of the transient input.
+ERROR_TOLERANCES = dict(
+    # (-, m/s)
+    VELOCITY=(1e-3, 1e-3),
+    # (-, Pa)
+    PRESSURE=(1e-3, 1e1),
+    # (-, K)
+    TEMPERATURE=(1e-3, 1e-2),
+)
+# Safety factor and limits of the time step change of the PI controller.
+PI_SAFETY = 0.9
+PI_FACTOR_MIN = 0.2
+PI_FACTOR_MAX = 5.0
+# Order of the error estimate plus one, used in the exponents of the PI 
+# controller.
+PI_ORDER = 2
+
 def get_time_step(conductor, transient_input, num_step):
 
     """
@@ -66,6 +97,19 @@ def get_time_step(conductor, transient_input, num_step):
             )  # crb (March 9, 2011)
             return
 
+        if transient_input["IADAPTIME"] == IADAPTIME_ERROR_CONTROL:
+            # Time step proposed by the PI controller at the last accepted 
+            # time step (see function eval_error_controlled_time_step).
+            conductor.time_step = max(
+                conductor.error_control["next_time_step"],
+                transient_input["STPMIN"],
+            )
+            # C * LIMIT THE TIME STEP IF PRINT-OUT OR STORAGE IS REQUIRED
+            conductor.time_step = min(
+                conductor.time_step, transient_input["TEND"] - conductor.cond_time[-1]
+            )
+            return
+
         # Ad hoc to emulate time adaptivity for simulation whith feeder CS3U2.
         # Do not use STPMIN; it is tuned on the AC loss time evolution.
         if transient_input["IADAPTIME"] == 3:
@@ -183,6 +227,95 @@ def get_time_step(conductor, transient_input, num_step):
         # C --------------
         # caf end *********************************************** June 26, 2015
 
+def eval_local_error(conductor:Conductor, transient_input:dict)->float:
+    """Function that evaluates the norm of the local truncation error of the solution at the current time step, used by the error controlled time step selection.
+    The error is estimated as the difference between the implicit solution and the linear extrapolation of the solutions at the last two accepted time steps (predictor), scaled by dt / (dt + dt_old) (Milne device for the Backward Euler method; conservative for the Crank-Nicolson method). Each variable group (velocity, pressure, temperature) is weighted by its relative and absolute tolerances, that are read from keys RTOL_<GROUP> and ATOL_<GROUP> of the transient input (defaults in ERROR_TOLERANCES).
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        transient_input (dict): collection of the transient input data.
+
+    Returns:
+        float: maximum over the unknowns of the root mean square of the scaled error along the spatial discretization; the time step is accepted if it is not larger than 1.
+    """
+
+    # Alias
+    ndf = conductor.dict_N_equation["NODOFS"]
+    n_fluid = conductor.inventory["FluidComponent"].number
+    control = conductor.error_control
+    time_step = conductor.time_step
+    solution = conductor.dict_Step["SYSVAR_NODAL"]
+    sol_old = control["solution"][0].reshape(-1, ndf)
+    sol_old_old = control["solution"][1].reshape(-1, ndf)
+
+    # Relative and absolute tolerances of each unknown: velocities, pressures 
+    # and temperatures of FluidComponent objects, then temperatures of 
+    # SolidComponent objects.
+    rtol = np.empty(ndf)
+    atol = np.empty(ndf)
+    for group, columns in (
+        ("VELOCITY", slice(0, n_fluid)),
+        ("PRESSURE", slice(n_fluid, 2 * n_fluid)),
+        ("TEMPERATURE", slice(2 * n_fluid, ndf)),
+    ):
+        rtol[columns] = transient_input.get(
+            f"RTOL_{group}", ERROR_TOLERANCES[group][0]
+        )
+        atol[columns] = transient_input.get(
+            f"ATOL_{group}", ERROR_TOLERANCES[group][1]
+        )
+
+    # Linear extrapolation of the last two accepted solutions.
+    predictor = sol_old + time_step / control["time_step"] * (sol_old - sol_old_old)
+    error = time_step / (time_step + control["time_step"]) * (solution - predictor)
+    scale = atol + rtol * np.maximum(np.abs(solution), np.abs(sol_old))
+
+    return np.max(np.sqrt(np.mean((error / scale) ** 2, axis=0)))
+
+def eval_error_controlled_time_step(
+    conductor:Conductor,
+    error:float,
+    accepted:bool,
+)->float:
+    """Function that evaluates the new time step with a PI controller: after an accepted time step the new time step is dt * SAFETY * error^(-0.7 / k) * error_old^(0.4 / k), after a rejected time step it is dt * SAFETY * error^(-1 / k); the factor is limited in [PI_FACTOR_MIN, PI_FACTOR_MAX].
+    If the time step is accepted the data of the error control are updated (solution history, time step, error and counter of accepted time steps), else only the counter of the rejected time steps is updated.
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        error (float): norm of the local truncation error (see function eval_local_error).
+        accepted (bool): flag to distinguish between accepted and rejected time steps.
+
+    Returns:
+        float: the new time step.
+    """
+
+    # Alias
+    control = conductor.error_control
+    # Avoid division by zero.
+    error = max(error, 1e-10)
+    if accepted:
+        factor = (
+            PI_SAFETY
+            * error ** (- 0.7 / PI_ORDER)
+            * control["error"] ** (0.4 / PI_ORDER)
+        )
+        # Update the history of the accepted solutions (no copy of the old 
+        # levels).
+        control["solution"].advance()
+        control["solution"][0] = conductor.dict_Step["SYSVAR"][:, 0]
+        control["time_step"] = conductor.time_step
+        control["error"] = error
+        control["accepted"] += 1
+    else:
+        # The time step is always reduced after a rejection.
+        factor = min(PI_SAFETY * error ** (- 1.0 / PI_ORDER), PI_SAFETY)
+        control["rejected"] += 1
+    
+    control["next_time_step"] = conductor.time_step * min(
+        max(factor, PI_FACTOR_MIN), PI_FACTOR_MAX
+    )
+    return control["next_time_step"]
+
 def step(conductor, environment, qsource, num_step):
 
     """
@@ -210,37 +343,45 @@ def step(conductor, environment, qsource, num_step):
     # CLUCA ADDNOD = MAXNOD*(ICOND-1)
 
     # Collection of valid dictionary keys
-    basic_mat_names = ("MMAT","AMAT","KMAT","SMAT")
-    element_mat_names = ("ELMMAT","ELAMAT","ELKMAT","ELSMAT")
     final_mat_names = ("MASMAT","FLXMAT","DIFMAT","SORMAT")
 
+    # Preallocated buffers of the conductor, released only if the number of 
+    # nodes changes.
+    workspace = conductor.workspace
+    workspace.resize(conductor.grid_features["N_nod"])
+
     # Final matrices initialization, collected in dictionary final_mat
     final_mat = matrix_initialization(
         conductor.dict_band["Full"],
         conductor.dict_N_equation["Total"],
         final_mat_names,
+        workspace=workspace,
     )
 
     # Stiffness matrix initialization. Not included in dictionary final_mat to 
     # simplify the code below, make it explicit and clear to read and maintain.
-    SYSMAT = np.zeros(
-        (conductor.dict_band["Full"],conductor.dict_N_equation["Total"])
+    SYSMAT = workspace.zeros(
+        "SYSMAT",
+        (conductor.dict_band["Full"],conductor.dict_N_equation["Total"]),
     )
     # SYSVAR = np.zeros(conductor.dict_N_equation["Total"])
-    ASCALING = np.zeros(conductor.dict_N_equation["Total"])
-    UPWEQT = np.zeros(conductor.dict_N_equation["NODOFS"])
+    ASCALING = workspace.zeros("ASCALING",(conductor.dict_N_equation["Total"],))
+    UPWEQT = workspace.zeros("UPWEQT",(conductor.dict_N_equation["NODOFS"],))
     # Known terms vector initilaization
-    Known = np.zeros_like(ASCALING)
+    Known = workspace.zeros("Known",ASCALING.shape)
     
-    if conductor.inputs["METHOD"] == "BE" or conductor.inputs["METHOD"] == "CN":
-        # Backward Euler or Crank-Nicolson (cdp, 10/2020)
-        if conductor.cond_num_step > 1:
-            # Copy the load vector at the previous time step in the second column to \
-            # correctly apply the theta method (cdp, 10/2020)
-            conductor.dict_Step["SYSLOD"][:, 1] = conductor.dict_Step["SYSLOD"][
-                :, 0
-            ].copy()
-            conductor.dict_Step["SYSLOD"][:, 0] = 0.0
+    if conductor.cond_num_step > 1:
+        if conductor.inputs["METHOD"] == "BE" or conductor.inputs["METHOD"] == "CN":
+            # Backward Euler or Crank-Nicolson (cdp, 10/2020)
+            # The load vector at the current time step becomes the one at the \
+            # previous time step to correctly apply the theta method; the time \
+            # levels are rotated (no copy) and the current one is set to zeros.
+            conductor.dict_Step["SYSLOD"].advance()
+        elif conductor.inputs["METHOD"] == "AM4":
+            # Adams-Moulton order 4
+            # Rotate the time levels once per time step; the current level \
+            # starts from the values at the previous time step.
+            conductor.dict_Step["SYSLOD"].advance(carry=True)
 
     # qsource initialization to zeros (cdp, 07/2020)
     # questa inizializzazione è provvisoria, da capire cosa succede quando ci \
@@ -276,221 +417,53 @@ def step(conductor, environment, qsource, num_step):
     # cl* * * * * * * * * * * * * * * * * * * * * * * * * * * * *
 
     # ** MATRICES CONSTRUCTION **
-
-    # riscrivere in forma array smart una volta risolti tutti i dubbi, se possibile (cdp, 07/2020)
-    for elem_index in range(conductor.grid_input["NELEMS"]):
-        
-        # Basic matrices initialization to zeros at each Gauss point, collected 
-        # in dictionary basic_mat.
-        basic_mat = matrix_initialization(
-            conductor.dict_N_equation["NODOFS"],
-            conductor.dict_N_equation["NODOFS"],
-            basic_mat_names,
-        )
-        # Basic source term vector initialization to zeros at each Gauss point. 
-        # Not included in dictionary base_mat to simplify the code, make it 
-        # explicit and easy to read and maintain.
-        SVEC = array_initialization(
-            conductor.dict_N_equation["NODOFS"],
-            conductor.cond_num_step,
-            col=2,
-        )
-
-        # Element matrices initialization to zeros at each Gauss point, 
-        # collected in dictionary element_mat.
-        element_mat = matrix_initialization(
-            conductor.dict_N_equation["NODOFS2"],
-            conductor.dict_N_equation["NODOFS2"],
-            element_mat_names,
-        )
-        # Element source term vector initialization to zeros at each Gauss 
-        # point. Not included in dictionary element_mat to simplify the code, 
-        # make it explicit and easy to read and maintain.
-        ELSLOD = array_initialization(
-            conductor.dict_N_equation["NODOFS2"],
-            conductor.cond_num_step,
-        )
-        
-        # ** FORM THE M, A, K, S MATRICES AND S VECTOR AT THE GAUSS POINT, 
-        # FLUID COMPONENTS EQUATIONS **
-
-        # FORM THE M MATRIX AT THE GAUSS POINT (MASS AND CAPACITY)
-        # FluidComponent equation: array smart
-        basic_mat["MMAT"][
-            :conductor.dict_N_equation["FluidComponent"],
-            :conductor.dict_N_equation["FluidComponent"],
-        ] = np.eye(conductor.dict_N_equation["FluidComponent"])
-        # END M MATRIX: fluid components equations
-        
-        for fluid_comp_j in conductor.inventory["FluidComponent"].collection:
-
-            # FORM THE A MATRIX AT THE GAUSS POINT (FLUX JACOBIAN)
-            basic_mat["AMAT"] = build_amat(
-                basic_mat["AMAT"],
-                fluid_comp_j,
-                elem_index,
-                conductor.equation_index[fluid_comp_j.identifier]
-            )
-
-            # FORM THE K MATRIX AT THE GAUSS POINT (INCLUDING UPWIND)
-            basic_mat["KMAT"] = build_kmat_fluid(
-                basic_mat["KMAT"],
-                UPWEQT,
-                fluid_comp_j,
-                conductor,
-                elem_index,
-            )
-
-            # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
-            basic_mat["SMAT"] = build_smat_fluid(
-                basic_mat["SMAT"],
-                fluid_comp_j,
-                elem_index,
-                conductor.equation_index[fluid_comp_j.identifier]
-            )
-
-        # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
-        # Therms associated to fluid-fluid interfaces.
-        basic_mat["SMAT"] = build_smat_fluid_interface(
-            basic_mat["SMAT"],
-            conductor,
-            elem_index
-        )
-        # Therms associated to fluid-solid interfaces.
-        basic_mat["SMAT"] = build_smat_fluid_solid_interface(
-            basic_mat["SMAT"],
+    if conductor.assembly_mode == VECTORIZED_ASSEMBLY:
+        # Build the element matrices of all the elements at once (stacked 
+        # along the first axis) and assemble them with a single scatter.
+        elem_index = np.arange(conductor.grid_input["NELEMS"])
+        element_mat, ELSLOD = build_element_matrices(
             conductor,
+            qsource,
+            UPWEQT,
+            ALFA,
             elem_index,
+            conductor.grid_input["NELEMS"],
         )
-        # END S MATRIX: fluid components equations
-
-        # * FORM THE M, A, K, S MATRICES AND S VECTOR AT THE GAUSS POINT, SOLID
-        # COMPONENTS EQUATIONS *
-        for s_comp_idx, s_comp in enumerate(
-            conductor.inventory["SolidComponent"].collection
-        ):
-            # FORM THE M MATRIX AT THE GAUSS POINT (MASS AND CAPACITY)
-            # SolidComponent equation.
-            basic_mat["MMAT"] = build_mmat_solid(
-                basic_mat["MMAT"],
-                s_comp,
-                elem_index,
-                conductor.equation_index[s_comp.identifier]
-            )
-            # END M MATRIX: SolidComponent equation.
-
-            # FORM THE A MATRIX AT THE GAUSS POINT (FLUX JACOBIAN)
-            # No elements here.
-            # END A MATRIX: SolidComponent equation.
-
-            # FORM THE K MATRIX AT THE GAUSS POINT (INCLUDING UPWIND)
-            basic_mat["KMAT"] = build_kmat_solid(
-                basic_mat["KMAT"],
-                s_comp,
-                elem_index,
-                conductor.equation_index[s_comp.identifier]
-            )
-            # END K MATRIX: SolidComponent equation.
-
-            # FORM THE S VECTOR AT THE NODAL POINTS (SOURCE)
-            SVEC = build_svec(
-                SVEC,
-                s_comp,
-                elem_index,
-                conductor.equation_index[s_comp.identifier],
-                num_step=conductor.cond_num_step,
-                qsource=qsource,
-                comp_idx=s_comp_idx,
-            )
-
-        # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
-        basic_mat["SMAT"] = build_smat_solid_interface(
-            basic_mat["SMAT"],
+        
+        # ASSEMBLE THE MATRICES AND THE LOAD VECTOR
+        final_mat = assemble_matrix_vectorized(
+            final_mat,
+            element_mat,
             conductor,
-            elem_index,
         )
+        assemble_syslod_vectorized(ELSLOD,conductor)
+    else:
+        # ELEMENT_WISE_ASSEMBLY
+        for elem_index in range(conductor.grid_input["NELEMS"]):
 
-        for interface in conductor.interface.env_solid:
-            # Convective heating with the external environment (implicit 
-            # treatment).
-            basic_mat["SMAT"] = build_smat_env_solid_interface(
-                basic_mat["SMAT"],
+            element_mat, ELSLOD = build_element_matrices(
                 conductor,
-                interface,
+                qsource,
+                UPWEQT,
+                ALFA,
                 elem_index,
             )
-            # END S MATRIX: solid components equation.
 
-            SVEC = build_svec_env_jacket_interface(
-                SVEC,
+            # ASSEMBLE THE MATRICES AND THE LOAD VECTOR
+            
+            jump = conductor.dict_N_equation["NODOFS"] * elem_index
+            
+            # array smart
+            final_mat = assemble_matrix(
+                final_mat,
+                element_mat,
                 conductor,
-                interface,
-                elem_index,
+                jump,
             )
-            # END S VECTOR: solid components equation.
-
-        # COMPUTE THE MASS AND CAPACITY MATRIX
-        # array smart
-        element_mat["ELMMAT"] = build_elmmat(
-            element_mat["ELMMAT"],
-            basic_mat["MMAT"],
-            conductor,
-            elem_index,
-            ALFA,
-        )
-
-        # COMPUTE THE CONVECTION MATRIX
-        # array smart
-        element_mat["ELAMAT"] = build_elamat(
-            element_mat["ELAMAT"],
-            basic_mat["AMAT"],
-            conductor,
-        )
-
-        # COMPUTE THE DIFFUSION MATRIX
-        # array smart
-        element_mat["ELKMAT"] = build_elkmat(
-            element_mat["ELKMAT"],
-            basic_mat["KMAT"],
-            conductor,
-            elem_index,
-        )
-
-        # COMPUTE THE SOURCE MATRIX
-        # array smart
-        element_mat["ELSMAT"] = build_elsmat(
-            element_mat["ELSMAT"],
-            basic_mat["SMAT"],
-            conductor,
-            elem_index,
-        )
-
-        # COMPUTE THE SOURCE VECTOR (ANALYTIC INTEGRATION)
-        # array smart
-        ELSLOD = build_elslod(
-            ELSLOD,
-            SVEC,
-            conductor,
-            elem_index,
-        )
-        
-        # ASSEMBLE THE MATRICES AND THE LOAD VECTOR
-        
-        jump = conductor.dict_N_equation["NODOFS"] * elem_index
-        
-        # array smart
-        final_mat = assemble_matrix(
-            final_mat,
-            element_mat,
-            conductor,
-            jump,
-        )
 
-        conductor.dict_Step["SYSLOD"][
-            jump:jump + conductor.dict_band["Half"],:
-        ] = assemble_syslod(ELSLOD,conductor,jump)
+            assemble_syslod(ELSLOD,conductor,jump)
 
-    # end for elem_index
+        # end for elem_index
     # ** END MATRICES CONSTRUCTION **
 
     # ** COMPUTE SYSTEM MATRIX **
@@ -535,7 +508,7 @@ def step(conductor, environment, qsource, num_step):
     # DIAGONAL ROW SCALING
 
     # SELECT THE MAX FOR EACH ROW
-    ASCALING = abs(SYSMAT).max(0)
+    np.abs(SYSMAT).max(0, out=ASCALING)
     ind_ASCALING = np.nonzero(ASCALING == 0.0)
     # ind_ASCALING = np.nonzero(ASCALING <= 1e-6)
     if ind_ASCALING[0].shape == 0:
@@ -545,10 +518,10 @@ def step(conductor, environment, qsource, num_step):
         )
 
     # SCALE THE SYSTEM MATRIX
-    SYSMAT = SYSMAT / ASCALING
+    SYSMAT /= ASCALING
 
     # SCALE THE LOAD VECTOR
-    Known = Known / ASCALING
+    Known /= ASCALING
 
     old_temperature_gauss = {
         obj.identifier: obj.coolant.dict_Gauss_pt["temperature"]
@@ -561,10 +534,12 @@ def step(conductor, environment, qsource, num_step):
         }
     )
 
-    SYSMAT = gredub(conductor, SYSMAT)
-    # Compute the solution at current time stepand overwrite key SYSVAR of \
-    # dict_Step
-    conductor.dict_Step["SYSVAR"][:, 0] = gbacsb(conductor, SYSMAT, Known)
+    # Compute the solution at current time step with the selected linear 
+    # solver and overwrite key SYSVAR of dict_Step; the solution is also 
+    # stored in Known.
+    conductor.dict_Step["SYSVAR"][:, 0] = LINEAR_SOLVERS[
+        conductor.th_linear_solver
+    ](conductor, SYSMAT, Known)
 
     # SYSVAR = solve_banded((15, 15), SYSMAT, Known)
 
@@ -599,6 +574,239 @@ def step(conductor, environment, qsource, num_step):
     # VARIABLES FROM THE SYSTEM SOLUTION (END)
 
 
+def build_element_matrices(
+    conductor:Conductor,
+    qsource:np.ndarray,
+    upweqt:np.ndarray,
+    alfa:float,
+    elem_idx:Union[int,np.ndarray],
+    n_elem:int=0,
+    )->tuple:
+    """Function that builds the element matrices ELMMAT, ELAMAT, ELKMAT and ELSMAT and the element source term vector ELSLOD at the Gauss point of the element(s) of index elem_idx.
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        qsource (np.ndarray): matrix with heat due to thermal contact between jacket components of different conductors.
+        upweqt (np.ndarray): array with the upwind numerical scheme.
+        alfa (float): lumped/consistent mass parameter.
+        elem_idx (Union[int,np.ndarray]): index of the i-th element of the spatial discretization (array with the index of all the elements for the vectorized assembly).
+        n_elem (int, optional): number of elements in elem_idx for the vectorized assembly; 0 for the element by element assembly. Defaults to 0.
+
+    Returns:
+        tuple: dictionary with element matrices ELMMAT, ELAMAT, ELKMAT and ELSMAT and element source term vector ELSLOD; for the vectorized assembly they are stacked along the first axis.
+    """
+
+    # Collection of valid dictionary keys
+    basic_mat_names = ("MMAT","AMAT","KMAT","SMAT")
+    element_mat_names = ("ELMMAT","ELAMAT","ELKMAT","ELSMAT")
+
+    # Basic matrices initialization to zeros at each Gauss point, collected 
+    # in dictionary basic_mat.
+    basic_mat = matrix_initialization(
+        conductor.dict_N_equation["NODOFS"],
+        conductor.dict_N_equation["NODOFS"],
+        basic_mat_names,
+        n_elem,
+        conductor.workspace,
+    )
+    # Basic source term vector initialization to zeros at each Gauss point. 
+    # Not included in dictionary base_mat to simplify the code, make it 
+    # explicit and easy to read and maintain.
+    SVEC = array_initialization(
+        conductor.dict_N_equation["NODOFS"],
+        conductor.cond_num_step,
+        col=2,
+        n_elem=n_elem,
+        name="SVEC",
+        workspace=conductor.workspace,
+    )
+
+    # Element matrices initialization to zeros at each Gauss point, 
+    # collected in dictionary element_mat.
+    element_mat = matrix_initialization(
+        conductor.dict_N_equation["NODOFS2"],
+        conductor.dict_N_equation["NODOFS2"],
+        element_mat_names,
+        n_elem,
+        conductor.workspace,
+    )
+    # Element source term vector initialization to zeros at each Gauss 
+    # point. Not included in dictionary element_mat to simplify the code, 
+    # make it explicit and easy to read and maintain.
+    ELSLOD = array_initialization(
+        conductor.dict_N_equation["NODOFS2"],
+        conductor.cond_num_step,
+        n_elem=n_elem,
+        name="ELSLOD",
+        workspace=conductor.workspace,
+    )
+
+    # ** FORM THE M, A, K, S MATRICES AND S VECTOR AT THE GAUSS POINT, 
+    # FLUID COMPONENTS EQUATIONS **
+
+    # FORM THE M MATRIX AT THE GAUSS POINT (MASS AND CAPACITY)
+    # FluidComponent equation: array smart
+    basic_mat["MMAT"][
+        ...,
+        :conductor.dict_N_equation["FluidComponent"],
+        :conductor.dict_N_equation["FluidComponent"],
+    ] = np.eye(conductor.dict_N_equation["FluidComponent"])
+    # END M MATRIX: fluid components equations
+
+    for fluid_comp_j in conductor.inventory["FluidComponent"].collection:
+
+        # FORM THE A MATRIX AT THE GAUSS POINT (FLUX JACOBIAN)
+        basic_mat["AMAT"] = build_amat(
+            basic_mat["AMAT"],
+            fluid_comp_j,
+            elem_idx,
+            conductor.equation_index[fluid_comp_j.identifier]
+        )
+
+        # FORM THE K MATRIX AT THE GAUSS POINT (INCLUDING UPWIND)
+        basic_mat["KMAT"] = build_kmat_fluid(
+            basic_mat["KMAT"],
+            upweqt,
+            fluid_comp_j,
+            conductor,
+            elem_idx,
+        )
+
+        # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
+        basic_mat["SMAT"] = build_smat_fluid(
+            basic_mat["SMAT"],
+            fluid_comp_j,
+            elem_idx,
+            conductor.equation_index[fluid_comp_j.identifier]
+        )
+
+    # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
+    # Therms associated to fluid-fluid interfaces.
+    basic_mat["SMAT"] = build_smat_fluid_interface(
+        basic_mat["SMAT"],
+        conductor,
+        elem_idx
+    )
+    # Therms associated to fluid-solid interfaces.
+    basic_mat["SMAT"] = build_smat_fluid_solid_interface(
+        basic_mat["SMAT"],
+        conductor,
+        elem_idx,
+    )
+    # END S MATRIX: fluid components equations
+
+    # * FORM THE M, A, K, S MATRICES AND S VECTOR AT THE GAUSS POINT, SOLID
+    # COMPONENTS EQUATIONS *
+    for s_comp_idx, s_comp in enumerate(
+        conductor.inventory["SolidComponent"].collection
+    ):
+        # FORM THE M MATRIX AT THE GAUSS POINT (MASS AND CAPACITY)
+        # SolidComponent equation.
+        basic_mat["MMAT"] = build_mmat_solid(
+            basic_mat["MMAT"],
+            s_comp,
+            elem_idx,
+            conductor.equation_index[s_comp.identifier]
+        )
+        # END M MATRIX: SolidComponent equation.
+
+        # FORM THE A MATRIX AT THE GAUSS POINT (FLUX JACOBIAN)
+        # No elements here.
+        # END A MATRIX: SolidComponent equation.
+
+        # FORM THE K MATRIX AT THE GAUSS POINT (INCLUDING UPWIND)
+        basic_mat["KMAT"] = build_kmat_solid(
+            basic_mat["KMAT"],
+            s_comp,
+            elem_idx,
+            conductor.equation_index[s_comp.identifier]
+        )
+        # END K MATRIX: SolidComponent equation.
+
+        # FORM THE S VECTOR AT THE NODAL POINTS (SOURCE)
+        SVEC = build_svec(
+            SVEC,
+            s_comp,
+            elem_idx,
+            conductor.equation_index[s_comp.identifier],
+            num_step=conductor.cond_num_step,
+            qsource=qsource,
+            comp_idx=s_comp_idx,
+        )
+
+    # FORM THE S MATRIX AT THE GAUSS POINT (SOURCE JACOBIAN)
+    basic_mat["SMAT"] = build_smat_solid_interface(
+        basic_mat["SMAT"],
+        conductor,
+        elem_idx,
+    )
+
+    for interface in conductor.interface.env_solid:
+        # Convective heating with the external environment (implicit 
+        # treatment).
+        basic_mat["SMAT"] = build_smat_env_solid_interface(
+            basic_mat["SMAT"],
+            conductor,
+            interface,
+            elem_idx,
+        )
+        # END S MATRIX: solid components equation.
+
+        SVEC = build_svec_env_jacket_interface(
+            SVEC,
+            conductor,
+            interface,
+            elem_idx,
+        )
+        # END S VECTOR: solid components equation.
+
+    # COMPUTE THE MASS AND CAPACITY MATRIX
+    # array smart
+    element_mat["ELMMAT"] = build_elmmat(
+        element_mat["ELMMAT"],
+        basic_mat["MMAT"],
+        conductor,
+        elem_idx,
+        alfa,
+    )
+
+    # COMPUTE THE CONVECTION MATRIX
+    # array smart
+    element_mat["ELAMAT"] = build_elamat(
+        element_mat["ELAMAT"],
+        basic_mat["AMAT"],
+        conductor,
+    )
+
+    # COMPUTE THE DIFFUSION MATRIX
+    # array smart
+    element_mat["ELKMAT"] = build_elkmat(
+        element_mat["ELKMAT"],
+        basic_mat["KMAT"],
+        conductor,
+        elem_idx,
+    )
+
+    # COMPUTE THE SOURCE MATRIX
+    # array smart
+    element_mat["ELSMAT"] = build_elsmat(
+        element_mat["ELSMAT"],
+        basic_mat["SMAT"],
+        conductor,
+        elem_idx,
+    )
+
+    # COMPUTE THE SOURCE VECTOR (ANALYTIC INTEGRATION)
+    # array smart
+    ELSLOD = build_elslod(
+        ELSLOD,
+        SVEC,
+        conductor,
+        elem_idx,
+    )
+
+    return element_mat, ELSLOD
+
 def gredub(conductor, A):
 
     """
@@ -807,6 +1015,160 @@ def gbacsb(conductor, A, B):
     return X
     # end of the function GBACSB
 
+def gauss_banded_solver(
+    conductor:Conductor,
+    A:np.ndarray,
+    B:np.ndarray,
+    )->np.ndarray:
+    """Function that solves the thermal hydraulic system A X = B by banded Gaussian elimination without pivoting (functions gredub and gbacsb).
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        A (np.ndarray): system matrix SYSMAT in band storage (overwritten by the reduced matrix).
+        B (np.ndarray): known therm vector (overwritten by the solution).
+
+    Returns:
+        np.ndarray: solution of the system (same object of B).
+    """
+
+    A = gredub(conductor, A)
+    return gbacsb(conductor, A, B)
+
+def lapack_banded_solver(
+    conductor:Conductor,
+    A:np.ndarray,
+    B:np.ndarray,
+    )->np.ndarray:
+    """Function that solves the thermal hydraulic system A X = B with the LAPACK banded LU factorization with partial pivoting (dgbtrf and dgbtrs), working directly on the band storage of SYSMAT.
+    SYSMAT stores row I of the system matrix in column I, i.e. it is the LAPACK band storage of the transposed matrix with kl = ku = Main_diag: the LU factorization of the transposed matrix is used to solve the transposed system.
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        A (np.ndarray): system matrix SYSMAT in band storage.
+        B (np.ndarray): known therm vector (overwritten by the solution).
+
+    Raises:
+        ValueError: if the half band width is not consistent with the matrix dimension.
+        ValueError: if the matrix is singular.
+
+    Returns:
+        np.ndarray: solution of the system (same object of B).
+    """
+
+    TINY = 1.0e-20
+    # Alias
+    main_diag = conductor.dict_band["Main_diag"]
+    total = conductor.dict_N_equation["Total"]
+
+    if main_diag < 0 or main_diag > total:
+        IERR = 1
+        if main_diag < 0:
+            raise ValueError(
+                f"""ERROR! The value of the half-band width given is not 
+      consistent with the matrix dimension:\n
+      {main_diag} < 0\nReturned error: IERR = {IERR}"""
+            )
+        else:
+            raise ValueError(
+                f"""ERROR! The value of the half-band width given is not 
+      consistent with the matrix dimension:\n
+      {main_diag} > {total}\nReturned error: IERR = {IERR}
+      \nEnd of the program\n"""
+            )
+
+    # LAPACK band storage with main_diag additional rows on top for the fill 
+    # in due to pivoting (need not be set before the factorization); Fortran
+    # order avoids the copy in the LAPACK wrapper.
+    ab = conductor.workspace.empty(
+        "LAPACK_AB", (3 * main_diag + 1, total), order="F"
+    )
+    ab[main_diag:, :] = A
+    lu, piv, info = dgbtrf(ab, main_diag, main_diag, overwrite_ab=1)
+
+    # Check if matrix is singular looking at the diagonal of factor U (stored 
+    # in row 2 * main_diag of lu).
+    ind = np.nonzero(abs(lu[2 * main_diag, :]) <= TINY)[0]
+    if info > 0 or len(ind) > 0:
+        line = ind[0] if len(ind) > 0 else info - 1
+        IERR = -line
+        raise ValueError(
+            f"""ERROR! Matrix is singular at line {line}: 
+      {lu[2 * main_diag, line]} < {TINY}\nReturned error: IERR = {IERR}\n
+      End of the program\n"""
+        )
+
+    # trans = 1: solve the transposed system since the band storage of SYSMAT
+    # is the one of the transposed matrix.
+    B[:], info = dgbtrs(lu, main_diag, main_diag, B, piv, trans=1)
+
+    return B
+
+def sparse_lu_solver(
+    conductor:Conductor,
+    A:np.ndarray,
+    B:np.ndarray,
+    )->np.ndarray:
+    """Function that solves the thermal hydraulic system A X = B with the sparse LU factorization of SuperLU and the COLAMD fill reducing ordering. The non zero values of the system matrix are gathered from the band storage of SYSMAT into the preallocated data array of the sparsity pattern evaluated once per mesh (see method Conductor.__build_sparse_pattern); only the values are updated at each time step.
+
+    Args:
+        conductor (Conductor): object with all the information of the conductor.
+        A (np.ndarray): system matrix SYSMAT in band storage.
+        B (np.ndarray): known therm vector (overwritten by the solution).
+
+    Raises:
+        ValueError: if the matrix is singular.
+
+    Returns:
+        np.ndarray: solution of the system (same object of B).
+    """
+
+    TINY = 1.0e-20
+    # Alias
+    pattern = conductor.sparse_pattern
+    total = conductor.dict_N_equation["Total"]
+
+    # Write the values in the preallocated data array (A is C contiguous, 
+    # band_index is the flat index in A).
+    np.take(A, pattern["band_index"], out=pattern["data"])
+    matrix = csc_matrix(
+        (pattern["data"], pattern["indices"], pattern["indptr"]),
+        shape=(total, total),
+    )
+
+    try:
+        lu = splu(matrix, permc_spec="COLAMD")
+    except RuntimeError as err:
+        # SuperLU raises RuntimeError if the factor is exactly singular.
+        raise ValueError(
+            f"""ERROR! Matrix is singular: {err}\n
+      End of the program\n"""
+        )
+    
+    # Check if matrix is singular looking at the diagonal of factor U.
+    u_diag = lu.U.diagonal()
+    ind = np.nonzero(abs(u_diag) <= TINY)[0]
+    if len(ind) > 0:
+        # Line of the system in the original ordering.
+        line = lu.perm_c[ind[0]]
+        IERR = -line
+        raise ValueError(
+            f"""ERROR! Matrix is singular at line {line}: 
+      {u_diag[ind[0]]} < {TINY}\nReturned error: IERR = {IERR}\n
+      End of the program\n"""
+        )
+
+    B[:] = lu.solve(B)
+
+    return B
+
+# Collection of the linear solvers of the thermal hydraulic system, selected 
+# by flag LINEAR_SOLVER of the transient input.
+LINEAR_SOLVERS = {
+    GAUSS_BANDED_SOLVER: gauss_banded_solver,
+    LAPACK_BANDED_SOLVER: lapack_banded_solver,
+    SPARSE_LU_SOLVER: sparse_lu_solver,
+}
+
 def eval_sub_array_norm(
     array:np.ndarray,
     conductor:Conductor,
@@ -824,36 +1186,13 @@ def eval_sub_array_norm(
 
     # Alias
     ndf = conductor.dict_N_equation["NODOFS"]
-    sub_array_norm = np.zeros(ndf)
-    # Collection of NamedTuple with fluid equation index (velocity, pressure 
-    # and temperaure equations) and of integer for solid equation index.
-    eq_idx = conductor.equation_index
     # Evaluate the square of the array.
     array **= 2.0
 
-    # Evaluate the sub arrays euclidean norm.
-    # Loop on FluidComponent.
-    for f_comp in conductor.inventory["FluidComponent"].collection:
-        # velocity
-        sub_array_norm[eq_idx[f_comp.identifier].velocity] = np.sum(
-            array[eq_idx[f_comp.identifier].velocity::ndf]
-        )
-        # pressure
-        sub_array_norm[eq_idx[f_comp.identifier].pressure] = np.sum(
-            array[eq_idx[f_comp.identifier].pressure::ndf]
-        )
-        # temperature
-        sub_array_norm[eq_idx[f_comp.identifier].temperature] = np.sum(
-            array[eq_idx[f_comp.identifier].temperature::ndf]
-        )
-    # Loop on SolidComponent.
-    for s_comp in conductor.inventory["SolidComponent"].collection:
-        # temperature
-        sub_array_norm[eq_idx[s_comp.identifier]] = np.sum(
-            array[eq_idx[s_comp.identifier]::ndf]
-        )
-    
-    return np.sqrt(sub_array_norm)
+    # Evaluate the sub arrays euclidean norm with a single reduction on the 
+    # (N_nod, NODOFS) view of the array (column jj is the sub array of the
+    # unknown of index jj).
+    return np.sqrt(np.sum(array.reshape(-1, ndf), axis=0))
 
 def eval_eigenvalues(
     array:np.ndarray,
@@ -872,30 +1211,16 @@ def eval_eigenvalues(
 
     # Alias
     ndf = conductor.dict_N_equation["NODOFS"]
-    sub_array = np.zeros(ndf)
-    # Collection of NamedTuple with fluid equation index (velocity, pressure 
-    # and temperaure equations) and of integer for solid equation index.
-    eq_idx = conductor.equation_index
+    n_fluid = conductor.inventory["FluidComponent"].number
     # COMPUTE THE EIGENVALUES
-    for f_comp in conductor.inventory["FluidComponent"].collection:
-        # velocity
-        sub_array[eq_idx[f_comp.identifier].velocity] = max(
-            array[eq_idx[f_comp.identifier].velocity::ndf]
-        )
-        # pressure
-        sub_array[eq_idx[f_comp.identifier].pressure] = max(
-            array[eq_idx[f_comp.identifier].velocity::ndf]
-        )
-        # temperature
-        sub_array[eq_idx[f_comp.identifier].temperature] = max(
-            array[eq_idx[f_comp.identifier].temperature::ndf]
-        )
-    # Loop on SolidComponent.
-    for s_comp in conductor.inventory["SolidComponent"].collection:
-        # temperature
-        sub_array[eq_idx[s_comp.identifier]] = max(
-            array[eq_idx[s_comp.identifier]::ndf]
-        )
+    # Single reduction on the (N_nod, NODOFS) view of the array (column jj is 
+    # the sub array of the unknown of index jj).
+    sub_array = np.max(array.reshape(-1, ndf), axis=0)
+    # The eigenvalue of the pressure of each FluidComponent is the one of the 
+    # velocity (equations are ordered as velocities, pressures and 
+    # temperatures of all the FluidComponent, see method 
+    # Conductor.__build_equation_idx).
+    sub_array[n_fluid:2 * n_fluid] = sub_array[:n_fluid]
     
     return sub_array
 
@@ -985,7 +1310,7 @@ def reorganize_th_solution(
     
     Sub arrays (i.e. CHAN_1 temperature spatial distribution) are given by sub_arr = array[jj::ndf] if jj is the index of the j-th conductor component object (i.e. CHAN_1).
 
-    Attribute f_comp.coolant.dict_node_pt (that stores fluid properties in nodal points) and s_comp.dict_node_pt (that stores solid properties) are updated inplace.
+    Attribute f_comp.coolant.dict_node_pt (that stores fluid properties in nodal points) and s_comp.dict_node_pt (that stores solid properties) are updated inplace. The sub arrays are views of dict_Step["SYSVAR_NODAL"], i.e. they share memory with the solution and must not be modified in place.
 
     Args:
         conductor (Conductor): object with all the information of the conductor.
@@ -993,25 +1318,26 @@ def reorganize_th_solution(
     """
 
     # Alias
-    ndf = conductor.dict_N_equation["NODOFS"]
-    sysvar = conductor.dict_Step["SYSVAR"]
+    # Zero copy view of the solution with shape (N_nod, NODOFS).
+    sysvar = conductor.dict_Step["SYSVAR_NODAL"]
     # Collection of NamedTuple with fluid equation index (velocity, pressure 
     # and temperaure equations) and of integer for solid equation index.
     eq_idx = conductor.equation_index
-    # Reorganize thermal hydraulic solution.
+    # Reorganize thermal hydraulic solution: nodal values are views (no 
+    # copies) of the columns of the solution.
     for f_comp in conductor.inventory["FluidComponent"].collection:
         # velocity
         f_comp.coolant.dict_node_pt["velocity"] = sysvar[
-            eq_idx[f_comp.identifier].velocity::ndf,0
-        ].copy()
+            :,eq_idx[f_comp.identifier].velocity
+        ]
         # pressure
         f_comp.coolant.dict_node_pt["pressure"] = sysvar[
-            eq_idx[f_comp.identifier].pressure::ndf,0
-        ].copy()
+            :,eq_idx[f_comp.identifier].pressure
+        ]
         # temperature
         f_comp.coolant.dict_node_pt["temperature"] = sysvar[
-            eq_idx[f_comp.identifier].temperature::ndf,0
-        ].copy()
+            :,eq_idx[f_comp.identifier].temperature
+        ]
         # Get temperature change in Gauss points.
         f_comp.coolant.dict_Gauss_pt["temperature_change"] = (
             f_comp.coolant.dict_node_pt["temperature"][:-1]
@@ -1020,9 +1346,7 @@ def reorganize_th_solution(
     # Loop on SolidComponent.
     for s_comp in conductor.inventory["SolidComponent"].collection:
         # temperature
-        s_comp.dict_node_pt["temperature"] = sysvar[
-            eq_idx[s_comp.identifier]::ndf,0
-        ].copy()
+        s_comp.dict_node_pt["temperature"] = sysvar[:,eq_idx[s_comp.identifier]]
         # Get temperature change in Gauss points.
         s_comp.dict_Gauss_pt["temperature_change"] = (
             s_comp.dict_node_pt["temperature"][:-1]